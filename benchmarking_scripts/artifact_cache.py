@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Cache of expensive intermediate results (such as ProtHint hints) shared by every tool.
+
+A step declares its input files (by content hash), parameters, tool version
+(a string, or the hash of the tool's script/binary) and the names of its output
+files. Together they form the key of an entry under
+results/artifact_cache/<step>/<key>/, so any run asking for the same step on
+the same inputs gets the stored outputs instead of recomputing them:
+
+    if artifact_cache.py fetch prothint --input genome.fa proteins.fa --tool prothint.py \\
+            --output prothint.gff evidence.gff; then
+        echo "restored"
+    else
+        prothint.py genome.fa proteins.fa && artifact_cache.py store prothint ...same arguments...
+    fi
+
+fetch copies the outputs into --dir and exits 1 on a miss; store files
+read-only copies of the outputs of a successful run under a lock, so an entry
+only exists once it is complete. Keeping fetch/store outside monitor.py means the ledger
+only times real runs.
+
+Usage:
+    artifact_cache.py key|fetch|store <step> [--input FILE ...] [--param KEY=VALUE ...]
+                      [--version V] [--tool FILE] --output NAME ... [--dir DIR] [--cache DIR]
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from genome_cache import cached_sha256
+
+
+def default_cache() -> Path:
+    """ $ARTIFACT_CACHE, or results/artifact_cache under $BENCHMARK_DIR"""
+    if os.environ.get("ARTIFACT_CACHE"):
+        return Path(os.environ["ARTIFACT_CACHE"])
+    return Path(os.environ.get("BENCHMARK_DIR", ".")) / "results" / "artifact_cache"
+
+
+def step_key(step: str, inputs: List[Path], params: Dict[str, str], version: Optional[str],
+             tool: Optional[Path], cache: Path) -> Dict:
+    """ Description of the step that identifies its outputs; `key` is its hash"""
+    desc = {
+        "step": step,
+        # inputs are positional (genome, then proteins, ...), so their order is part of the key
+        "inputs": [cached_sha256(p, cache) for p in inputs],
+        "params": dict(sorted(params.items())),
+        "version": version,
+        "tool": cached_sha256(tool, cache) if tool is not None else None,
+    }
+    desc["key"] = hashlib.sha256(json.dumps(desc, sort_keys=True).encode()).hexdigest()
+    return desc
+
+
+def _place(src: Path, dest: Path) -> None:
+    """ Copy src to dest with a fresh inode and default permissions, replacing dest"""
+    # no hardlinks: cache entries are read-only, and a shared inode would make the run folder's files read-only too
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def fetch(entry: Path, outputs: List[str], dest: Path) -> bool:
+    """ Restore the outputs of a cached entry into `dest`; False on a miss"""
+    if not (entry / "manifest.json").is_file() or not all((entry / o).is_file() for o in outputs):
+        return False
+    dest.mkdir(parents=True, exist_ok=True)
+    for o in outputs:
+        _place(entry / o, dest / o)
+    return True
+
+
+def store(entry: Path, desc: Dict, outputs: List[str], src: Path) -> None:
+    """ File the outputs in `src` under `entry`, unless another run already did"""
+    missing = [o for o in outputs if not (src / o).is_file()]
+    if missing:
+        raise FileNotFoundError(f"Cannot cache {desc['step']}: missing outputs {', '.join(missing)}")
+
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    with open(entry.parent / f"{entry.name}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if (entry / "manifest.json").is_file():
+            return
+        tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        for o in outputs:
+            _place(src / o, tmp / o)
+            (tmp / o).chmod(0o444)
+        manifest = dict(desc, outputs=outputs, source=str(src.resolve()),
+                        created_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        (tmp / "manifest.json").write_text(json.dumps(manifest, indent=1) + "\n")
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cache intermediate results keyed by inputs, parameters and tool version.")
+    ap.add_argument("action", choices=["key", "fetch", "store"])
+    ap.add_argument("step", help="Name of the step, e.g. prothint")
+    ap.add_argument("--input", nargs="+", type=Path, default=[], help="Input files, hashed by content")
+    ap.add_argument("--param", nargs="+", default=[], metavar="KEY=VALUE")
+    ap.add_argument("--version", default=None, help="Tool version string")
+    ap.add_argument("--tool", type=Path, default=None, help="Tool script/binary, hashed as its version")
+    ap.add_argument("--output", nargs="+", default=[], help="Output file names, relative to --dir")
+    ap.add_argument("--dir", type=Path, default=Path("."), help="Where outputs are read from/restored to")
+    ap.add_argument("--cache", type=Path, default=None, help="Default: $ARTIFACT_CACHE or results/artifact_cache")
+    args = ap.parse_args()
+
+    params = {}
+    for kv in args.param:
+        k, sep, v = kv.partition("=")
+        if not sep:
+            ap.error(f"--param expects KEY=VALUE, got {kv}")
+        params[k] = v
+    for p in args.input + ([args.tool] if args.tool else []):
+        if not p.is_file():
+            sys.exit(f"Error: {p} not found.")
+    if args.action != "key" and not args.output:
+        ap.error(f"{args.action} needs --output")
+
+    cache = default_cache() if args.cache is None else args.cache
+    desc = step_key(args.step, args.input, params, args.version, args.tool, cache)
+    entry = cache / args.step / desc["key"][:24]
+
+    if args.action == "key":
+        print(desc["key"])
+    elif args.action == "fetch":
+        if not fetch(entry, args.output, args.dir):
+            sys.exit(1)
+        print(f"{args.step}: restored {', '.join(args.output)} from {entry}", file=sys.stderr)
+    else:
+        try:
+            store(entry, desc, args.output, args.dir)
+        except FileNotFoundError as e:
+            sys.exit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
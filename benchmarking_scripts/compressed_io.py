@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Transparent reading and writing of plain, gzip, BGZF and zstd text files.
+
+open_text() recognises the compression of an input from its first bytes, so
+renamed files still work, and picks the compression of an output from its
+extension (.gz, .bgz, .zst). BGZF (blocked gzip, as written by bgzip) is plain
+gzip to every other reader; here its blocks are inflated by a pool of threads
+(zlib releases the GIL), so large BGZF inputs decompress on several cores.
+zstd needs the optional zstandard package.
+
+Usage:
+    compressed_io.py cat FILE ...                       (print decompressed)
+    compressed_io.py compress FILE OUT [--threads N]    (compression from OUT's extension)
+    compressed_io.py pack FILE ... --suffix gz|bgz|zst  (replace each FILE by FILE.<suffix>)
+"""
+
+import argparse
+import io
+import mmap
+import shutil
+import struct
+import sys
+import zlib
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, Tuple
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+SUFFIXES = {".gz": "gzip", ".bgz": "bgzf", ".zst": "zstd"}
+
+BGZF_BLOCK_INPUT = 0xff00
+BGZF_HEADER = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00"
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+
+def strip_compression(name: str) -> str:
+    """ File name without its compression suffix: x.gff3.gz -> x.gff3"""
+    for suffix in SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def detect(path: Path) -> str:
+    """ plain, gzip, bgzf or zstd, from the first bytes of the file"""
+    with open(path, "rb") as fh:
+        head = fh.read(18)
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    if head.startswith(GZIP_MAGIC):
+        # BGZF blocks are gzip members with a 'BC' extra subfield holding the block size
+        return "bgzf" if len(head) >= 16 and head[3] & 4 and head[12:14] == b"BC" else "gzip"
+    return "plain"
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd files need the zstandard package (pip install zstandard)") from None
+    return zstandard
+
+
+def bgzf_blocks(mm) -> Iterator[Tuple[int, int]]:
+    """ (start, end) byte offsets of every BGZF block"""
+    pos = 0
+    while pos < len(mm):
+        if mm[pos:pos + 2] != GZIP_MAGIC:
+            raise ValueError(f"Not a BGZF block at byte {pos}")
+        xlen = struct.unpack_from("<H", mm, pos + 10)[0]
+        extra, bsize = pos + 12, None
+        while extra < pos + 12 + xlen:
+            sub_id, sub_len = mm[extra:extra + 2], struct.unpack_from("<H", mm, extra + 2)[0]
+            if sub_id == b"BC":
+                bsize = struct.unpack_from("<H", mm, extra + 4)[0]
+            extra += 4 + sub_len
+        if bsize is None:
+            raise ValueError(f"BGZF block at byte {pos} has no size")
+        yield pos, pos + bsize + 1
+        pos += bsize + 1
+
+
+def _inflate(block: bytes) -> bytes:
+    xlen = struct.unpack_from("<H", block, 10)[0]
+    return zlib.decompress(block[12 + xlen:-8], -15)
+
+
+class BgzfReader(io.RawIOBase):
+    """ Decompressed bytes of a BGZF file, with batches of blocks inflated in parallel"""
+
+    def __init__(self, path: Path, threads: int = 4, batch: int = 64):
+        self.fh = open(path, "rb")
+        self.mm = mmap.mmap(self.fh.fileno(), 0, access=mmap.ACCESS_READ) if path.stat().st_size else b""
+        self.blocks = bgzf_blocks(self.mm)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, threads))
+        self.batch = batch * max(1, threads)
+        self.buf, self.pos = b"", 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self) -> bool:
+        spans = [s for _, s in zip(range(self.batch), self.blocks)]
+        if not spans:
+            return False
+        self.buf, self.pos = b"".join(self.pool.map(_inflate, [self.mm[a:b] for a, b in spans])), 0
+        return True
+
+    def readinto(self, b) -> int:
+        while self.pos >= len(self.buf):
+            if not self._fill():
+                return 0
+        n = min(len(b), len(self.buf) - self.pos)
+        b[:n] = self.buf[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self.pool.shutdown()
+            if isinstance(self.mm, mmap.mmap):
+                self.mm.close()
+            self.fh.close()
+        super().close()
+
+
+class BgzfWriter(io.RawIOBase):
+    """ BGZF output: independent gzip blocks of at most 64 KB, then the empty EOF block"""
+
+    def __init__(self, path: Path, level: int = 6):
+        self.fh = open(path, "wb")
+        self.level = level
+        self.pending = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def _block(self, data: bytes) -> None:
+        comp = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        cdata = comp.compress(data) + comp.flush()
+        self.fh.write(BGZF_HEADER + struct.pack("<H", len(BGZF_HEADER) + 2 + len(cdata) + 8 - 1))
+        self.fh.write(cdata + struct.pack("<2I", zlib.crc32(data), len(data)))
+
+    def write(self, b) -> int:
+        self.pending += b
+        while len(self.pending) >= BGZF_BLOCK_INPUT:
+            self._block(bytes(self.pending[:BGZF_BLOCK_INPUT]))
+            del self.pending[:BGZF_BLOCK_INPUT]
+        return len(b)
+
+    def close(self) -> None:
+        if not self.closed:
+            if self.pending:
+                self._block(bytes(self.pending))
+            self.fh.write(BGZF_EOF)
+            self.fh.close()
+        super().close()
+
+
+def open_binary(path: Path, mode: str = "rb", threads: int = 4):
+    """ Binary stream of a possibly compressed file ('rb' detects, 'wb' follows the extension)"""
+    path = Path(path)
+    if mode.startswith("r"):
+        kind = detect(path)
+        if kind == "bgzf":
+            return io.BufferedReader(BgzfReader(path, threads), buffer_size=1 << 20)
+        if kind == "gzip":
+            import gzip
+            return gzip.open(path, "rb")
+        if kind == "zstd":
+            return _zstd().ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return open(path, "rb")
+
+    kind = SUFFIXES.get(path.suffix, "plain")
+    if kind == "bgzf":
+        return io.BufferedWriter(BgzfWriter(path), buffer_size=1 << 20)
+    if kind == "gzip":
+        import gzip
+        return gzip.open(path, "wb", compresslevel=6)
+    if kind == "zstd":
+        return _zstd().ZstdCompressor(threads=threads).stream_writer(open(path, "wb"), closefd=True)
+    return open(path, "wb")
+
+
+def open_text(path: Path, mode: str = "r", threads: int = 4, encoding: str = "utf-8"):
+    """ open() for text files that may be gzip, BGZF or zstd compressed"""
+    mode = mode.replace("t", "")
+    return io.TextIOWrapper(open_binary(path, mode[0] + "b", threads), encoding=encoding,
+                            newline="" if mode[0] == "w" else None)
+
+
+def compress(src: Path, dest: Path, threads: int = 4) -> None:
+    """ Copy `src` (compressed or not) to `dest`, compressed according to its extension, atomically"""
+    tmp = dest.with_name(f".{dest.stem}.partial{dest.suffix}")
+    with open_binary(src, "rb", threads) as fh, open_binary(tmp, "wb", threads) as out:
+        shutil.copyfileobj(fh, out, 1 << 20)
+    tmp.replace(dest)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Read or write plain/gzip/BGZF/zstd files.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    cat = sub.add_parser("cat")
+    cat.add_argument("files", nargs="+", type=Path)
+    cat.add_argument("--threads", type=int, default=4)
+    comp = sub.add_parser("compress", help="Rewrite FILE as OUT, compressed according to OUT's extension")
+    comp.add_argument("file", type=Path)
+    comp.add_argument("out", type=Path)
+    comp.add_argument("--threads", type=int, default=4)
+    pack = sub.add_parser("pack", help="Replace every FILE by FILE.<suffix>; missing files are ignored")
+    pack.add_argument("files", nargs="+", type=Path)
+    pack.add_argument("--suffix", required=True, choices=[s.lstrip(".") for s in SUFFIXES])
+    pack.add_argument("--threads", type=int, default=4)
+    args = ap.parse_args()
+
+    try:
+        if args.cmd == "cat":
+            for f in args.files:
+                with open_binary(f, "rb", args.threads) as fh:
+                    shutil.copyfileobj(fh, sys.stdout.buffer, 1 << 20)
+        elif args.cmd == "compress":
+            compress(args.file, args.out, args.threads)
+        else:
+            for f in args.files:
+                if f.is_file():
+                    compress(f, f.with_name(f"{f.name}.{args.suffix}"), args.threads)
+                    f.unlink()
+    except (OSError, ValueError, RuntimeError) as e:
+        sys.exit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Historical cost model of the benchmark runs, used to plan the scheduler.
+
+For every tool, the wall time and the peak RSS of the successful runs in the
+ledger (or, for tools the ledger has never seen, the time and memory encoded in
+the aggregated result file names) are fitted as
+
+    log(y) = a + b * log(genome_bp) + c * mut_rate + d[hint or model]
+
+by least squares. Tools measured on a single genome size get b = 1 (cost
+proportional to the genome). Size-scaling runs count with their input_bp;
+thread-scaling and sharded runs are left out, as they do not use the
+scheduler's default cores.
+
+scheduler.py --plan uses the predictions to simulate the matrix under the
+CPU/RAM budgets, and --cost_model to start the longest predicted chains first.
+
+Usage:
+    cost_model.py fit [--ledger FILE] [--aggregated DIR] [--species S ...]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from fasta_index import read_lengths
+
+KNOWN_TOOLS = ("augustus", "genemarkes", "genemarkep", "genemarketp", "gemoma", "snap", "prothint", "geanno")
+
+
+@dataclass
+class Observation:
+    tool: str
+    species: str
+    mut_rate: float
+    variant: str       # hint, or model for SNAP/GeAnno; "" when neither
+    genome_bp: int
+    wall_sec: float
+    max_rss_kb: float
+
+
+def genome_bp(fasta: Path, cache: Optional[Path] = None) -> int:
+    """ Total length of a FASTA, from its .fai (fasta_index.py); memoised in `cache` by size and mtime"""
+    st = fasta.stat()
+    stamp = f"{st.st_size}:{int(st.st_mtime)}"
+    memo = {}
+    if cache is not None and cache.is_file():
+        memo = json.loads(cache.read_text())
+        if memo.get(str(fasta), {}).get("stamp") == stamp:
+            return memo[str(fasta)]["bp"]
+
+    bp = sum(length for _, length in read_lengths(fasta))
+
+    if cache is not None:
+        memo[str(fasta)] = dict(stamp=stamp, bp=bp)
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_name(f".{cache.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(memo, indent=1) + "\n")
+        os.replace(tmp, cache)
+    return bp
+
+
+class GenomeSizes:
+    """ Genome size of each benchmark species, read once"""
+
+    def __init__(self, species_dir: Path, cache: Optional[Path] = None):
+        self.species_dir = species_dir
+        self.cache = cache
+        self.sizes: Dict[str, Optional[int]] = {}
+
+    def __call__(self, species: str) -> Optional[int]:
+        if species not in self.sizes:
+            fasta = self.species_dir / species / f"{species}_dna.fa"
+            self.sizes[species] = genome_bp(fasta, self.cache) if fasta.is_file() else None
+        return self.sizes[species]
+
+
+def ledger_observations(db_path: Path, sizes: GenomeSizes) -> List[Observation]:
+    """ Successful ledger runs on the whole genome (or a size-scaling subsample) with default cores"""
+    con = sqlite3.connect(db_path, timeout=60)
+    try:
+        rows = con.execute("SELECT tool, species, mut_rate, hint, model, params, wall_sec, max_rss_kb FROM runs "
+                           "WHERE exit_code = 0 AND wall_sec > 0 AND max_rss_kb > 0").fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        con.close()
+
+    out = []
+    for tool, species, mut_rate, hint, model, params, wall, rss in rows:
+        params = json.loads(params or "{}")
+        if params.get("mode") == "thread_scaling" or int(params.get("shard_jobs", 1)) > 1:
+            continue
+        bp = int(params["input_bp"]) if params.get("input_bp") else sizes(species) if species else None
+        if not bp:
+            continue
+        out.append(Observation(tool, species, mut_rate or 0.0, hint or model or "", bp, wall, rss))
+    return out
+
+
+def aggregated_observations(aggregated: Path, sizes: GenomeSizes) -> List[Observation]:
+    """ Runs encoded as <tool>_<genus>_<species>_<mr>[_<hint|ref>]_<T>_<M> in the aggregated file names"""
+    out = []
+    for p in sorted(aggregated.glob("*")) if aggregated.is_dir() else []:
+        parts = p.name.split(".")[0].split("_")
+        if parts[0] not in KNOWN_TOOLS or len(parts) not in (6, 7):
+            continue
+        try:
+            mut_rate = 0.0 if parts[3] == "original" else float(parts[3])
+            wall, rss = float(parts[-2]), float(parts[-1])
+        except ValueError:
+            continue
+        species = "_".join(parts[1:3])
+        bp = sizes(species)
+        if bp and wall > 0 and rss > 0:
+            variant = parts[4] if len(parts) == 7 else ""
+            out.append(Observation(parts[0], species, mut_rate, variant, bp, wall, rss))
+    return out
+
+
+def load_observations(ledger: Optional[Path], aggregated: Optional[Path], sizes: GenomeSizes) -> List[Observation]:
+    """ Ledger runs, plus aggregated results for the tools the ledger has no run of"""
+    obs = ledger_observations(ledger, sizes) if ledger is not None and ledger.is_file() else []
+    seen = {o.tool for o in obs}
+    if aggregated is not None:
+        obs += [o for o in aggregated_observations(aggregated, sizes) if o.tool not in seen]
+    return obs
+
+
+class ToolFit:
+    """ Least-squares fit of log(wall time) and log(peak RSS) for one tool"""
+
+    def __init__(self, obs: List[Observation]):
+        self.n = len(obs)
+        self.variants = sorted({o.variant for o in obs})
+        # the most frequent variant is the baseline, the others get an offset
+        base = max(self.variants, key=lambda v: sum(o.variant == v for o in obs))
+        self.offsets = [v for v in self.variants if v != base]
+        log_bp = np.log([o.genome_bp for o in obs])
+        mr = np.array([o.mut_rate for o in obs])
+        self.use_mr = np.ptp(mr) > 0
+        self.free_slope = np.ptp(log_bp) > 0
+
+        cols = [np.ones(self.n)]
+        if self.free_slope:
+            cols.append(log_bp)
+        if self.use_mr:
+            cols.append(mr)
+        cols += [np.array([o.variant == v for o in obs], dtype=float) for v in self.offsets]
+        x = np.column_stack(cols)
+        self.coef = {}
+        for target in ("wall_sec", "max_rss_kb"):
+            y = np.log([getattr(o, target) for o in obs])
+            if not self.free_slope:
+                y = y - log_bp
+            beta, *_ = np.linalg.lstsq(x, y, rcond=None)
+            resid = y - x @ beta
+            self.coef[target] = (beta, float(np.sqrt(np.mean(resid ** 2))))
+
+    def predict(self, genome_bp: int, mut_rate: float, variant: str) -> Tuple[float, float]:
+        """ (wall seconds, peak RSS KB); unseen variants get the baseline"""
+        row = [1.0]
+        if self.free_slope:
+            row.append(np.log(genome_bp))
+        if self.use_mr:
+            row.append(mut_rate)
+        row += [float(variant == v) for v in self.offsets]
+        out = []
+        for target in ("wall_sec", "max_rss_kb"):
+            beta, _ = self.coef[target]
+            log_y = float(np.dot(row, beta)) + (0.0 if self.free_slope else np.log(genome_bp))
+            out.append(float(np.exp(log_y)))
+        return out[0], out[1]
+
+
+class CostModel:
+    """ Per-tool fits; predict() returns None for tools without history"""
+
+    def __init__(self, obs: List[Observation]):
+        by_tool: Dict[str, List[Observation]] = {}
+        for o in obs:
+            by_tool.setdefault(o.tool, []).append(o)
+        self.fits = {tool: ToolFit(o) for tool, o in by_tool.items()}
+
+    def predict(self, tool: str, genome_bp: Optional[int], mut_rate: float,
+                variant: str = "") -> Optional[Tuple[float, float]]:
+        fit = self.fits.get(tool)
+        if fit is None or not genome_bp:
+            return None
+        return fit.predict(genome_bp, mut_rate, variant)
+
+
+def default_model(bdir: Path, ledger: Optional[Path] = None,
+                  aggregated: Optional[Path] = None) -> Tuple[CostModel, GenomeSizes]:
+    """ Model fitted on the ledger and aggregated results of a benchmark folder"""
+    sizes = GenomeSizes(bdir / "species" / "benchmark_species", bdir / "results" / "scheduler" / "genome_sizes.json")
+    ledger = ledger or Path(os.environ.get("BENCHMARK_LEDGER", bdir / "results" / "ledger.sqlite"))
+    obs = load_observations(ledger, aggregated or bdir / "results" / "compiled" / "aggregated", sizes)
+    return CostModel(obs), sizes
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fit per-tool time/RAM models on past benchmark runs.")
+    ap.add_argument("cmd", choices=["fit"])
+    ap.add_argument("--ledger", type=Path, default=None, help="Default: $BENCHMARK_LEDGER or results/ledger.sqlite")
+    ap.add_argument("--aggregated", type=Path, default=None, help="Default: results/compiled/aggregated")
+    ap.add_argument("--species", nargs="+", default=None, help="Species to predict (default: every benchmark species)")
+    args = ap.parse_args()
+
+    if not os.environ.get("BENCHMARK_DIR"):
+        sys.exit("Error: BENCHMARK_DIR is not set. Please source the env.sh file first.")
+    model, sizes = default_model(Path(os.environ["BENCHMARK_DIR"]), args.ledger, args.aggregated)
+    if not model.fits:
+        sys.exit("Error: no successful runs found in the ledger or the aggregated results.")
+    species = args.species or sorted(p.name for p in sizes.species_dir.iterdir() if p.is_dir())
+
+    sys.stdout.write("tool\tn_runs\tslope_time\trmse_log_time\tslope_rss\trmse_log_rss\n")
+    for tool, fit in sorted(model.fits.items()):
+        (bt, et), (bm, em) = fit.coef["wall_sec"], fit.coef["max_rss_kb"]
+        st = f"{bt[1]:.3f}" if fit.free_slope else "1"
+        sm = f"{bm[1]:.3f}" if fit.free_slope else "1"
+        sys.stdout.write(f"{tool}\t{fit.n}\t{st}\t{et:.3f}\t{sm}\t{em:.3f}\n")
+
+    sys.stdout.write("\ntool\tspecies\tgenome_bp\tvariant\tpred_sec\tpred_rss_gb\n")
+    for tool, fit in sorted(model.fits.items()):
+        for sp in species:
+            bp = sizes(sp)
+            for v in fit.variants:
+                pred = model.predict(tool, bp, 0.0, v)
+                if pred:
+                    sys.stdout.write(f"{tool}\t{sp}\t{bp}\t{v or '-'}\t{pred[0]:.0f}\t{pred[1] / 1024 ** 2:.2f}\n")
+
+
+if __name__ == "__main__":
+    main()
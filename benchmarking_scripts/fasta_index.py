@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Random access to the sequences of a FASTA file.
+
+The index is the samtools faidx .fai next to the FASTA (name, length, offset,
+bases per line, bytes per line), built once and rebuilt when the FASTA is newer.
+The FASTA is memory-mapped, so a region is read by seeking straight to it and
+costs time proportional to its size, not to the genome. fetch_many() reads a
+batch of regions in file order.
+
+A UCSC .2bit copy (four bases per byte, N and soft-masked runs kept as blocks)
+can be written next to the FASTA and used instead (twobit=True) to read four
+times less data. It only holds A/C/G/T/N, so genomes with other IUPAC codes
+keep using the FASTA.
+
+Usage:
+    fasta_index.py faidx in.fa [REGION ...]     (REGION = name or name:start-end, 1-based)
+    fasta_index.py 2bit in.fa
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+LINE_WIDTH = 60
+
+TWOBIT_SIGNATURE = 0x1A412743
+TWOBIT_CODE = np.full(256, 255, dtype=np.uint8)
+for _i, _b in enumerate(b"TCAG"):
+    TWOBIT_CODE[_b] = TWOBIT_CODE[_b + 32] = _i
+TWOBIT_CODE[ord("N")] = TWOBIT_CODE[ord("n")] = 0
+# the four bases of every packed byte, most significant bits first
+TWOBIT_UNPACK = np.frombuffer(b"TCAG", dtype=np.uint8)[
+    (np.arange(256)[:, None] >> np.array([6, 4, 2, 0])) & 3]
+
+Region = Tuple[str, int, int]
+
+
+@dataclass
+class FaiEntry:
+    name: str
+    length: int
+    offset: int     # byte offset of the first base
+    linebases: int
+    linewidth: int  # bases plus end of line bytes
+
+    def byte(self, pos: int) -> int:
+        """ File offset of 0-based position `pos` (pos == length gives the end of the sequence)"""
+        if not self.linebases:
+            return self.offset
+        return self.offset + pos // self.linebases * self.linewidth + pos % self.linebases
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ (starts, sizes) of the runs of True in a boolean array"""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+
+def build_fai(fasta: Path) -> List[FaiEntry]:
+    """ faidx entries of every record; raises ValueError on lines of uneven length, as samtools does"""
+    entries = []
+    with open(fasta, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        headers = []
+        pos = 0 if mm[:1] == b">" else mm.find(b"\n>")
+        while pos != -1:
+            if mm[pos:pos + 1] == b"\n":
+                pos += 1
+            headers.append(pos)
+            pos = mm.find(b"\n>", pos)
+
+        for i, head in enumerate(headers):
+            end = headers[i + 1] if i + 1 < len(headers) else len(mm)
+            eol = mm.find(b"\n", head, end)
+            start = end if eol == -1 else eol + 1
+            name = (mm[head + 1:start].split() or [b""])[0].decode()
+
+            body = np.frombuffer(mm, dtype=np.uint8, count=end - start, offset=start)
+            newlines = np.flatnonzero(body == 10)
+            crlf = len(newlines) and newlines[0] > 0 and body[newlines[0] - 1] == 13
+            del body  # the map cannot close while a view of it exists
+
+            bounds = np.concatenate(([0], newlines + 1))
+            if bounds[-1] < end - start:
+                bounds = np.append(bounds, end - start)  # last line without a newline
+            widths = np.diff(bounds)
+            eol_bytes = 2 if crlf else 1
+            bases = widths - np.where(np.arange(len(widths)) < len(newlines), eol_bytes, 0)
+            while len(bases) and bases[-1] == 0:  # trailing blank lines
+                bases, widths = bases[:-1], widths[:-1]
+            if len(bases) > 1 and (np.any(widths[:-1] != widths[0]) or bases[-1] > bases[0]):
+                raise ValueError(f"{fasta}: different line lengths in sequence {name}")
+            linebases = int(bases[0]) if len(bases) else 0
+            entries.append(FaiEntry(name, int(bases.sum()), start, linebases, linebases + eol_bytes))
+    return entries
+
+
+def write_fai(entries: Iterable[FaiEntry], path: Path) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as out:
+        for e in entries:
+            out.write(f"{e.name}\t{e.length}\t{e.offset}\t{e.linebases}\t{e.linewidth}\n")
+    os.replace(tmp, path)
+
+
+def read_fai(path: Path) -> List[FaiEntry]:
+    out = []
+    with open(path) as fh:
+        for line in fh:
+            f = line.rstrip("\n").split("\t")
+            if len(f) >= 5:
+                out.append(FaiEntry(f[0], int(f[1]), int(f[2]), int(f[3]), int(f[4])))
+    return out
+
+
+def _fresh(cache: Path, source: Path) -> bool:
+    return cache.is_file() and cache.stat().st_mtime >= source.stat().st_mtime
+
+
+def load_fai(fasta: Path, write: bool = True) -> List[FaiEntry]:
+    """ Entries from <fasta>.fai, (re)built when missing or older than the FASTA"""
+    fai = fasta.with_name(fasta.name + ".fai")
+    if _fresh(fai, fasta):
+        return read_fai(fai)
+    entries = build_fai(fasta)
+    if write:
+        try:
+            write_fai(entries, fai)
+        except OSError:
+            pass  # read-only folder, e.g. the genome cache
+    return entries
+
+
+def read_lengths(fasta: Path) -> List[Tuple[str, int]]:
+    """ (name, length) of every sequence, in file order"""
+    return [(e.name, e.length) for e in load_fai(fasta)]
+
+
+def parse_region(region: str, lengths: Dict[str, int]) -> Region:
+    """ samtools-style name[:start[-end]] (1-based, inclusive) as a 0-based half-open region"""
+    if region in lengths:
+        return region, 0, lengths[region]
+    name, _, span = region.rpartition(":")
+    if name not in lengths:
+        raise KeyError(f"Unknown sequence {region}")
+    start, _, end = span.replace(",", "").partition("-")
+    return name, max(int(start) - 1, 0), min(int(end), lengths[name]) if end else lengths[name]
+
+
+class TwoBit:
+    """ Reader of UCSC .2bit files (versions 0 and 1)"""
+
+    def __init__(self, path: Path):
+        self.fh = open(path, "rb")
+        self.mm = mmap.mmap(self.fh.fileno(), 0, access=mmap.ACCESS_READ)
+        sig, version, count, _ = struct.unpack_from("<4I", self.mm, 0)
+        if sig != TWOBIT_SIGNATURE:
+            raise ValueError(f"{path} is not a little-endian .2bit file")
+        off_fmt = "<Q" if version == 1 else "<I"
+        self.offsets: Dict[str, int] = {}
+        pos = 16
+        for _ in range(count):
+            size = self.mm[pos]
+            name = self.mm[pos + 1:pos + 1 + size].decode()
+            self.offsets[name] = struct.unpack_from(off_fmt, self.mm, pos + 1 + size)[0]
+            pos += 1 + size + struct.calcsize(off_fmt)
+        self.records: Dict[str, Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]] = {}
+
+    def close(self) -> None:
+        self.records.clear()
+        self.mm.close()
+        self.fh.close()
+
+    def _record(self, name: str):
+        if name not in self.records:
+            pos = self.offsets[name]
+            length, n_count = struct.unpack_from("<2I", self.mm, pos)
+            pos += 8
+            n_starts = np.frombuffer(self.mm, dtype="<u4", count=n_count, offset=pos)
+            n_sizes = np.frombuffer(self.mm, dtype="<u4", count=n_count, offset=pos + 4 * n_count)
+            pos += 8 * n_count
+            m_count = struct.unpack_from("<I", self.mm, pos)[0]
+            pos += 4
+            m_starts = np.frombuffer(self.mm, dtype="<u4", count=m_count, offset=pos)
+            m_sizes = np.frombuffer(self.mm, dtype="<u4", count=m_count, offset=pos + 4 * m_count)
+            pos += 8 * m_count + 4
+            self.records[name] = (length, n_starts, n_sizes, m_starts, m_sizes, pos)
+        return self.records[name]
+
+    def length(self, name: str) -> int:
+        return self._record(name)[0]
+
+    def fetch(self, name: str, start: int, end: int) -> str:
+        _, n_starts, n_sizes, m_starts, m_sizes, packed = self._record(name)
+        if end <= start:
+            return ""
+        first, last = start // 4, (end + 3) // 4
+        raw = np.frombuffer(self.mm, dtype=np.uint8, count=last - first, offset=packed + first)
+        seq = TWOBIT_UNPACK[raw].ravel()[start - 4 * first:end - 4 * first].copy()
+        for starts, sizes, apply in ((n_starts, n_sizes, lambda s: s.fill(ord("N"))),
+                                     (m_starts, m_sizes, lambda s: np.bitwise_or(s, 32, out=s))):
+            # blocks are sorted and do not overlap, so only the ones from the last block starting before `start` matter
+            i = max(int(np.searchsorted(starts, start, side="right")) - 1, 0)
+            j = int(np.searchsorted(starts, end, side="left"))
+            for s, z in zip(starts[i:j], sizes[i:j]):
+                lo, hi = max(int(s), start), min(int(s) + int(z), end)
+                if lo < hi:
+                    apply(seq[lo - start:hi - start])
+        return seq.tobytes().decode()
+
+
+def write_twobit(fasta: Path, out: Path, entries: Optional[List[FaiEntry]] = None) -> None:
+    """ UCSC .2bit copy of `fasta`; ValueError if a sequence has bases other than A/C/G/T/N"""
+    entries = entries or load_fai(fasta)
+    names = [e.name.encode() for e in entries]
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+    with open(fasta, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, open(tmp, "wb") as w:
+        # the index is written last, once the record offsets are known; version 1 has 64-bit offsets
+        version = 1 if os.path.getsize(fasta) >= 1 << 32 else 0
+        off_size = 8 if version == 1 else 4
+        w.write(struct.pack("<4I", TWOBIT_SIGNATURE, version, len(entries), 0))
+        index_pos = w.tell()
+        w.write(b"\0" * sum(1 + len(n) + off_size for n in names))
+        offsets = []
+        for e in entries:
+            raw = np.frombuffer(mm[e.byte(0):e.byte(e.length)].translate(None, b"\r\n"), dtype=np.uint8)
+            codes = TWOBIT_CODE[raw]
+            if np.any(codes == 255):
+                raise ValueError(f"{fasta}: sequence {e.name} has bases other than A/C/G/T/N")
+            n_starts, n_sizes = _runs((raw | 32) == ord("n"))
+            m_starts, m_sizes = _runs(raw >= ord("a"))
+            padded = np.concatenate((codes, np.zeros(-len(codes) % 4, dtype=np.uint8))).reshape(-1, 4)
+            packed = (padded[:, 0] << 6) | (padded[:, 1] << 4) | (padded[:, 2] << 2) | padded[:, 3]
+            offsets.append(w.tell())
+            w.write(struct.pack("<2I", e.length, len(n_starts)))
+            w.write(n_starts.astype("<u4").tobytes() + n_sizes.astype("<u4").tobytes())
+            w.write(struct.pack("<I", len(m_starts)))
+            w.write(m_starts.astype("<u4").tobytes() + m_sizes.astype("<u4").tobytes())
+            w.write(struct.pack("<I", 0))
+            w.write(packed.astype(np.uint8).tobytes())
+        w.seek(index_pos)
+        for n, off in zip(names, offsets):
+            w.write(struct.pack("<B", len(n)) + n + struct.pack("<Q" if version == 1 else "<I", off))
+    os.replace(tmp, out)
+
+
+class FastaIndex:
+    """ Memory-mapped FASTA with O(1) seeks to any region; use as a context manager"""
+
+    def __init__(self, fasta: Path, twobit: bool = False):
+        self.fasta = Path(fasta)
+        self.entries = {e.name: e for e in load_fai(self.fasta)}
+        self.twobit: Optional[TwoBit] = None
+        if twobit:
+            path = self.fasta.with_name(self.fasta.stem + ".2bit")
+            try:
+                if not _fresh(path, self.fasta):
+                    write_twobit(self.fasta, path, list(self.entries.values()))
+                self.twobit = TwoBit(path)
+            except (ValueError, OSError) as e:
+                print(f"Warning: no .2bit cache for {self.fasta} ({e}); reading the FASTA", file=sys.stderr)
+        self.fh = open(self.fasta, "rb")
+        self.mm = mmap.mmap(self.fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if self.twobit is not None:
+            self.twobit.close()
+        self.mm.close()
+        self.fh.close()
+
+    @property
+    def lengths(self) -> Dict[str, int]:
+        return {n: e.length for n, e in self.entries.items()}
+
+    def fetch(self, name: str, start: int = 0, end: Optional[int] = None) -> str:
+        """ Bases [start, end) of sequence `name` (0-based, clipped to the sequence)"""
+        e = self.entries[name]
+        start, end = max(start, 0), e.length if end is None else min(end, e.length)
+        if end <= start:
+            return ""
+        if self.twobit is not None:
+            return self.twobit.fetch(name, start, end)
+        return self.mm[e.byte(start):e.byte(end)].translate(None, b"\r\n").decode()
+
+    def fetch_many(self, regions: Sequence[Region]) -> List[str]:
+        """ Sequences of many (name, start, end) regions, read in file order and returned in input order"""
+        order = sorted(range(len(regions)), key=lambda i: (self.entries[regions[i][0]].offset, regions[i][1]))
+        out: List[str] = [""] * len(regions)
+        for i in order:
+            out[i] = self.fetch(*regions[i])
+        return out
+
+
+def write_fasta(out, name: str, seq: str, width: int = LINE_WIDTH) -> None:
+    out.write(f">{name}\n")
+    out.write("".join(seq[j:j + width] + "\n" for j in range(0, len(seq), width)))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Index a FASTA (.fai, .2bit) and extract regions.")
+    ap.add_argument("cmd", choices=["faidx", "2bit"])
+    ap.add_argument("fasta", type=Path)
+    ap.add_argument("regions", nargs="*", help="name or name:start-end (1-based, inclusive)")
+    ap.add_argument("--twobit", action="store_true", help="Read regions from the .2bit cache")
+    args = ap.parse_args()
+
+    if not args.fasta.is_file():
+        sys.exit(f"Error: {args.fasta} not found.")
+    try:
+        if args.cmd == "2bit":
+            write_twobit(args.fasta, args.fasta.with_name(args.fasta.stem + ".2bit"))
+            return
+        with FastaIndex(args.fasta, twobit=args.twobit) as idx:
+            regions = [parse_region(r, idx.lengths) for r in args.regions]
+            for r, seq in zip(args.regions, idx.fetch_many(regions)):
+                write_fasta(sys.stdout, r, seq)
+    except (ValueError, KeyError) as e:
+        sys.exit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of mutated genomes shared by every tool.
+
+Each variant is keyed by (SHA-256 of the species FASTA, mutation rate, seed,
+mutation model), generated once by mutate_fasta.py into
+results/genome_cache/<fasta hash>/mr_<rate>_seed_<seed>_<model>.fa and made
+read-only; runs get a hardlink (or a symlink across file systems) to it, so all
+tools are benchmarked on the same mutated genome. The unmutated genome
+("original" or 0) is a read-only copy of the species FASTA in the same folder
+(original.fa), so no run ever holds a link to the writable species FASTA.
+
+Concurrent requests for the same variant wait on a lock file while the first
+one writes it, and a variant only appears in the cache once it is complete.
+
+Usage:
+    genome_cache.py path <fasta> <rate> [--seed N] [--model edit|sub|gto] [--cache DIR]
+    genome_cache.py link <fasta> <rate> <dest> [--seed N] [--model edit|sub|gto] [--cache DIR]
+
+The model defaults to $MUTATION_MODEL or "edit" (substitutions, insertions and
+deletions, like gto_fasta_mutate -e); "gto" still runs gto_fasta_mutate, which
+has no seed option.
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from pathlib import Path
+from typing import Optional
+
+from mutate_fasta import MODELS, mutate_fasta
+
+HASH_CHUNK = 1 << 22
+
+
+def default_cache() -> Path:
+    """ $GENOME_CACHE, or results/genome_cache under $BENCHMARK_DIR"""
+    if os.environ.get("GENOME_CACHE"):
+        return Path(os.environ["GENOME_CACHE"])
+    return Path(os.environ.get("BENCHMARK_DIR", ".")) / "results" / "genome_cache"
+
+
+def default_seed() -> int:
+    return int(os.environ.get("MUTATION_SEED", "1"))
+
+
+def default_model() -> str:
+    return os.environ.get("MUTATION_MODEL", "edit")
+
+
+def normalise_rate(rate: str) -> str:
+    """ 'original', '0' and '0.0' are the same unmutated genome; other rates keep one spelling"""
+    if rate == "original" or float(rate) == 0:
+        return "original"
+    return f"{float(rate):g}"
+
+
+def cached_sha256(path: Path, cache: Path) -> str:
+    """ SHA-256 of a file, remembered per (inode, size, mtime) so genomes and their hardlinks are hashed once"""
+    st = path.stat()
+    memo_key = hashlib.sha256(f"{st.st_dev}\t{st.st_ino}\t{st.st_size}\t{st.st_mtime_ns}".encode()).hexdigest()
+    memo = cache / "hashes" / memo_key
+    if memo.is_file():
+        return memo.read_text().strip()
+
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(HASH_CHUNK), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    memo.parent.mkdir(parents=True, exist_ok=True)
+    tmp = memo.with_name(f"{memo.name}.{os.getpid()}.tmp")
+    tmp.write_text(digest + "\n")
+    os.replace(tmp, memo)
+    return digest
+
+
+def mutate(fasta: Path, rate: str, seed: int, model: str, out: Path) -> None:
+    """ Write `fasta` mutated at `rate` to `out`"""
+    if model == "gto":
+        with open(fasta, "rb") as src, open(out, "wb") as dst:
+            subprocess.run(["gto_fasta_mutate", "-e", rate], stdin=src, stdout=dst, check=True)
+        return
+    processes = int(os.environ.get("MUTATION_PROCESSES", os.cpu_count() or 1))
+    mutate_fasta(fasta, out, float(rate), seed, model, processes)
+
+
+def variant_path(fasta: Path, rate: str, seed: Optional[int] = None, model: Optional[str] = None,
+                 cache: Optional[Path] = None) -> Path:
+    """ Read-only path of the genome mutated at `rate` with `seed` (a copy when unmutated), generating it on first use"""
+    rate = normalise_rate(rate)
+    if rate == "original":
+        seed = model = None
+    else:
+        seed = default_seed() if seed is None else seed
+        model = default_model() if model is None else model
+        if model not in MODELS + ("gto",):
+            raise ValueError(f"Unknown mutation model {model}")
+    cache = default_cache() if cache is None else cache
+
+    digest = cached_sha256(fasta, cache)
+    entry = cache / digest[:16]
+    out = entry / ("original.fa" if rate == "original" else f"mr_{rate}_seed_{seed}_{model}.fa")
+    if out.is_file():
+        return out
+
+    entry.mkdir(parents=True, exist_ok=True)
+    with open(entry / f"{out.name}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if out.is_file():  # written by another run while waiting for the lock
+            return out
+
+        tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+        start = time.time()
+        try:
+            if rate == "original":
+                shutil.copyfile(fasta, tmp)
+            else:
+                mutate(fasta, rate, seed, model, tmp)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        tmp.chmod(0o444)
+        os.replace(tmp, out)
+
+        meta = {"fasta": str(fasta.resolve()), "sha256": digest, "rate": rate, "seed": seed, "model": model,
+                "seconds": round(time.time() - start, 3), "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        (entry / f"{out.stem}.json").write_text(json.dumps(meta, indent=1) + "\n")
+    return out
+
+
+def link_variant(fasta: Path, rate: str, dest: Path, seed: Optional[int] = None, model: Optional[str] = None,
+                 cache: Optional[Path] = None) -> Path:
+    """ Hardlink (symlink across file systems) the cached variant to `dest`, replacing what is there"""
+    src = variant_path(fasta, rate, seed, model, cache).resolve()
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        os.symlink(src, tmp)
+    os.replace(tmp, dest)
+    return src
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cache of mutated genomes keyed by FASTA hash, rate and seed.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name, help_text in (("path", "Print the cached variant path"), ("link", "Link the cached variant to DEST")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("fasta", type=Path)
+        p.add_argument("rate", help="Mutation rate, or 'original'")
+        if name == "link":
+            p.add_argument("dest", type=Path)
+        p.add_argument("--seed", type=int, default=None, help="Default: $MUTATION_SEED or 1")
+        p.add_argument("--model", choices=MODELS + ("gto",), default=None, help="Default: $MUTATION_MODEL or edit")
+        p.add_argument("--cache", type=Path, default=None, help="Default: $GENOME_CACHE or results/genome_cache")
+    args = ap.parse_args()
+
+    if not args.fasta.is_file():
+        sys.exit(f"Error: {args.fasta} not found.")
+
+    if args.cmd == "path":
+        print(variant_path(args.fasta, args.rate, args.seed, args.model, args.cache))
+    else:
+        link_variant(args.fasta, args.rate, args.dest, args.seed, args.model, args.cache)
+
+
+if __name__ == "__main__":
+    main()
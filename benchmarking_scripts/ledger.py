@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+SQLite ledger with one row per benchmark execution.
+
+Rows are written by monitor.py (--ledger/--meta/--record_output) and hold the
+tool, species, mutation rate, hint/model, extra parameters, start/end times,
+wall/CPU time, peak RSS, context switches, page faults, filesystem I/O, exit
+code and the hashed output files of each run.
+
+Usage:
+    ledger.py query [--db FILE] [--tool T] [--species S] [--mut_rate R] [--hint H] [--model M]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+
+from glob import glob
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+COLUMNS = ("tool", "species", "mut_rate", "hint", "model")
+
+# resource accounting columns, filled from the monitor.py summary of the same name
+RESOURCE_COLUMNS = {
+    "wall_sec": "REAL",
+    "cpu_sec": "REAL",
+    "user_sec": "REAL",
+    "sys_sec": "REAL",
+    "max_rss_kb": "INTEGER",
+    "vol_ctx_switches": "INTEGER",
+    "invol_ctx_switches": "INTEGER",
+    "major_faults": "INTEGER",
+    "minor_faults": "INTEGER",
+    "read_bytes": "INTEGER",
+    "write_bytes": "INTEGER",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    tool        TEXT NOT NULL,
+    species     TEXT,
+    mut_rate    REAL,
+    hint        TEXT,
+    model       TEXT,
+    params      TEXT,
+    command     TEXT,
+    started_at  TEXT,
+    finished_at TEXT,
+    exit_code   INTEGER
+);
+CREATE TABLE IF NOT EXISTS run_outputs (
+    run_id     INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    path       TEXT NOT NULL,
+    sha256     TEXT,
+    size_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_runs_config ON runs(tool, species, mut_rate, hint, model);
+CREATE INDEX IF NOT EXISTS idx_runs_species ON runs(species, mut_rate);
+CREATE INDEX IF NOT EXISTS idx_outputs_run ON run_outputs(run_id);
+CREATE INDEX IF NOT EXISTS idx_outputs_sha ON run_outputs(sha256);
+"""
+
+
+def default_db() -> Path:
+    """ $BENCHMARK_LEDGER, or results/ledger.sqlite under $BENCHMARK_DIR"""
+    if os.environ.get("BENCHMARK_LEDGER"):
+        return Path(os.environ["BENCHMARK_LEDGER"])
+    return Path(os.environ.get("BENCHMARK_DIR", ".")) / "results" / "ledger.sqlite"
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    """ Open (and create if needed) the ledger. WAL lets parallel GeAnno jobs write at once."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(db_path, timeout=60)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA foreign_keys=ON")
+    con.executescript(SCHEMA)
+
+    # ledgers created before a column existed get it added in place
+    have = {r[1] for r in con.execute("PRAGMA table_info(runs)")}
+    for col, sql_type in RESOURCE_COLUMNS.items():
+        if col not in have:
+            con.execute(f"ALTER TABLE runs ADD COLUMN {col} {sql_type}")
+    return con
+
+
+def parse_mut_rate(value: Optional[str]) -> Optional[float]:
+    """ 'original' and '0' both mean the unmutated genome"""
+    if value is None or value == "":
+        return None
+    if value == "original":
+        return 0.0
+    return float(value)
+
+
+def file_sha256(path: Path, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def expand_outputs(patterns: Iterable[str]) -> List[Path]:
+    """ Expand output paths/globs after the run, keeping only files that exist"""
+    out = []
+    for pat in patterns:
+        matches = sorted(glob(pat)) or [pat]
+        out.extend(Path(m) for m in matches if Path(m).is_file())
+    return out
+
+
+def record_run(db_path: Path, meta: Dict[str, str], command: str, summary: Dict[str, float],
+               started_at: str, finished_at: str, outputs: Iterable[str] = ()) -> int:
+    """ Insert one run and its hashed outputs, returning the new run_id"""
+    meta = dict(meta)
+    row = {k: meta.pop(k, None) for k in COLUMNS}
+    if row["tool"] is None:
+        raise ValueError("Ledger rows need at least tool=<name> in the metadata.")
+    row["mut_rate"] = parse_mut_rate(row["mut_rate"])
+
+    files = [(str(p.resolve()), file_sha256(p), p.stat().st_size) for p in expand_outputs(outputs)]
+
+    con = connect(db_path)
+    try:
+        with con:
+            cols = ["tool", "species", "mut_rate", "hint", "model", "params", "command",
+                    "started_at", "finished_at", *RESOURCE_COLUMNS, "exit_code"]
+            values = [row["tool"], row["species"], row["mut_rate"], row["hint"], row["model"],
+                      json.dumps(meta, sort_keys=True), command, started_at, finished_at,
+                      *(summary.get(c) for c in RESOURCE_COLUMNS), summary.get("exit_code")]
+            cur = con.execute(f"INSERT INTO runs ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                              values)
+            run_id = cur.lastrowid
+            con.executemany("INSERT INTO run_outputs (run_id, path, sha256, size_bytes) VALUES (?,?,?,?)",
+                            [(run_id, p, sha, size) for p, sha, size in files])
+    finally:
+        con.close()
+    return run_id
+
+
+def query_runs(db_path: Path, **filters) -> List[Dict]:
+    """ Runs matching the given column filters (tool=..., species=..., mut_rate=...)"""
+    where, params = [], []
+    for k, v in filters.items():
+        if v is None:
+            continue
+        if k not in COLUMNS:
+            raise ValueError(f"Cannot filter on {k}")
+        where.append(f"{k} = ?")
+        params.append(parse_mut_rate(v) if k == "mut_rate" else v)
+    sql = "SELECT * FROM runs" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY run_id"
+
+    con = connect(db_path)
+    con.row_factory = sqlite3.Row
+    try:
+        return [dict(r) for r in con.execute(sql, params)]
+    finally:
+        con.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect the benchmark run ledger.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    q = sub.add_parser("query", help="Print matching runs as TSV")
+    q.add_argument("--db", type=Path, default=default_db())
+    for col in COLUMNS:
+        q.add_argument(f"--{col}")
+    args = ap.parse_args()
+
+    rows = query_runs(args.db, **{c: getattr(args, c) for c in COLUMNS})
+    if not rows:
+        return
+    cols = list(rows[0].keys())
+    sys.stdout.write("\t".join(cols) + "\n")
+    for r in rows:
+        sys.stdout.write("\t".join("" if r[c] is None else str(r[c]) for c in cols) + "\n")
+
+
+if __name__ == "__main__":
+    main()
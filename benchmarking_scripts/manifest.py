@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+SQLite manifest of the scheduler jobs, used to resume an interrupted matrix.
+
+Every job has one row with its state (pending, running, done or failed), the
+hash of its command, the number of attempts, its last exit code and log file.
+A job only becomes done after its command exited 0 and its outputs were
+promoted to their final names, so after a crash or an OOM kill the scheduler
+reruns exactly the jobs that are not done, the ones whose command changed and
+the done jobs that depend on those.
+
+Usage:
+    manifest.py status [--db FILE] [--state S]
+    manifest.py reset [--db FILE] [--state S] [--job NAME ...]
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+STATES = ("pending", "running", "done", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    name        TEXT PRIMARY KEY,
+    kind        TEXT,
+    state       TEXT NOT NULL DEFAULT 'pending',
+    cmd_sha     TEXT,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    exit_code   INTEGER,
+    started_at  TEXT,
+    finished_at TEXT,
+    log         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state);
+"""
+
+
+def default_db() -> Path:
+    """ $BENCHMARK_MANIFEST, or results/scheduler/manifest.sqlite under $BENCHMARK_DIR"""
+    if os.environ.get("BENCHMARK_MANIFEST"):
+        return Path(os.environ["BENCHMARK_MANIFEST"])
+    return Path(os.environ.get("BENCHMARK_DIR", ".")) / "results" / "scheduler" / "manifest.sqlite"
+
+
+def command_sha(cmd: str) -> str:
+    return hashlib.sha256(cmd.encode()).hexdigest()
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class Manifest:
+    """ Job states of one matrix, committed on every change"""
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.con = sqlite3.connect(db_path, timeout=60)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.con.close()
+
+    def states(self) -> Dict[str, Dict]:
+        cur = self.con.execute("SELECT name, kind, state, cmd_sha, attempts, exit_code FROM jobs")
+        return {r[0]: dict(kind=r[1], state=r[2], cmd_sha=r[3], attempts=r[4], exit_code=r[5]) for r in cur}
+
+    def sync(self, jobs: Dict[str, str], kinds: Dict[str, str], adopt: Iterable[str] = (),
+             deps: Optional[Dict[str, List[str]]] = None) -> Dict[str, str]:
+        """
+        Register the jobs of this matrix ({name: command}) and return the state each one starts in.
+        Jobs left running by a crashed scheduler and jobs whose command changed go back to pending, and so
+        do the done jobs below a changed one in `deps` ({name: dependencies}); jobs listed in `adopt` that
+        the manifest has never seen (verified results of the run scripts) start as done.
+        """
+        known = self.states()
+        adopt = set(adopt)
+        start, changed = {}, []
+        with self.con:
+            for name, cmd in jobs.items():
+                sha = command_sha(cmd)
+                row = known.get(name)
+                if row is None:
+                    state = "done" if name in adopt else "pending"
+                    self.con.execute("INSERT INTO jobs (name, kind, state, cmd_sha, finished_at) VALUES (?,?,?,?,?)",
+                                     (name, kinds[name], state, sha, _now() if state == "done" else None))
+                elif row["state"] == "done" and row["cmd_sha"] == sha:
+                    state = "done"
+                else:
+                    state = "pending"
+                    self.con.execute("UPDATE jobs SET state='pending', cmd_sha=? WHERE name=?", (sha, name))
+                    if row["cmd_sha"] != sha:
+                        changed.append(name)
+                start[name] = state
+
+            # outputs made from a changed job's old outputs are stale too
+            children: Dict[str, List[str]] = {n: [] for n in jobs}
+            for name, ds in (deps or {}).items():
+                for d in ds:
+                    children[d].append(name)
+            while changed:
+                for c in children[changed.pop()]:
+                    if start[c] == "done":
+                        start[c] = "pending"
+                        self.con.execute("UPDATE jobs SET state='pending' WHERE name=?", (c,))
+                        changed.append(c)
+        return start
+
+    def started(self, name: str, log: Path) -> None:
+        with self.con:
+            self.con.execute("UPDATE jobs SET state='running', attempts=attempts+1, started_at=?, finished_at=NULL, "
+                             "exit_code=NULL, log=? WHERE name=?", (_now(), str(log), name))
+
+    def finished(self, name: str, exit_code: Optional[int]) -> None:
+        state = "done" if exit_code == 0 else "failed"
+        with self.con:
+            self.con.execute("UPDATE jobs SET state=?, exit_code=?, finished_at=? WHERE name=?",
+                             (state, exit_code, _now(), name))
+
+    def interrupted(self, names: Iterable[str]) -> None:
+        """ Jobs killed because the scheduler stopped are simply unfinished"""
+        with self.con:
+            self.con.executemany("UPDATE jobs SET state='pending', finished_at=? WHERE name=?",
+                                 [(_now(), n) for n in names])
+
+    def reset(self, state: Optional[str] = None, names: Optional[List[str]] = None) -> int:
+        """ Put jobs back to pending, so the next run redoes them"""
+        where, params = [], []
+        if state:
+            where.append("state = ?")
+            params.append(state)
+        if names:
+            where.append(f"name IN ({', '.join('?' * len(names))})")
+            params.extend(names)
+        sql = "UPDATE jobs SET state='pending'" + (" WHERE " + " AND ".join(where) if where else "")
+        with self.con:
+            return self.con.execute(sql, params).rowcount
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or reset the scheduler job manifest.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    st = sub.add_parser("status", help="Count jobs per state, listing the ones in --state")
+    st.add_argument("--db", type=Path, default=default_db())
+    st.add_argument("--state", choices=STATES, default="failed")
+    rs = sub.add_parser("reset", help="Mark jobs as pending")
+    rs.add_argument("--db", type=Path, default=default_db())
+    rs.add_argument("--state", choices=STATES, default=None)
+    rs.add_argument("--job", nargs="+", default=None)
+    args = ap.parse_args()
+
+    if not args.db.is_file():
+        sys.exit(f"Error: manifest {args.db} not found.")
+    manifest = Manifest(args.db)
+    try:
+        if args.cmd == "status":
+            rows = manifest.states()
+            for s in STATES:
+                print(f"{s}\t{sum(1 for r in rows.values() if r['state'] == s)}")
+            for name, r in sorted(rows.items()):
+                if r["state"] == args.state:
+                    print(f"  {name}\tattempts={r['attempts']}\texit={r['exit_code']}")
+        else:
+            print(f"{manifest.reset(args.state, args.job)} jobs reset to pending")
+    finally:
+        manifest.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Launch a command and sample its whole process tree through /proc.
+
+Drop-in replacement for `/bin/time -f "%e\\t%M"`: when the command exits, the
+line "<wall seconds>\\t<peak RSS KB>" is written to stderr (or to -o FILE), so
+the *_time_mem.txt files keep the format expected by extract_all_values.sh.
+With --series, a time series of RSS, CPU%, threads and read/write bytes of the
+tree is written as TSV while the command runs. With --ledger, the run is also
+recorded in the SQLite run ledger (see ledger.py).
+
+With --trials N the command is run N times and the summary line holds the
+median wall time and peak RSS. --ci_tolerance T keeps repeating (up to
+--max_trials) until the 95% confidence interval of the median wall time is
+within +-T of it. Every trial is a ledger row sharing one batch id.
+
+Usage:
+    monitor.py [-o FILE] [-a] [--interval SEC] [--series FILE]
+               [--trials N] [--ci_tolerance T] [--max_trials M]
+               [--ledger DB --meta KEY=VALUE ... --record_output PATH ...] command [args...]
+"""
+
+import argparse
+import math
+import os
+import resource
+import shlex
+import subprocess
+import sys
+import time
+import uuid
+
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ledger import record_run
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024
+
+SERIES_COLUMNS = ["trial", "elapsed_sec", "n_procs", "threads", "rss_kb", "cpu_pct",
+                  "cpu_sec", "read_bytes", "write_bytes"]
+
+
+def _read_stat(pid: int) -> Optional[List[str]]:
+    """ Fields of /proc/<pid>/stat after the command name, or None if the process is gone"""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as fh:
+            raw = fh.read().decode(errors="replace")
+    except OSError:
+        return None
+    # the command name may contain spaces and parentheses, so split after the last ')'
+    return raw[raw.rfind(")") + 2:].split()
+
+
+def _read_io(pid: int) -> Dict[str, int]:
+    """ read_bytes/write_bytes from /proc/<pid>/io (empty if not readable)"""
+    out = {}
+    try:
+        with open(f"/proc/{pid}/io") as fh:
+            for line in fh:
+                key, _, val = line.partition(":")
+                if key in ("read_bytes", "write_bytes"):
+                    out[key] = int(val)
+    except OSError:
+        pass
+    return out
+
+
+def process_tree(root: int) -> Dict[int, List[str]]:
+    """ Map pid -> stat fields for root and all of its live descendants"""
+    stats, children = {}, {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        fields = _read_stat(int(entry))
+        if fields is None:
+            continue
+        pid = int(entry)
+        stats[pid] = fields
+        children.setdefault(int(fields[1]), []).append(pid)
+
+    tree, todo = {}, [root]
+    while todo:
+        pid = todo.pop()
+        if pid in stats:
+            tree[pid] = stats[pid]
+            todo.extend(children.get(pid, []))
+    return tree
+
+
+class TreeSampler:
+    """
+    Accumulates samples of a process tree. CPU time and I/O are kept per pid so
+    totals stay monotonic when short-lived children exit between samples.
+    """
+
+    def __init__(self, root: int):
+        self.root = root
+        self.t0 = time.monotonic()
+        self.cpu_ticks: Dict[int, int] = {}
+        self.io_bytes: Dict[int, Dict[str, int]] = {}
+        self.peak_rss_kb = 0
+        self._last_t = self.t0
+        self._last_cpu = 0.0
+
+    def sample(self) -> Dict[str, float]:
+        now = time.monotonic()
+        tree = process_tree(self.root)
+
+        rss_kb, threads = 0, 0
+        for pid, f in tree.items():
+            # stat fields (0-based after comm): 11 utime, 12 stime, 17 num_threads, 21 rss (pages)
+            self.cpu_ticks[pid] = int(f[11]) + int(f[12])
+            threads += int(f[17])
+            rss_kb += int(f[21]) * PAGE_KB
+            io = _read_io(pid)
+            if io:
+                self.io_bytes[pid] = io
+        self.peak_rss_kb = max(self.peak_rss_kb, rss_kb)
+
+        cpu_sec = sum(self.cpu_ticks.values()) / CLK_TCK
+        dt = now - self._last_t
+        cpu_pct = 100.0 * (cpu_sec - self._last_cpu) / dt if dt > 0 else 0.0
+        self._last_t, self._last_cpu = now, cpu_sec
+
+        return {
+            "elapsed_sec": round(now - self.t0, 3),
+            "n_procs": len(tree),
+            "threads": threads,
+            "rss_kb": rss_kb,
+            "cpu_pct": round(cpu_pct, 1),
+            "cpu_sec": round(cpu_sec, 2),
+            "read_bytes": sum(v.get("read_bytes", 0) for v in self.io_bytes.values()),
+            "write_bytes": sum(v.get("write_bytes", 0) for v in self.io_bytes.values()),
+        }
+
+
+def run_monitored(cmd: List[str], interval: float = 1.0, series=None, trial: int = 1) -> Dict[str, float]:
+    """
+    Run `cmd` (inheriting stdin/stdout/stderr), sampling its tree every `interval` seconds
+    into the open TSV handle `series`, if any.
+    Returns a summary with wall_sec, cpu_sec (user_sec + sys_sec), max_rss_kb, context switches,
+    page faults, read/write bytes and exit_code.
+    """
+    # rusage of children accumulates over trials, so only this trial's increase is reported
+    ru0 = resource.getrusage(resource.RUSAGE_CHILDREN)
+    t0 = time.monotonic()
+    proc = subprocess.Popen(cmd)
+    sampler = TreeSampler(proc.pid)
+
+    while True:
+        row = sampler.sample()
+        if series is not None:
+            row["trial"] = trial
+            series.write("\t".join(str(row[c]) for c in SERIES_COLUMNS) + "\n")
+            series.flush()
+        try:
+            proc.wait(timeout=interval)
+            break
+        except subprocess.TimeoutExpired:
+            continue
+
+    wall = time.monotonic() - t0
+    # children that lived shorter than one interval are only visible through rusage
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    sampled_io = {k: sum(v.get(k, 0) for v in sampler.io_bytes.values()) for k in ("read_bytes", "write_bytes")}
+    user, system = ru.ru_utime - ru0.ru_utime, ru.ru_stime - ru0.ru_stime
+    return {
+        "wall_sec": wall,
+        "cpu_sec": user + system,
+        "user_sec": user,
+        "sys_sec": system,
+        # ru_maxrss is a high-water mark over all trials, so it only helps on the first one
+        "max_rss_kb": max(sampler.peak_rss_kb, ru.ru_maxrss if trial == 1 else 0),
+        "vol_ctx_switches": ru.ru_nvcsw - ru0.ru_nvcsw,
+        "invol_ctx_switches": ru.ru_nivcsw - ru0.ru_nivcsw,
+        "major_faults": ru.ru_majflt - ru0.ru_majflt,
+        "minor_faults": ru.ru_minflt - ru0.ru_minflt,
+        # rusage counts 512-byte blocks, including I/O done after the last sample
+        "read_bytes": max(sampled_io["read_bytes"], (ru.ru_inblock - ru0.ru_inblock) * 512),
+        "write_bytes": max(sampled_io["write_bytes"], (ru.ru_oublock - ru0.ru_oublock) * 512),
+        "exit_code": proc.returncode,
+    }
+
+
+def median_ci(values: Sequence[float], confidence: float = 0.95) -> Optional[Tuple[float, float]]:
+    """
+    Distribution-free confidence interval of the median from order statistics, or None
+    when there are too few values (fewer than 6 at 95%).
+    """
+    xs = sorted(values)
+    n = len(xs)
+    tail = (1 - confidence) / 2
+    cdf, j = 0.0, 0
+    for k in range(n + 1):
+        p = math.comb(n, k) / 2 ** n
+        if cdf + p > tail:
+            break
+        cdf += p
+        j = k + 1
+    if j == 0:
+        return None
+    return xs[j - 1], xs[n - j]
+
+
+def converged(walls: Sequence[float], tolerance: float) -> bool:
+    """ True once the CI of the median wall time is within +-tolerance (relative) of the median"""
+    ci = median_ci(walls)
+    if ci is None:
+        return False
+    mid = median(walls)
+    return mid > 0 and (ci[1] - ci[0]) / 2 <= tolerance * mid
+
+
+def combine_trials(summaries: List[Dict[str, float]]) -> Dict[str, float]:
+    """ Median of every measure over the trials; the exit code is the first non-zero one"""
+    out = {k: median(s[k] for s in summaries) for k in summaries[0] if k != "exit_code"}
+    out["exit_code"] = next((s["exit_code"] for s in summaries if s["exit_code"] != 0), 0)
+    return out
+
+
+def format_summary(summary: Dict[str, float]) -> str:
+    """ Same line as `/bin/time -f "%e\\t%M"` """
+    return f"{summary['wall_sec']:.2f}\t{int(summary['max_rss_kb'])}\n"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a command and record time/memory of its process tree.")
+    ap.add_argument("-o", "--output", type=Path, help="Write the summary line here instead of stderr")
+    ap.add_argument("-a", "--append", action="store_true", help="Append to --output instead of overwriting")
+    ap.add_argument("--interval", type=float, default=1.0, help="Sampling interval in seconds")
+    ap.add_argument("--series", type=Path, help="TSV file for the sampled time series")
+    ap.add_argument("--trials", type=int, default=1, help="Number of runs (minimum number with --ci_tolerance)")
+    ap.add_argument("--ci_tolerance", type=float, default=0.0,
+                    help="Repeat until the 95%% CI of the median wall time is within this fraction of it (0 = off)")
+    ap.add_argument("--max_trials", type=int, default=20, help="Upper bound on runs with --ci_tolerance")
+    ap.add_argument("--ledger", type=Path, help="SQLite run ledger to record this run in")
+    ap.add_argument("--meta", action="append", default=[], metavar="KEY=VALUE",
+                    help="Run metadata for the ledger (tool, species, mut_rate, hint, model or any parameter)")
+    ap.add_argument("--record_output", action="append", default=[], metavar="PATH",
+                    help="Output file (or glob) to hash into the ledger after the run")
+    ap.add_argument("command", nargs=argparse.REMAINDER)
+    args = ap.parse_args()
+
+    cmd = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not cmd:
+        ap.error("no command given")
+    if args.trials < 1:
+        ap.error("--trials must be at least 1")
+
+    series = None
+    if args.series is not None:
+        args.series.parent.mkdir(parents=True, exist_ok=True)
+        series = open(args.series, "w")
+        series.write("\t".join(SERIES_COLUMNS) + "\n")
+
+    meta = dict(kv.split("=", 1) for kv in args.meta)
+    batch = uuid.uuid4().hex
+    adaptive = args.ci_tolerance > 0
+    summaries = []
+    try:
+        while True:
+            trial = len(summaries) + 1
+            started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            summary = run_monitored(cmd, interval=args.interval, series=series, trial=trial)
+            finished_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            summaries.append(summary)
+
+            if args.ledger is not None:
+                trial_meta = {**meta, "batch": batch, "trial": str(trial)} if (adaptive or args.trials > 1) else meta
+                try:
+                    record_run(args.ledger, trial_meta, shlex.join(cmd), summary, started_at, finished_at,
+                               args.record_output)
+                except Exception as e:
+                    print(f"Warning: could not record run in ledger {args.ledger}: {e}", file=sys.stderr)
+
+            if summary["exit_code"] != 0:
+                break
+            if len(summaries) < args.trials:
+                continue
+            walls = [s["wall_sec"] for s in summaries]
+            if not adaptive or converged(walls, args.ci_tolerance):
+                break
+            if len(summaries) >= args.max_trials:
+                print(f"Warning: median wall time not within {args.ci_tolerance:.1%} after {len(summaries)} trials",
+                      file=sys.stderr)
+                break
+    finally:
+        if series is not None:
+            series.close()
+
+    summary = combine_trials(summaries)
+    if args.output is not None:
+        with open(args.output, "a" if args.append else "w") as fh:
+            fh.write(format_summary(summary))
+    else:
+        sys.stderr.write(format_summary(summary))
+
+    rc = summary["exit_code"]
+    sys.exit(rc if rc >= 0 else 128 - rc)
+
+
+if __name__ == "__main__":
+    main()
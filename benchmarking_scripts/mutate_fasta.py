@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Seeded, vectorised genome mutator (replacement for gto_fasta_mutate).
+
+The FASTA is memory-mapped and every sequence is mutated independently, in
+parallel, with NumPy draws over blocks of 16 Mb: each base is edited with
+probability --rate. With --model sub every edit is a substitution to another
+base; with --model edit (the gto_fasta_mutate -e behaviour) an edit is a
+substitution, an insertion of a random base after it or a deletion, with equal
+probability. Only A/C/G/T (either case, case kept) are edited, so N runs stay
+as they are. Each sequence draws from its own stream of --seed, so the output
+only depends on the seed, never on the number of processes. Sequences keep
+their header and line width.
+
+Usage:
+    mutate_fasta.py in.fa out.fa --rate 0.01 [--seed 1] [--model edit|sub] [--processes N]
+"""
+
+import argparse
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+BLOCK = 1 << 24
+WRITE_BUFFER = 1 << 24
+MODELS = ("edit", "sub")
+
+BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+BASE_INDEX = np.full(256, 255, dtype=np.uint8)
+for _i, _b in enumerate(b"ACGT"):
+    BASE_INDEX[_b] = BASE_INDEX[_b + 32] = _i
+
+
+def index_records(mm) -> List[Tuple[int, int, int]]:
+    """ (header start, sequence start, record end) byte offsets of every record"""
+    starts = []
+    pos = 0 if mm[:1] == b">" else mm.find(b"\n>")
+    while pos != -1:
+        if mm[pos:pos + 1] == b"\n":
+            pos += 1
+        starts.append(pos)
+        pos = mm.find(b"\n>", pos)
+    records = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(mm)
+        seq_start = mm.find(b"\n", start, end)
+        records.append((start, end if seq_start == -1 else seq_start + 1, end))
+    return records
+
+
+def mutate_sequence(seq: np.ndarray, rate: float, model: str, rng: np.random.Generator,
+                    block: int = BLOCK) -> np.ndarray:
+    """ Mutated copy of the uint8 sequence `seq`, drawn block by block"""
+    out = []
+    for start in range(0, len(seq), block):
+        chunk = seq[start:start + block].copy()
+        idx = BASE_INDEX[chunk]
+        hits = np.flatnonzero((rng.random(len(chunk), dtype=np.float32) < rate) & (idx != 255))
+        if model == "sub":
+            kind = np.zeros(len(hits), dtype=np.uint8)
+        else:
+            kind = rng.integers(0, 3, len(hits), dtype=np.uint8)  # 0 substitution, 1 insertion, 2 deletion
+
+        sub = hits[kind == 0]
+        new = BASES[(idx[sub] + rng.integers(1, 4, len(sub), dtype=np.uint8)) % 4]
+        chunk[sub] = np.where(chunk[sub] >= 97, new + 32, new)  # keep soft-masking
+
+        ins = hits[kind == 1]
+        if len(ins):
+            chunk = np.insert(chunk, ins + 1, BASES[rng.integers(0, 4, len(ins))])
+            # positions after each insertion shift right by the insertions before them
+            dels = hits[kind == 2]
+            dels = dels + np.searchsorted(ins, dels, side="left")
+        else:
+            dels = hits[kind == 2]
+        if len(dels):
+            chunk = np.delete(chunk, dels)
+        out.append(chunk)
+    return np.concatenate(out) if out else seq[:0].copy()
+
+
+def wrap(seq: np.ndarray, width: int) -> np.ndarray:
+    """ Sequence as FASTA lines of `width` bp, newline-terminated"""
+    full = len(seq) // width
+    rows = np.empty((full, width + 1), dtype=np.uint8)
+    rows[:, :width] = seq[:full * width].reshape(full, width)
+    rows[:, width] = ord("\n")
+    tail = seq[full * width:]
+    if len(tail):
+        return np.concatenate([rows.ravel(), tail, np.frombuffer(b"\n", dtype=np.uint8)])
+    return rows.ravel()
+
+
+def _mutate_record(fasta: str, record: Tuple[int, int, int], number: int, part: str,
+                   rate: float, seed: int, model: str) -> None:
+    """ Mutate one record of the mapped FASTA into its own part file"""
+    start, seq_start, end = record
+    with open(fasta, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        raw = np.frombuffer(mm, dtype=np.uint8, count=end - seq_start, offset=seq_start)
+        first_line = mm.find(b"\n", seq_start, end)
+        width = len(mm[seq_start:first_line if first_line != -1 else end].rstrip(b"\r")) or 60
+        seq = raw[(raw != ord("\n")) & (raw != ord("\r"))]
+        header = mm[start:seq_start]
+        del raw
+
+    rng = np.random.default_rng(np.random.SeedSequence([seed, number]))
+    mutated = mutate_sequence(seq, rate, model, rng)
+    with open(part, "wb", buffering=WRITE_BUFFER) as out:
+        out.write(header if header.endswith(b"\n") else header + b"\n")
+        if len(mutated):
+            out.write(wrap(mutated, width).tobytes())
+
+
+def mutate_fasta(fasta: Path, out: Path, rate: float, seed: int = 1, model: str = "edit",
+                 processes: int = 1) -> int:
+    """ Write `fasta` mutated at `rate` to `out`; returns the number of sequences"""
+    if model not in MODELS:
+        raise ValueError(f"Unknown mutation model {model}; expected one of {', '.join(MODELS)}")
+    if fasta.stat().st_size == 0:
+        out.write_bytes(b"")
+        return 0
+    with open(fasta, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        records = index_records(mm)
+
+    with tempfile.TemporaryDirectory(dir=out.parent, prefix=f".{out.name}.") as tmp:
+        parts = [os.path.join(tmp, f"{i}.fa") for i in range(len(records))]
+        args = [(str(fasta), rec, i, parts[i], rate, seed, model) for i, rec in enumerate(records)]
+        if processes > 1 and len(records) > 1:
+            # largest sequences first, so one big chromosome does not start last
+            order = sorted(range(len(records)), key=lambda i: records[i][0] - records[i][2])
+            with ProcessPoolExecutor(max_workers=min(processes, len(records))) as pool:
+                for f in [pool.submit(_mutate_record, *args[i]) for i in order]:
+                    f.result()
+        else:
+            for a in args:
+                _mutate_record(*a)
+
+        with open(out, "wb", buffering=WRITE_BUFFER) as dst:
+            for part in parts:
+                with open(part, "rb") as src:
+                    shutil.copyfileobj(src, dst, WRITE_BUFFER)
+    return len(records)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mutate a genome FASTA at a given rate with a fixed seed.")
+    ap.add_argument("fasta", type=Path)
+    ap.add_argument("out", type=Path)
+    ap.add_argument("--rate", type=float, required=True, help="Probability of editing each base")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--model", choices=MODELS, default="edit",
+                    help="edit: substitutions, insertions and deletions (as gto_fasta_mutate -e); sub: substitutions only")
+    ap.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    if not 0 <= args.rate <= 1:
+        ap.error("--rate must be in [0, 1]")
+    if not args.fasta.is_file():
+        sys.exit(f"Error: {args.fasta} not found.")
+
+    mutate_fasta(args.fasta, args.out, args.rate, args.seed, args.model, args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,11 @@ if [ -z "$BENCHMARK_DIR" ]; then
 fi
 
 SPECIES_FOLDER="${BENCHMARK_DIR}/species/benchmark_species"
+MUTATION_RATES="${MUTATION_RATES:-original 0.01 0.04 0.07}"
 MAPPING_FILE="${BENCHMARK_DIR}/config/species_model_augustus.txt"
 AUGUSTUS_RESULTS_FOLDER=${BENCHMARK_DIR}/results/tools/augustus
+PROTHINT_BIN="${BENCHMARK_DIR}/tools/GeneMark-ETP/bin/gmes/ProtHint/bin/prothint.py"
+ARTIFACT_CACHE="${BENCHMARK_DIR}/benchmarking_scripts/artifact_cache.py"
 
 if [ ! -f "$MAPPING_FILE" ]; then
     echo "Error: Mapping file '${MAPPING_FILE}' not found!"
@@ -23,8 +26,38 @@ runTimedCommand() {
     local CMD="$1"
     local OUTPUT_FILE="$2"
     local TIME_MEM_FILE="$3"
+    local META="$4"     # run ledger metadata, e.g. "tool=snap species=oryza_sativa mut_rate=0.01"
+    local OUTPUTS="$5"  # output files hashed into the run ledger
+    local LEDGER_ARGS=()
+
+    if [ -n "$META" ]; then
+        LEDGER_ARGS+=(--ledger "${BENCHMARK_LEDGER:-${BENCHMARK_DIR}/results/ledger.sqlite}")
+        for KV in $META; do LEDGER_ARGS+=(--meta "$KV"); done
+        for OUT in $OUTPUTS; do LEDGER_ARGS+=(--record_output "$OUT"); done
+    fi
+
+    (python3 "${BENCHMARK_DIR}/benchmarking_scripts/monitor.py" --interval "${MONITOR_INTERVAL:-1}" \
+        --trials "${TRIALS:-1}" --ci_tolerance "${CI_TOLERANCE:-0}" --max_trials "${MAX_TRIALS:-20}" \
+        --series "${TIME_MEM_FILE%.txt}_series.tsv" "${LEDGER_ARGS[@]}" bash -c "$CMD") > "$OUTPUT_FILE" 2> "$TIME_MEM_FILE"
+}
 
-    (/bin/time -f "%e\t%M" bash -c "$CMD") > "$OUTPUT_FILE" 2> "$TIME_MEM_FILE"
+# Predictor command for input.fa, with {input} and {output} standing for the genome and $2.partial.
+# With SHARD_JOBS > 1 the predictor runs on overlapping genome chunks in parallel (shard_predict.py)
+# and the merged prediction is written to $2.partial; extra arguments are hint files to split per chunk.
+shardCommand() {
+    local CMD="$1"
+    local OUT="$2"
+    local HINTS=("${@:3}")
+
+    if [ "${SHARD_JOBS:-1}" -gt 1 ]; then
+        CMD="${CMD//\{output\}/${OUT}}"
+        echo "python3 ${BENCHMARK_DIR}/benchmarking_scripts/shard_predict.py --fasta input.fa --result ${OUT} \
+--out ${OUT}.partial --jobs ${SHARD_JOBS} --chunk_size ${SHARD_SIZE:-5000000} --overlap ${SHARD_OVERLAP:-200000} \
+${HINTS[*]:+--hints ${HINTS[*]}} -- '${CMD}'"
+    else
+        CMD="${CMD//\{output\}/${OUT}.partial}"
+        echo "${CMD//\{input\}/input.fa}"
+    fi
 }
 
 runProthint() {
@@ -43,9 +76,27 @@ runProthint() {
             cp ${BENCHMARK_DIR}/results/tools/GeneMark-EPp/${SPECIES_NAME}/mr_${MUTATION_RATE}/${HINTS_TYPE}/prothint_augustus.gff .
         else
 
-            echo "Prothint file not found in Genemark results. Running ProtHint for ${SPECIES_NAME} with hints: $HINTS_TYPE"
-            runTimedCommand "${BENCHMARK_DIR}/tools/GeneMark-ETP/bin/gmes/ProtHint/bin/prothint.py $DNA_FILE $HINTS_FILE" \
-            "${SPECIES_NAME}_${HINTS_TYPE}_prothint_output.txt" "${SPECIES_NAME}_${HINTS_TYPE}_prothint_time_mem.txt"
+            # same key as the GeneMark-EP+ runs when GeneMark-ES has been run, so their hints are shared
+            local ES_GTF="${BENCHMARK_DIR}/results/tools/GeneMark-ES/${SPECIES_NAME}/mr_${MUTATION_RATE}/genemark.gtf"
+            local ES_INPUT=() ES_OPTION=""
+            if [ -f "$ES_GTF" ]; then
+                ES_INPUT=("$ES_GTF")
+                ES_OPTION="--geneMarkGtf $ES_GTF"
+            fi
+            local PROTHINT_STEP=(prothint --input "$DNA_FILE" "$HINTS_FILE" "${ES_INPUT[@]}" --tool "$PROTHINT_BIN" \
+                --output prothint.gff evidence.gff prothint_augustus.gff)
+
+            if python3 "$ARTIFACT_CACHE" fetch "${PROTHINT_STEP[@]}"; then
+                echo "Prothint file restored from the artifact cache."
+            else
+                echo "Prothint file not found in Genemark results. Running ProtHint for ${SPECIES_NAME} with hints: $HINTS_TYPE"
+                rm -f prothint.gff evidence.gff prothint_augustus.gff
+                runTimedCommand "${PROTHINT_BIN} ${ES_OPTION} $DNA_FILE $HINTS_FILE" \
+                "${SPECIES_NAME}_${HINTS_TYPE}_prothint_output.txt" "${SPECIES_NAME}_${HINTS_TYPE}_prothint_time_mem.txt" \
+                "tool=prothint species=${SPECIES_NAME} mut_rate=${MUTATION_RATE} hint=${HINTS_TYPE}" \
+                "prothint_augustus.gff prothint.gff evidence.gff" \
+                && python3 "$ARTIFACT_CACHE" store "${PROTHINT_STEP[@]}"
+            fi
         fi
 
         return 0
@@ -67,11 +118,8 @@ runAUGUSTUS() {
     mkdir -p "$MODE"
     cd "$MODE" || exit 1
 
-    if [ "$MUTATION_RATE" != "original" ]; then
-        gto_fasta_mutate -e $MUTATION_RATE < $DNA_FILE > input.fa
-    else
-        cp $DNA_FILE input.fa
-    fi
+    # every tool gets the same cached mutated genome
+    python3 "${BENCHMARK_DIR}/benchmarking_scripts/genome_cache.py" link "$DNA_FILE" "$MUTATION_RATE" input.fa || exit 1
 
     if [ -f "augustus.gtf" ]; then
         echo "Augustus has already been run for species ${SPECIES_NAME}, in the ${MODE} model and mutation ${MUTATION_RATE}. Skipping..."
@@ -88,11 +136,37 @@ runAUGUSTUS() {
         fi
     fi
 
+    local SHARD_HINTS=() SHARD_META=""
+    [ "$MODE" != "abinitio" ] && SHARD_HINTS=(prothint_augustus.gff)
+    [ "${SHARD_JOBS:-1}" -gt 1 ] && SHARD_META=" shard_jobs=${SHARD_JOBS} shard_size=${SHARD_SIZE:-5000000}"
+    local AUGUSTUS_CMD
+    AUGUSTUS_CMD=$(shardCommand "${BENCHMARK_DIR}/tools/Augustus-3.5.0/bin/augustus --outfile={output} --species=$AUGUSTUS_MODEL $HINTS_OPTION {input}" \
+        augustus.gtf "${SHARD_HINTS[@]}")
+
+    # Avaliação online (opcional): termina o AUGUSTUS se a precisão/recall ficar abaixo do limite
+    local WATCH_PID=""
+    if [ -n "${STREAM_MIN_PRECISION}${STREAM_MIN_RECALL}" ] && [ "${SHARD_JOBS:-1}" -le 1 ]; then
+        # criado vazio para o avaliador o abrir logo (o AUGUSTUS trunca-o, mantendo o inode)
+        : > augustus.gtf.partial
+        python3 "${BENCHMARK_DIR}/metrics/stream_evaluate.py" \
+            "${SPECIES_FOLDER}/${SPECIES_NAME}/${SPECIES_NAME}_annotation.gff3" augustus.gtf.partial --kill \
+            ${STREAM_MIN_PRECISION:+--min_precision $STREAM_MIN_PRECISION} ${STREAM_MIN_RECALL:+--min_recall $STREAM_MIN_RECALL} \
+            --min_ref_bp "${STREAM_MIN_REF_BP:-1000000}" --log "${SPECIES_NAME}_${MODE}_augustus_stream.tsv" > /dev/null 2>&1 &
+        WATCH_PID=$!
+    fi
+
     echo "Running AUGUSTUS ($MODE) for ${SPECIES_NAME} using model ${AUGUSTUS_MODEL}..."
-    runTimedCommand "${BENCHMARK_DIR}/tools/Augustus-3.5.0/bin/augustus --outfile=augustus.gtf --species=$AUGUSTUS_MODEL $HINTS_OPTION input.fa" \
-        "${SPECIES_NAME}_${MODE}_augustus_output.txt" "${SPECIES_NAME}_${MODE}_augustus_time_mem.txt"
+    runTimedCommand "${AUGUSTUS_CMD} && mv augustus.gtf.partial augustus.gtf" \
+        "${SPECIES_NAME}_${MODE}_augustus_output.txt" "${SPECIES_NAME}_${MODE}_augustus_time_mem.txt" \
+        "tool=augustus species=${SPECIES_NAME} mut_rate=${MUTATION_RATE} hint=${MODE} model=${AUGUSTUS_MODEL}${SHARD_META}" \
+        "augustus.gtf"
+    if [ -n "$WATCH_PID" ]; then
+        # o avaliador termina sozinho, com a linha final, quando o .partial desaparece (mv acima, ou rm se o AUGUSTUS falhou)
+        rm -f augustus.gtf.partial
+        wait "$WATCH_PID"
+    fi
     
-    rm input.fa
+    rm -f input.fa
     cd ..
 }
 
@@ -113,7 +187,7 @@ for SPECIES in "$SPECIES_FOLDER"/*; do
 
     AUGUSTUS_MODEL=$(eval echo "\$$SPECIES_NAME" | tr -d '[:space:]')
 
-    for MUTATION_RATE in original 0.01 0.04 0.07; do
+    for MUTATION_RATE in $MUTATION_RATES; do
         mkdir -p "mr_${MUTATION_RATE}"
         cd "mr_${MUTATION_RATE}" || exit 1
 
@@ -27,13 +27,17 @@ WINDOWS=(1000 1500)
 STEPS=(25 50)
 THRESHOLDS="0.2,0.3,0.4,0.5,0.6,0.7,0.8"
 
-MUT_RATES=("0" "0.01" "0.04" "0.07")
+# "original" is stored as mutation rate 0
+MUTATION_RATES="${MUTATION_RATES:-original 0.01 0.04 0.07}"
+MUT_RATES=(${MUTATION_RATES//original/0})
 MAX_JOBS=4
 
 PYTHON_BIN="python3"
 GEANNO="${BENCHMARK_DIR}/tools/GeAnno/src/geanno.py"
 GEANNO_MODELS="${BENCHMARK_DIR}/tools/GeAnno/models"
 RESULTS_ROOT="${BENCHMARK_DIR}/results/tools/GeAnno"
+MONITOR="${BENCHMARK_DIR}/benchmarking_scripts/monitor.py"
+LEDGER_DB="${BENCHMARK_LEDGER:-${BENCHMARK_DIR}/results/ledger.sqlite}"
 
 wait_for_slot() {
   while (( $(jobs -rp | wc -l) >= MAX_JOBS )); do
@@ -83,7 +87,12 @@ for MR in "${MUT_RATES[@]}"; do
             )
 
             wait_for_slot
-            /usr/bin/time -a -f "%e\t%M" -o "$TIME_MEM_FILE" \
+            "$PYTHON_BIN" "$MONITOR" -a -o "$TIME_MEM_FILE" \
+              --interval "${MONITOR_INTERVAL:-1}" --series "${TIME_MEM_FILE%.txt}_series.tsv" \
+              --trials "${TRIALS:-1}" --ci_tolerance "${CI_TOLERANCE:-0}" --max_trials "${MAX_TRIALS:-20}" \
+              --ledger "$LEDGER_DB" --meta "tool=geanno" --meta "species=$SPECIES" --meta "mut_rate=$MR" \
+              --meta "model=$MODEL_NAME" --meta "window=$W" --meta "step=$S" --meta "thresholds=$THRESHOLDS" \
+              --record_output "$OUT_DIR/output_${W}_${S}_*.gff3" \
               bash -lc "${CMD[*]}" &
 
           done
@@ -93,8 +102,8 @@ for MR in "${MUT_RATES[@]}"; do
         IN_FA="$SPEC_DIR/input.fa"
 
         if [ ! -f "$IN_FA" ]; then
-          mkdir -p "$(dirname "$IN_FA")"
-          gto_fasta_mutate -e "$MR" < "${SPECIES_FOLDER}/${SPECIES}/${SPECIES}_dna.fa" > "$IN_FA"
+          python3 "${BENCHMARK_DIR}/benchmarking_scripts/genome_cache.py" link \
+            "${SPECIES_FOLDER}/${SPECIES}/${SPECIES}_dna.fa" "$MR" "$IN_FA" || exit 1
         fi
 
         OUT_DIR="$SPEC_DIR/output"
@@ -111,7 +120,12 @@ for MR in "${MUT_RATES[@]}"; do
         )
 
         wait_for_slot
-        bash -lc "${CMD[*]}" &
+        "$PYTHON_BIN" "$MONITOR" -o /dev/null --interval "${MONITOR_INTERVAL:-1}" \
+          --trials "${TRIALS:-1}" --ci_tolerance "${CI_TOLERANCE:-0}" --max_trials "${MAX_TRIALS:-20}" \
+          --ledger "$LEDGER_DB" --meta "tool=geanno" --meta "species=$SPECIES" --meta "mut_rate=$MR" \
+          --meta "model=$MODEL_NAME" --meta "window=1500" --meta "step=50" --meta "thresholds=$THRESHOLDS" \
+          --record_output "$OUT_DIR/output_1500_50_*.gff3" \
+          bash -lc "${CMD[*]}" &
       fi
     done
   done
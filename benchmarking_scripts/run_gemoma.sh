@@ -6,6 +6,7 @@ if [ -z "$BENCHMARK_DIR" ]; then
 fi
 
 SPECIES_FOLDER="${BENCHMARK_DIR}/species/benchmark_species"
+MUTATION_RATES="${MUTATION_RATES:-original 0.01 0.04 0.07}"
 REFERENCE_SPECIES_FOLDER="${BENCHMARK_DIR}/species/reference_species"
 
 GEMOMA_REFERENCE="${BENCHMARK_DIR}/config/species_model_gemoma.txt"
@@ -44,7 +45,13 @@ runGeMoMa() {
         echo "Running GeMoMa for ${SPECIES_NAME} with ${HINTS_TYPE} reference model ${MODEL_NAME}..."
         cd ${BENCHMARK_DIR}/tools/GeMoMa/
 
-        /bin/time -f "%e\t%M" \
+        python3 "${BENCHMARK_DIR}/benchmarking_scripts/monitor.py" --interval "${MONITOR_INTERVAL:-1}" \
+            --trials "${TRIALS:-1}" --ci_tolerance "${CI_TOLERANCE:-0}" --max_trials "${MAX_TRIALS:-20}" \
+            --series "${CURRENT_DIR_METRICS}_time_mem_series.tsv" \
+            --ledger "${BENCHMARK_LEDGER:-${BENCHMARK_DIR}/results/ledger.sqlite}" \
+            --meta "tool=gemoma" --meta "species=${SPECIES_NAME}" --meta "mut_rate=${MUTATION_RATE}" \
+            --meta "hint=${HINTS_TYPE}" --meta "model=${MODEL_NAME}" \
+            --record_output "${CURRENT_DIR}/final_annotation.gff" \
             ./pipeline.sh mmseqs \
             ${CURRENT_RESULTS_FOLDER}/input.fa \
             ${CURRENT_REFERENCE_SPECIES}_annotation.gff3 \
@@ -78,21 +85,18 @@ for SPECIES in "$SPECIES_FOLDER"/*; do
 
         CURRENT_MODEL=$(eval echo "\$${SPECIES_NAME}_${HINTS_NAME}" | tr -d '[:space:]')
 
-        for MUTATION_RATE in original 0.01 0.04 0.07; do
+        for MUTATION_RATE in $MUTATION_RATES; do
 
             mkdir -p "mr_${MUTATION_RATE}"
             cd "mr_${MUTATION_RATE}" || exit 1
             echo "Current mutation rate: ${MUTATION_RATE}"
 
-            if [ "$MUTATION_RATE" != "original" ]; then
-                gto_fasta_mutate -e $MUTATION_RATE < $DNA_FILE > input.fa
-            else
-                cp $DNA_FILE input.fa
-            fi
+            # every tool gets the same cached mutated genome
+            python3 "${BENCHMARK_DIR}/benchmarking_scripts/genome_cache.py" link "$DNA_FILE" "$MUTATION_RATE" input.fa || exit 1
 
             runGeMoMa "$HINTS_NAME" "$SPECIES_NAME" "$CURRENT_MODEL" "$MUTATION_RATE"
 
-            rm input.fa
+            rm -f input.fa
 
             cd ..
 
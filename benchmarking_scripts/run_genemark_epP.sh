@@ -6,8 +6,11 @@ if [ -z "$BENCHMARK_DIR" ]; then
 fi
 
 SPECIES_FOLDER="${BENCHMARK_DIR}/species/benchmark_species"
+MUTATION_RATES="${MUTATION_RATES:-original 0.01 0.04 0.07}"
 HINTS_FOLDER="${BENCHMARK_DIR}/species/hints"
 RESULTS_FOLDER="${BENCHMARK_DIR}/results/tools/GeneMark-EPp"
+PROTHINT_BIN="${BENCHMARK_DIR}/tools/GeneMark-ETP/bin/gmes/ProtHint/bin/prothint.py"
+ARTIFACT_CACHE="${BENCHMARK_DIR}/benchmarking_scripts/artifact_cache.py"
 
 if [ ! -d ${HINTS_FOLDER} ]; then
     echo "Generating all hints to be used as input."
@@ -24,8 +27,19 @@ runTimedCommand() {
     local CMD="$1"
     local OUTPUT_FILE="$2"
     local TIME_MEM_FILE="$3"
+    local META="$4"     # run ledger metadata, e.g. "tool=snap species=oryza_sativa mut_rate=0.01"
+    local OUTPUTS="$5"  # output files hashed into the run ledger
+    local LEDGER_ARGS=()
+
+    if [ -n "$META" ]; then
+        LEDGER_ARGS+=(--ledger "${BENCHMARK_LEDGER:-${BENCHMARK_DIR}/results/ledger.sqlite}")
+        for KV in $META; do LEDGER_ARGS+=(--meta "$KV"); done
+        for OUT in $OUTPUTS; do LEDGER_ARGS+=(--record_output "$OUT"); done
+    fi
 
-    (/usr/bin/time -f "%e\t%M" bash -c "$CMD") > "$OUTPUT_FILE" 2> "$TIME_MEM_FILE"
+    (python3 "${BENCHMARK_DIR}/benchmarking_scripts/monitor.py" --interval "${MONITOR_INTERVAL:-1}" \
+        --trials "${TRIALS:-1}" --ci_tolerance "${CI_TOLERANCE:-0}" --max_trials "${MAX_TRIALS:-20}" \
+        --series "${TIME_MEM_FILE%.txt}_series.tsv" "${LEDGER_ARGS[@]}" bash -c "$CMD") > "$OUTPUT_FILE" 2> "$TIME_MEM_FILE"
 }
 
 runGeneMarkEPp() {
@@ -44,13 +58,26 @@ runGeneMarkEPp() {
             return 
         fi
 
-        echo "Running ProtHint for $SPECIES_NAME with $HINTS_TYPE hints..."
-        runTimedCommand "${BENCHMARK_DIR}/tools/GeneMark-ETP/bin/gmes/ProtHint/bin/prothint.py \
-            --geneMarkGtf ${BENCHMARK_DIR}/results/tools/GeneMark-ES/${SPECIES_NAME}/mr_${MUTATION_RATE}/genemark.gtf \
-            ../input.fa \
-            ${HINTS_FILE}" \
-            "${SPECIES_NAME}_${HINTS_TYPE}_prothint_output.txt" \
-            "${SPECIES_NAME}_${HINTS_TYPE}_prothint_time_mem.txt"
+        local ES_GTF="${BENCHMARK_DIR}/results/tools/GeneMark-ES/${SPECIES_NAME}/mr_${MUTATION_RATE}/genemark.gtf"
+        # ProtHint hints are shared with AUGUSTUS and later runs through the artifact cache
+        local PROTHINT_STEP=(prothint --input ../input.fa "$HINTS_FILE" "$ES_GTF" --tool "$PROTHINT_BIN" \
+            --output prothint.gff evidence.gff prothint_augustus.gff)
+
+        if python3 "$ARTIFACT_CACHE" fetch "${PROTHINT_STEP[@]}"; then
+            echo "ProtHint hints for $SPECIES_NAME with $HINTS_TYPE hints restored from the artifact cache."
+        else
+            echo "Running ProtHint for $SPECIES_NAME with $HINTS_TYPE hints..."
+            rm -f prothint.gff evidence.gff prothint_augustus.gff
+            runTimedCommand "${PROTHINT_BIN} \
+                --geneMarkGtf ${ES_GTF} \
+                ../input.fa \
+                ${HINTS_FILE}" \
+                "${SPECIES_NAME}_${HINTS_TYPE}_prothint_output.txt" \
+                "${SPECIES_NAME}_${HINTS_TYPE}_prothint_time_mem.txt" \
+                "tool=prothint species=${SPECIES_NAME} mut_rate=${MUTATION_RATE} hint=${HINTS_TYPE}" \
+                "prothint.gff evidence.gff prothint_augustus.gff" \
+                && python3 "$ARTIFACT_CACHE" store "${PROTHINT_STEP[@]}"
+        fi
 
         echo "Running GeneMark-EP+ for $SPECIES_NAME with $HINTS_TYPE hints..."
         runTimedCommand "gmes_petap.pl --EP prothint.gff \
@@ -58,7 +85,9 @@ runGeneMarkEPp() {
             --seq ../input.fa \
             --cores 10" \
             "${SPECIES_NAME}_${HINTS_TYPE}_genemark_output.txt" \
-            "${SPECIES_NAME}_${HINTS_TYPE}_genemark_time_mem.txt"
+            "${SPECIES_NAME}_${HINTS_TYPE}_genemark_time_mem.txt" \
+            "tool=genemarkep species=${SPECIES_NAME} mut_rate=${MUTATION_RATE} hint=${HINTS_TYPE} cores=10" \
+            "genemark.gtf"
 
         cd ..
     else
@@ -81,22 +110,19 @@ for SPECIES in "$SPECIES_FOLDER"/*; do
     mkdir -p "$SPECIES_NAME"
     cd "$SPECIES_NAME" || exit 1
 
-    for MUTATION_RATE in original 0.01 0.04 0.07; do
+    for MUTATION_RATE in $MUTATION_RATES; do
         mkdir -p "mr_${MUTATION_RATE}"
         cd "mr_${MUTATION_RATE}" || exit 1
 
         # Aplicar mutation rate quando nao e original
-        if [ "$MUTATION_RATE" != "original" ]; then
-            gto_fasta_mutate -e $MUTATION_RATE < $DNA_FILE > input.fa
-        else
-            cp $DNA_FILE input.fa
-        fi
+        # every tool gets the same cached mutated genome
+        python3 "${BENCHMARK_DIR}/benchmarking_scripts/genome_cache.py" link "$DNA_FILE" "$MUTATION_RATE" input.fa || exit 1
 
         for HINTS_NAME in genus order far; do
             runGeneMarkEPp "${HINTS_NAME}" "$SPECIES_NAME" "$MUTATION_RATE"
         done
         
-        rm input.fa
+        rm -f input.fa
 
         cd ..
 
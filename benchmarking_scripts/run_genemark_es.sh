@@ -6,6 +6,7 @@ if [ -z "$BENCHMARK_DIR" ]; then
 fi
 
 SPECIES_FOLDER="${BENCHMARK_DIR}/species/benchmark_species"
+MUTATION_RATES="${MUTATION_RATES:-original 0.01 0.04 0.07}"
 RESULTS_FOLDER="${BENCHMARK_DIR}/results/tools/GeneMark-ES"
 
 mkdir -p ${RESULTS_FOLDER}
@@ -15,8 +16,19 @@ runTimedCommand() {
     local CMD="$1"
     local OUTPUT_FILE="$2"
     local TIME_MEM_FILE="$3"
+    local META="$4"     # run ledger metadata, e.g. "tool=snap species=oryza_sativa mut_rate=0.01"
+    local OUTPUTS="$5"  # output files hashed into the run ledger
+    local LEDGER_ARGS=()
+
+    if [ -n "$META" ]; then
+        LEDGER_ARGS+=(--ledger "${BENCHMARK_LEDGER:-${BENCHMARK_DIR}/results/ledger.sqlite}")
+        for KV in $META; do LEDGER_ARGS+=(--meta "$KV"); done
+        for OUT in $OUTPUTS; do LEDGER_ARGS+=(--record_output "$OUT"); done
+    fi
 
-    (/bin/time -f "%e\t%M" bash -c "$CMD") > "$OUTPUT_FILE" 2> "$TIME_MEM_FILE"
+    (python3 "${BENCHMARK_DIR}/benchmarking_scripts/monitor.py" --interval "${MONITOR_INTERVAL:-1}" \
+        --trials "${TRIALS:-1}" --ci_tolerance "${CI_TOLERANCE:-0}" --max_trials "${MAX_TRIALS:-20}" \
+        --series "${TIME_MEM_FILE%.txt}_series.tsv" "${LEDGER_ARGS[@]}" bash -c "$CMD") > "$OUTPUT_FILE" 2> "$TIME_MEM_FILE"
 }
 
 for SPECIES in "$SPECIES_FOLDER"/*; do
@@ -38,21 +50,20 @@ for SPECIES in "$SPECIES_FOLDER"/*; do
 
     echo "Running GeneMark-ES for $SPECIES_NAME..."
 
-    for MUTATION_RATE in original 0.01 0.04 0.07; do
+    for MUTATION_RATE in $MUTATION_RATES; do
         mkdir -p "mr_${MUTATION_RATE}"
         cd "mr_${MUTATION_RATE}" || exit 1
 
-        if [ "$MUTATION_RATE" != "original" ]; then
-            gto_fasta_mutate -e $MUTATION_RATE < $DNA_FILE > input.fa
-        else
-            cp $DNA_FILE input.fa
-        fi
+        # every tool gets the same cached mutated genome
+        python3 "${BENCHMARK_DIR}/benchmarking_scripts/genome_cache.py" link "$DNA_FILE" "$MUTATION_RATE" input.fa || exit 1
 
         runTimedCommand "gmes_petap.pl --sequence input.fa --ES --cores 10" \
             "${SPECIES_NAME}_genemark_output.txt" \
-            "${SPECIES_NAME}_genemark_time_mem.txt"
+            "${SPECIES_NAME}_genemark_time_mem.txt" \
+            "tool=genemarkes species=${SPECIES_NAME} mut_rate=${MUTATION_RATE} cores=10" \
+            "genemark.gtf"
 
-        rm input.fa
+        rm -f input.fa
 
         cd ..
 
@@ -7,6 +7,7 @@ fi
 
 TEMP_FASTA_DIR="${BENCHMARK_DIR}/data"
 SPECIES_FOLDER="${BENCHMARK_DIR}/species/benchmark_species"
+MUTATION_RATES="${MUTATION_RATES:-original 0.01 0.04 0.07}"
 RESULTS_FOLDER="${BENCHMARK_DIR}/results/tools/GeneMark-ETP"
 
 mkdir -p ${TEMP_FASTA_DIR}
@@ -18,8 +19,19 @@ runTimedCommand() {
     local CMD="$1"
     local OUTPUT_FILE="$2"
     local TIME_MEM_FILE="$3"
+    local META="$4"     # run ledger metadata, e.g. "tool=snap species=oryza_sativa mut_rate=0.01"
+    local OUTPUTS="$5"  # output files hashed into the run ledger
+    local LEDGER_ARGS=()
+
+    if [ -n "$META" ]; then
+        LEDGER_ARGS+=(--ledger "${BENCHMARK_LEDGER:-${BENCHMARK_DIR}/results/ledger.sqlite}")
+        for KV in $META; do LEDGER_ARGS+=(--meta "$KV"); done
+        for OUT in $OUTPUTS; do LEDGER_ARGS+=(--record_output "$OUT"); done
+    fi
 
-    (/bin/time -f "%e\t%M" bash -c "$CMD") > "$OUTPUT_FILE" 2> "$TIME_MEM_FILE"
+    (python3 "${BENCHMARK_DIR}/benchmarking_scripts/monitor.py" --interval "${MONITOR_INTERVAL:-1}" \
+        --trials "${TRIALS:-1}" --ci_tolerance "${CI_TOLERANCE:-0}" --max_trials "${MAX_TRIALS:-20}" \
+        --series "${TIME_MEM_FILE%.txt}_series.tsv" "${LEDGER_ARGS[@]}" bash -c "$CMD") > "$OUTPUT_FILE" 2> "$TIME_MEM_FILE"
 }
 
 runGeneMarkETP() {
@@ -44,16 +56,16 @@ runGeneMarkETP() {
             return 1
         fi
 
-        if [ "$MUTATION_RATE" != "original" ]; then
-            gto_fasta_mutate -e $MUTATION_RATE < $DNA_FILE > ${TEMP_FASTA_DIR}/input.fa
-        else
-            cp $DNA_FILE ${TEMP_FASTA_DIR}/input.fa
-        fi
+        # every tool gets the same cached mutated genome
+        python3 "${BENCHMARK_DIR}/benchmarking_scripts/genome_cache.py" link "$DNA_FILE" "$MUTATION_RATE" ${TEMP_FASTA_DIR}/input.fa || exit 1
 
         echo "Running GeneMark-ETP for $SPECIES_NAME with $HINTS_TYPE hints..."
         runTimedCommand "${BENCHMARK_DIR}/tools/GeneMark-ETP-main/bin/gmetp.pl --cores 10 --cfg ${HINTS_FILE}" \
             "${SPECIES_NAME}_${HINTS_TYPE}_genemark_output.txt" \
-            "${SPECIES_NAME}_${HINTS_TYPE}_genemark_time_mem.txt"
+            "${SPECIES_NAME}_${HINTS_TYPE}_genemark_time_mem.txt" \
+            "tool=genemarketp species=${SPECIES_NAME} mut_rate=${MUTATION_RATE} hint=${HINTS_TYPE} cores=10" \
+            "genemark.gtf"
+        rm -f ${TEMP_FASTA_DIR}/input.fa
 
         # Eliminar ficheiros temporarios e pesados do Genemark para poupar armazenamento
         rm -r data/
@@ -74,7 +86,7 @@ for SPECIES in "$SPECIES_FOLDER"/*; do
     mkdir -p "$SPECIES_NAME"
     cd "$SPECIES_NAME" || exit 1
 
-    for MUTATION_RATE in original 0.01 0.04 0.07; do
+    for MUTATION_RATE in $MUTATION_RATES; do
         mkdir -p "mr_${MUTATION_RATE}"
         cd "mr_${MUTATION_RATE}" || exit 1
 
@@ -88,6 +100,6 @@ for SPECIES in "$SPECIES_FOLDER"/*; do
     cd ..
 done
 
-rm -r ${TEMP_FASTA_DIR}
+rm -rf ${TEMP_FASTA_DIR}
 
 cd ${BENCHMARK_DIR}
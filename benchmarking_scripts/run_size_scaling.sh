@@ -0,0 +1,118 @@
+#!/bin/bash
+
+# Run one tool on nested subsamples of a species' genome to measure how cost grows with input size.
+#
+# Usage: run_size_scaling.sh <tool> <species> [fractions ...]
+#   tool: augustus | snap | genemarkes | gemoma | prothint | geanno
+#   fractions default to "0.1 0.25 0.5 1.0"; REGION_SIZE (bp, default 1000000) and SEED control
+#   the subsampling, HINT (genus/order/far) the hint set of GeMoMa/ProtHint, SNAP_MODEL the SNAP
+#   HMM and GEANNO_MODEL the GeAnno model.
+#
+# Subsamples are built once per species by subsample_fasta.py under results/size_scaling/<species>/inputs.
+# Every run is recorded in the run ledger with mode=size_scaling, fraction and input_bp, and
+# generate_all_graphics.py --ledger fits fixed-overhead + per-bp cost models to them.
+
+if [ -z "$BENCHMARK_DIR" ]; then
+    echo "Error: BENCHMARK_DIR is not set. Please source the env.sh file first."
+    exit 1
+fi
+
+if [ $# -lt 2 ]; then
+    echo "Usage: $0 <tool> <species> [fractions ...]"
+    exit 1
+fi
+
+TOOL="$1"
+SPECIES_NAME="$2"
+shift 2
+FRACTIONS=("$@")
+[ ${#FRACTIONS[@]} -gt 0 ] || FRACTIONS=(0.1 0.25 0.5 1.0)
+
+HINT="${HINT:-genus}"
+SNAP_MODEL="${SNAP_MODEL:-A.thaliana.hmm}"
+GEANNO_MODEL="${GEANNO_MODEL:-models_genic_m_esculenta_PCA}"
+REGION_SIZE="${REGION_SIZE:-1000000}"
+SEED="${SEED:-1}"
+
+SPECIES_FOLDER="${BENCHMARK_DIR}/species/benchmark_species"
+HINTS_FOLDER="${BENCHMARK_DIR}/species/hints"
+DNA_FILE="${SPECIES_FOLDER}/${SPECIES_NAME}/${SPECIES_NAME}_dna.fa"
+INPUTS_FOLDER="${BENCHMARK_DIR}/results/size_scaling/${SPECIES_NAME}/inputs"
+RESULTS_FOLDER="${BENCHMARK_DIR}/results/size_scaling/${SPECIES_NAME}/${TOOL}"
+LEDGER_DB="${BENCHMARK_LEDGER:-${BENCHMARK_DIR}/results/ledger.sqlite}"
+
+if [ ! -f "$DNA_FILE" ]; then
+    echo "Error: DNA file $DNA_FILE not found."
+    exit 1
+fi
+
+# command for one run on the FASTA $1, executed inside the run folder
+buildCommand() {
+    local INPUT="$1"
+
+    case "$TOOL" in
+        augustus)
+            source "${BENCHMARK_DIR}/config/species_model_augustus.txt"
+            local AUGUSTUS_MODEL
+            AUGUSTUS_MODEL=$(eval echo "\$$SPECIES_NAME" | tr -d '[:space:]')
+            echo "${BENCHMARK_DIR}/tools/Augustus-3.5.0/bin/augustus --outfile=augustus.gtf --species=${AUGUSTUS_MODEL} ${INPUT}"
+            ;;
+        snap)
+            echo "${BENCHMARK_DIR}/tools/SNAP-master/snap -gff ${SNAP_MODEL} ${INPUT} > output.gff"
+            ;;
+        genemarkes)
+            echo "gmes_petap.pl --sequence ${INPUT} --ES --cores 10"
+            ;;
+        prothint)
+            echo "${BENCHMARK_DIR}/tools/GeneMark-ETP/bin/gmes/ProtHint/bin/prothint.py ${INPUT} ${HINTS_FOLDER}/${SPECIES_NAME}_${HINT}.fa"
+            ;;
+        gemoma)
+            source "${BENCHMARK_DIR}/config/species_model_gemoma.txt"
+            local MODEL_NAME
+            MODEL_NAME=$(eval echo "\$${SPECIES_NAME}_${HINT}" | tr -d '[:space:]')
+            local REF="${BENCHMARK_DIR}/species/reference_species/${MODEL_NAME}/${MODEL_NAME}"
+            echo "cd ${BENCHMARK_DIR}/tools/GeMoMa/ && ./pipeline.sh mmseqs ${INPUT} ${REF}_annotation.gff3 ${REF}_dna.fa 10 $(pwd)"
+            ;;
+        geanno)
+            source "${BENCHMARK_DIR}/tools/GeAnno/env_geanno.sh"
+            echo "source ${PLANT_DIR}/.venv/bin/activate && python3 ${BENCHMARK_DIR}/tools/GeAnno/src/geanno.py -d ${INPUT} \
+-m ${BENCHMARK_DIR}/tools/GeAnno/models/${GEANNO_MODEL}/model_undersampling_XGBoost_50.pkl -w 1500 -s 50 -t 0.8 -o $(pwd)"
+            ;;
+        *)
+            echo "Error: unknown tool ${TOOL}." >&2
+            return 1
+            ;;
+    esac
+}
+
+EXTRA_META=()
+case "$TOOL" in
+    gemoma|prothint) EXTRA_META=(--meta "hint=${HINT}") ;;
+    snap)            EXTRA_META=(--meta "model=${SNAP_MODEL%%.*}") ;;
+    geanno)          EXTRA_META=(--meta "model=${GEANNO_MODEL}") ;;
+esac
+
+echo "Building subsamples of ${SPECIES_NAME} (${FRACTIONS[*]})..."
+mkdir -p "$INPUTS_FOLDER"
+python3 "${BENCHMARK_DIR}/benchmarking_scripts/subsample_fasta.py" "$DNA_FILE" "$INPUTS_FOLDER" \
+    --fractions "${FRACTIONS[@]}" --region_size "$REGION_SIZE" --seed "$SEED" > "${INPUTS_FOLDER}/subsamples.tsv" || exit 1
+
+tail -n +2 "${INPUTS_FOLDER}/subsamples.tsv" | while IFS=$'\t' read -r FRACTION INPUT INPUT_BP GENOME_BP; do
+    RUN_DIR="${RESULTS_FOLDER}/fraction_${FRACTION}"
+    mkdir -p "$RUN_DIR"
+    cd "$RUN_DIR" || exit 1
+
+    CMD=$(buildCommand "$INPUT") || exit 1
+
+    echo "Running ${TOOL} for ${SPECIES_NAME} on ${FRACTION} of the genome (${INPUT_BP} bp)..."
+    python3 "${BENCHMARK_DIR}/benchmarking_scripts/monitor.py" --interval "${MONITOR_INTERVAL:-1}" \
+        -o "${RUN_DIR}/time_mem.txt" --series "${RUN_DIR}/time_mem_series.tsv" \
+        --ledger "$LEDGER_DB" \
+        --meta "tool=${TOOL}" --meta "species=${SPECIES_NAME}" --meta "mut_rate=original" \
+        "${EXTRA_META[@]}" --meta "fraction=${FRACTION}" --meta "input_bp=${INPUT_BP}" \
+        --meta "genome_bp=${GENOME_BP}" --meta "region_size=${REGION_SIZE}" --meta "seed=${SEED}" \
+        --meta "mode=size_scaling" \
+        bash -c "$CMD" > "${RUN_DIR}/output.txt" 2>&1 < /dev/null
+done
+
+echo "Size scaling runs written to ${RESULTS_FOLDER}"
@@ -6,6 +6,7 @@ if [ -z "$BENCHMARK_DIR" ]; then
 fi
 
 SPECIES_FOLDER="${BENCHMARK_DIR}/species/benchmark_species"
+MUTATION_RATES="${MUTATION_RATES:-original 0.01 0.04 0.07}"
 RESULTS_FOLDER="${BENCHMARK_DIR}/results/tools/SNAP"
 
 mkdir -p ${RESULTS_FOLDER}
@@ -15,8 +16,38 @@ runTimedCommand() {
     local CMD="$1"
     local OUTPUT_FILE="$2"
     local TIME_MEM_FILE="$3"
+    local META="$4"     # run ledger metadata, e.g. "tool=snap species=oryza_sativa mut_rate=0.01"
+    local OUTPUTS="$5"  # output files hashed into the run ledger
+    local LEDGER_ARGS=()
+
+    if [ -n "$META" ]; then
+        LEDGER_ARGS+=(--ledger "${BENCHMARK_LEDGER:-${BENCHMARK_DIR}/results/ledger.sqlite}")
+        for KV in $META; do LEDGER_ARGS+=(--meta "$KV"); done
+        for OUT in $OUTPUTS; do LEDGER_ARGS+=(--record_output "$OUT"); done
+    fi
+
+    (python3 "${BENCHMARK_DIR}/benchmarking_scripts/monitor.py" --interval "${MONITOR_INTERVAL:-1}" \
+        --trials "${TRIALS:-1}" --ci_tolerance "${CI_TOLERANCE:-0}" --max_trials "${MAX_TRIALS:-20}" \
+        --series "${TIME_MEM_FILE%.txt}_series.tsv" "${LEDGER_ARGS[@]}" bash -c "$CMD") > "$OUTPUT_FILE" 2> "$TIME_MEM_FILE"
+}
 
-    (/bin/time -f "%e\t%M" bash -c "$CMD") > "$OUTPUT_FILE" 2> "$TIME_MEM_FILE"
+# Predictor command for input.fa, with {input} and {output} standing for the genome and $2.partial.
+# With SHARD_JOBS > 1 the predictor runs on overlapping genome chunks in parallel (shard_predict.py)
+# and the merged prediction is written to $2.partial; extra arguments are hint files to split per chunk.
+shardCommand() {
+    local CMD="$1"
+    local OUT="$2"
+    local HINTS=("${@:3}")
+
+    if [ "${SHARD_JOBS:-1}" -gt 1 ]; then
+        CMD="${CMD//\{output\}/${OUT}}"
+        echo "python3 ${BENCHMARK_DIR}/benchmarking_scripts/shard_predict.py --fasta input.fa --result ${OUT} \
+--out ${OUT}.partial --jobs ${SHARD_JOBS} --chunk_size ${SHARD_SIZE:-5000000} --overlap ${SHARD_OVERLAP:-200000} \
+${HINTS[*]:+--hints ${HINTS[*]}} -- '${CMD}'"
+    else
+        CMD="${CMD//\{output\}/${OUT}.partial}"
+        echo "${CMD//\{input\}/input.fa}"
+    fi
 }
 
 for SPECIES in "$SPECIES_FOLDER"/*; do
@@ -41,7 +72,7 @@ for SPECIES in "$SPECIES_FOLDER"/*; do
         mkdir -p "${REF_LABEL}"
         cd "${REF_LABEL}" || exit 1
 
-        for MUTATION_RATE in original 0.01 0.04 0.07; do
+        for MUTATION_RATE in $MUTATION_RATES; do
             mkdir -p "mr_${MUTATION_RATE}"
             cd "mr_${MUTATION_RATE}" || exit 1
 
@@ -51,17 +82,20 @@ for SPECIES in "$SPECIES_FOLDER"/*; do
                 continue
             fi
 
-            if [ "$MUTATION_RATE" != "original" ]; then
-                gto_fasta_mutate -e $MUTATION_RATE < $DNA_FILE > input.fa
-            else
-                cp $DNA_FILE input.fa
-            fi
+            # every tool gets the same cached mutated genome
+            python3 "${BENCHMARK_DIR}/benchmarking_scripts/genome_cache.py" link "$DNA_FILE" "$MUTATION_RATE" input.fa || exit 1
+
+            SNAP_CMD=$(shardCommand "${BENCHMARK_DIR}/tools/SNAP-master/snap -gff ${HMM_MODEL_FILE} {input} > {output}" output.gff)
+            SHARD_META=""
+            [ "${SHARD_JOBS:-1}" -gt 1 ] && SHARD_META=" shard_jobs=${SHARD_JOBS} shard_size=${SHARD_SIZE:-5000000}"
 
-            runTimedCommand "${BENCHMARK_DIR}/tools/SNAP-master/snap -gff ${HMM_MODEL_FILE} input.fa > output.gff" \
+            runTimedCommand "${SNAP_CMD} && mv output.gff.partial output.gff" \
                 "${SPECIES_NAME}_a_thaliana_output.txt" \
-                "${SPECIES_NAME}_a_thaliana_time_mem.txt"
+                "${SPECIES_NAME}_a_thaliana_time_mem.txt" \
+                "tool=snap species=${SPECIES_NAME} mut_rate=${MUTATION_RATE} model=${REF_LABEL%_reference}${SHARD_META}" \
+                "output.gff"
 
-            rm input.fa
+            rm -f input.fa
 
             cd ..
         
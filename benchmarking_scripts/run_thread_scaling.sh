@@ -0,0 +1,129 @@
+#!/bin/bash
+
+# Re-run one tool on one species at several thread counts to measure how it scales.
+#
+# Usage: run_thread_scaling.sh <tool> <species> [threads ...]
+#   tool: genemarkes | genemarkep | genemarketp | gemoma | prothint | geanno | evaluator
+#   threads default to "1 2 4 8 16"; HINT (genus/order/far) selects the hint set of the
+#   hint-based tools, GEANNO_MODEL the GeAnno model, REPEATS the runs per thread count.
+#
+# Every point is recorded in the run ledger with mode=thread_scaling and threads=<N>, and
+# plotted as speedup/efficiency curves by generate_all_graphics.py --ledger.
+# AUGUSTUS and SNAP are single-threaded and are not supported.
+
+if [ -z "$BENCHMARK_DIR" ]; then
+    echo "Error: BENCHMARK_DIR is not set. Please source the env.sh file first."
+    exit 1
+fi
+
+if [ $# -lt 2 ]; then
+    echo "Usage: $0 <tool> <species> [threads ...]"
+    exit 1
+fi
+
+TOOL="$1"
+SPECIES_NAME="$2"
+shift 2
+THREAD_COUNTS=("$@")
+[ ${#THREAD_COUNTS[@]} -gt 0 ] || THREAD_COUNTS=(1 2 4 8 16)
+
+HINT="${HINT:-genus}"
+GEANNO_MODEL="${GEANNO_MODEL:-models_genic_m_esculenta_PCA}"
+REPEATS="${REPEATS:-1}"
+
+SPECIES_FOLDER="${BENCHMARK_DIR}/species/benchmark_species"
+HINTS_FOLDER="${BENCHMARK_DIR}/species/hints"
+DNA_FILE="${SPECIES_FOLDER}/${SPECIES_NAME}/${SPECIES_NAME}_dna.fa"
+RESULTS_FOLDER="${BENCHMARK_DIR}/results/thread_scaling/${TOOL}/${SPECIES_NAME}"
+LEDGER_DB="${BENCHMARK_LEDGER:-${BENCHMARK_DIR}/results/ledger.sqlite}"
+
+if [ ! -f "$DNA_FILE" ]; then
+    echo "Error: DNA file $DNA_FILE not found."
+    exit 1
+fi
+
+# command for one run with $1 threads, executed inside the run folder
+buildCommand() {
+    local N="$1"
+
+    case "$TOOL" in
+        genemarkes)
+            echo "gmes_petap.pl --sequence ${DNA_FILE} --ES --cores ${N}"
+            ;;
+        genemarkep)
+            # reuse the ProtHint output of the main GeneMark-EP+ run
+            local PROTHINT_DIR="${BENCHMARK_DIR}/results/tools/GeneMark-EPp/${SPECIES_NAME}/mr_original/${HINT}"
+            echo "gmes_petap.pl --EP ${PROTHINT_DIR}/prothint.gff --evidence ${PROTHINT_DIR}/evidence.gff --seq ${DNA_FILE} --cores ${N}"
+            ;;
+        genemarketp)
+            # the ETP configs point at data/input.fa, as in run_genemark_etp.sh
+            mkdir -p "${BENCHMARK_DIR}/data"
+            # rm first: data/input.fa may still be a hardlink into the genome cache left by another run
+            rm -f "${BENCHMARK_DIR}/data/input.fa"
+            cp "$DNA_FILE" "${BENCHMARK_DIR}/data/input.fa"
+            echo "${BENCHMARK_DIR}/tools/GeneMark-ETP-main/bin/gmetp.pl --cores ${N} --cfg ${SPECIES_FOLDER}/${SPECIES_NAME}/${SPECIES_NAME}_${HINT}.yaml"
+            ;;
+        prothint)
+            echo "${BENCHMARK_DIR}/tools/GeneMark-ETP/bin/gmes/ProtHint/bin/prothint.py --threads ${N} ${DNA_FILE} ${HINTS_FOLDER}/${SPECIES_NAME}_${HINT}.fa"
+            ;;
+        gemoma)
+            source "${BENCHMARK_DIR}/config/species_model_gemoma.txt"
+            local MODEL_NAME
+            MODEL_NAME=$(eval echo "\$${SPECIES_NAME}_${HINT}" | tr -d '[:space:]')
+            local REF="${BENCHMARK_DIR}/species/reference_species/${MODEL_NAME}/${MODEL_NAME}"
+            echo "cd ${BENCHMARK_DIR}/tools/GeMoMa/ && ./pipeline.sh mmseqs ${DNA_FILE} ${REF}_annotation.gff3 ${REF}_dna.fa ${N} $(pwd)"
+            ;;
+        geanno)
+            # XGBoost and the BLAS libraries follow the OpenMP thread count
+            source "${BENCHMARK_DIR}/tools/GeAnno/env_geanno.sh"
+            echo "source ${PLANT_DIR}/.venv/bin/activate && OMP_NUM_THREADS=${N} OPENBLAS_NUM_THREADS=${N} MKL_NUM_THREADS=${N} \
+python3 ${BENCHMARK_DIR}/tools/GeAnno/src/geanno.py -d ${DNA_FILE} \
+-m ${BENCHMARK_DIR}/tools/GeAnno/models/${GEANNO_MODEL}/model_undersampling_XGBoost_50.pkl -w 1500 -s 50 -t 0.8 -o $(pwd)"
+            ;;
+        evaluator)
+            # obtain_metrics on the ab initio AUGUSTUS prediction of this species
+            echo "${BENCHMARK_DIR}/metrics/obtain_metrics ${SPECIES_FOLDER}/${SPECIES_NAME}/${SPECIES_NAME}_annotation.gff3 \
+${BENCHMARK_DIR}/results/tools/augustus/${SPECIES_NAME}/mr_original/abinitio/augustus.gtf --output_folder $(pwd) --threads ${N}"
+            ;;
+        augustus|snap)
+            echo "Error: ${TOOL} is single-threaded, there is nothing to scale." >&2
+            return 1
+            ;;
+        *)
+            echo "Error: unknown tool ${TOOL}." >&2
+            return 1
+            ;;
+    esac
+}
+
+# only the evidence-based tools depend on the hint set
+HINT_META=()
+case "$TOOL" in
+    genemarkep|genemarketp|prothint|gemoma) HINT_META=(--meta "hint=${HINT}") ;;
+esac
+
+mkdir -p "$RESULTS_FOLDER"
+
+for N in "${THREAD_COUNTS[@]}"; do
+    for ((R = 1; R <= REPEATS; R++)); do
+        RUN_DIR="${RESULTS_FOLDER}/threads_${N}/run_${R}"
+        mkdir -p "$RUN_DIR"
+        cd "$RUN_DIR" || exit 1
+
+        CMD=$(buildCommand "$N") || exit 1
+
+        echo "Running ${TOOL} for ${SPECIES_NAME} with ${N} threads (run ${R}/${REPEATS})..."
+        python3 "${BENCHMARK_DIR}/benchmarking_scripts/monitor.py" --interval "${MONITOR_INTERVAL:-1}" \
+            -o "${RUN_DIR}/time_mem.txt" --series "${RUN_DIR}/time_mem_series.tsv" \
+            --ledger "$LEDGER_DB" \
+            --meta "tool=${TOOL}" --meta "species=${SPECIES_NAME}" --meta "mut_rate=original" \
+            "${HINT_META[@]}" --meta "threads=${N}" --meta "mode=thread_scaling" \
+            bash -c "$CMD" > "${RUN_DIR}/output.txt" 2>&1
+
+        cd "$RESULTS_FOLDER" || exit 1
+    done
+done
+
+rm -f "${BENCHMARK_DIR}/data/input.fa"
+
+echo "Thread scaling runs written to ${RESULTS_FOLDER}"
@@ -0,0 +1,777 @@
+#!/usr/bin/env python3
+"""
+Run the whole benchmark matrix as a job DAG under CPU and RAM budgets.
+
+The matrix (species x mutation rate x hint x tool) is expanded into jobs
+
+    mutate genome -> [GeneMark-ES ->] ProtHint -> predictor -> normalise -> evaluate
+
+that write to the same folders and files as the run_*.sh scripts, so
+extract_all_values.sh and the plots keep working. One evaluate job per species
+runs metrics/batch_evaluate.py, with the options of extract_all_values.sh, on
+all the normalised predictions of that species. Every job declares the
+cores and GB of RAM it needs (see JOB_RESOURCES, --job_resources); ready jobs
+are started, longest remaining chain first, as long as they fit in the free
+budget. The dependants of a failed job are cancelled. Predictors run through
+monitor.py and the ledger like in the run scripts.
+
+With --cost_model, the time and RAM of each job are predicted from past runs
+(cost_model.py): the longest predicted chain of work starts first, and jobs
+with history declare their predicted peak RSS (plus MEM_HEADROOM) instead of
+JOB_RESOURCES. --plan simulates the run under the budgets and prints the
+predicted start/end of every job, the makespan and the peak memory.
+
+Job states are kept in the manifest (manifest.py, results/scheduler/manifest.sqlite):
+a rerun skips the jobs that are done and reruns everything else, including jobs
+interrupted by a crash, after removing their stale outputs. Outputs named by
+the scheduler are written under a temporary name and renamed on success.
+Results of the run scripts that the manifest has not seen yet are adopted as
+done when they cannot be partial: outputs only renamed into place on success,
+or files recorded, with the same SHA-256, by a ledger run that exited 0.
+
+Usage:
+    scheduler.py [--cpus 16] [--mem_gb GB] [--tools T ...] [--species S ...]
+                 [--mut_rates R ...] [--hints H ...] [--job_resources KIND=CPUS:GB ...]
+                 [--shard_jobs N] [--dry_run | --plan] [--cost_model] [--no_manifest]
+"""
+
+import argparse
+import heapq
+import os
+import shlex
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cost_model import CostModel, GenomeSizes, default_model
+from ledger import file_sha256
+from manifest import Manifest, default_db
+
+TOOLS = ["augustus", "genemarkes", "genemarkep", "genemarketp", "gemoma", "snap", "geanno"]
+MUT_RATES = ["original", "0.01", "0.04", "0.07"]
+HINTS = ["genus", "order", "far"]
+
+# (cores, GB of RAM) declared per kind of job
+JOB_RESOURCES: Dict[str, Tuple[int, float]] = {
+    "mutate":      (1, 2),
+    "prothint":    (8, 8),
+    "augustus":    (1, 4),
+    "genemarkes":  (10, 8),
+    "genemarkep":  (10, 8),
+    "genemarketp": (10, 24),
+    "gemoma":      (10, 24),
+    "snap":        (1, 4),
+    "geanno":      (2, 16),
+    "normalise":   (1, 4),
+    "evaluate":    (4, 8),
+}
+
+# predicted seconds of the job kinds the cost model has no history for
+DEFAULT_SECONDS: Dict[str, float] = {
+    "mutate": 120,
+    "normalise": 60,
+    "evaluate": 300,
+}
+DEFAULT_PREDICTOR_SECONDS = 3600
+
+# declared RAM of a job with history = predicted peak RSS x MEM_HEADROOM
+MEM_HEADROOM = 1.25
+
+SNAP_MODELS = {"arabidopsis": "A.thaliana.hmm", "rice": "O.sativa.hmm"}
+
+GEANNO_MODELS = {
+    "a_thaliana_model": "models_genic_a_thaliana",
+    "a_thaliana_model_PCA": "models_genic_a_thaliana_PCA",
+    "genemark_model": "models_genic_genemark",
+    "genemark_model_PCA": "models_genic_genemark_PCA",
+    "m_esculenta_model_PCA": "models_genic_m_esculenta_PCA",
+    "o_sativa_model": "models_genic_o_sativa",
+    "o_sativa_model_PCA": "models_genic_o_sativa_PCA",
+}
+GEANNO_WINDOWS = [1000, 1500]
+GEANNO_STEPS = [25, 50]
+GEANNO_THRESHOLDS = "0.2,0.3,0.4,0.5,0.6,0.7,0.8"
+
+
+@dataclass
+class Job:
+    name: str
+    kind: str
+    cmd: str
+    cwd: Path
+    cpus: int = 1
+    mem_gb: float = 1.0
+    deps: List[str] = field(default_factory=list)
+    done_file: Optional[Path] = None  # the job is skipped when this file exists
+    lock: Optional[str] = None        # jobs holding the same lock never run at once
+    atomic: bool = False              # done_file only appears once the job succeeded (renamed into place)
+
+
+def read_mapping(path: Path) -> Dict[str, str]:
+    """ KEY=VALUE lines of the config/species_model_*.txt files"""
+    out = {}
+    for line in path.read_text().splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            out[key.strip()] = value.strip()
+    return out
+
+
+class MatrixBuilder:
+    """ Expands species x mutation rate x hint x tool into Jobs mirroring the run_*.sh scripts"""
+
+    def __init__(self, bdir: Path, resources: Dict[str, Tuple[int, float]], ledger: Path, shard_jobs: int = 1):
+        self.bdir = bdir
+        self.resources = dict(resources)
+        self.ledger = ledger
+        self.shard_jobs = shard_jobs
+        if shard_jobs > 1:
+            # sharded single-threaded predictors use one core per chunk
+            for kind in ("augustus", "snap"):
+                self.resources[kind] = (shard_jobs, self.resources[kind][1] * shard_jobs)
+        self.species_dir = bdir / "species" / "benchmark_species"
+        self.hints_dir = bdir / "species" / "hints"
+        self.tools_dir = bdir / "results" / "tools"
+        self.work_dir = bdir / "results" / "scheduler"
+        self.aggregated = bdir / "results" / "compiled" / "aggregated"
+        self.compiled = bdir / "results" / "compiled"
+        self.monitor = bdir / "benchmarking_scripts" / "monitor.py"
+        self.jobs: Dict[str, Job] = {}
+        # (normalise job, formatted path marker, with AUCs) of every prediction, per species
+        self.evaluations: Dict[str, List[Tuple[str, Path, bool]]] = {}
+
+    def add(self, name: str, kind: str, cmd: str, cwd: Path, deps=(), done_file=None, lock=None,
+            atomic=False) -> str:
+        cpus, mem_gb = self.resources[kind]
+        self.jobs[name] = Job(name, kind, cmd, cwd, cpus, mem_gb, [d for d in deps if d], done_file, lock, atomic)
+        return name
+
+    def monitored(self, cmd: str, output: Path, time_mem: Path, meta: Dict[str, str], outputs=()) -> str:
+        """ `cmd` wrapped in monitor.py with the ledger metadata, like runTimedCommand"""
+        args = ["python3", str(self.monitor), "--interval", os.environ.get("MONITOR_INTERVAL", "1"),
+                "--series", str(time_mem.with_name(time_mem.stem + "_series.tsv")), "--ledger", str(self.ledger)]
+        for k, v in meta.items():
+            args += ["--meta", f"{k}={v}"]
+        for o in outputs:
+            args += ["--record_output", str(o)]
+        args += ["bash", "-c", cmd]
+        return f"{shlex.join(args)} > {shlex.quote(str(output))} 2> {shlex.quote(str(time_mem))}"
+
+    def sharded(self, cmd: str, input_fa: Path, out: str, hints=()) -> str:
+        """ `cmd` ({input}, {output}) run on input_fa, or on its chunks with shard_predict.py; writes out.partial"""
+        if self.shard_jobs <= 1:
+            return cmd.replace("{input}", str(input_fa)).replace("{output}", f"{out}.partial")
+        args = ["python3", str(self.bdir / "benchmarking_scripts" / "shard_predict.py"), "--fasta", str(input_fa),
+                "--result", out, "--out", f"{out}.partial", "--jobs", str(self.shard_jobs),
+                "--chunk_size", os.environ.get("SHARD_SIZE", "5000000"),
+                "--overlap", os.environ.get("SHARD_OVERLAP", "200000")]
+        if hints:
+            args += ["--hints", *hints]
+        return shlex.join(args + ["--", cmd.replace("{output}", out)])
+
+    def shard_meta(self) -> Dict[str, str]:
+        if self.shard_jobs <= 1:
+            return {}
+        return dict(shard_jobs=self.shard_jobs, shard_size=os.environ.get("SHARD_SIZE", "5000000"))
+
+    def input_fa(self, species: str, mr: str) -> Path:
+        return self.bdir / "results" / "inputs" / species / f"mr_{mr}" / "input.fa"
+
+    # genome ---------------------------------------------------------------
+
+    def mutate(self, species: str, mr: str) -> str:
+        """ Link the cached mutated genome (genome_cache.py) to results/inputs/<species>/mr_<rate>/input.fa"""
+        dna = self.species_dir / species / f"{species}_dna.fa"
+        out = self.input_fa(species, mr)
+        cmd = shlex.join(["python3", str(self.bdir / "benchmarking_scripts" / "genome_cache.py"),
+                          "link", str(dna), mr, str(out)])
+        return self.add(f"mutate:{species}:{mr}", "mutate", cmd, self.work_dir, done_file=out, atomic=True)
+
+    # predictors -----------------------------------------------------------
+
+    def genemarkes(self, species: str, mr: str, dep: str) -> Tuple[str, Path, Path]:
+        cwd = self.tools_dir / "GeneMark-ES" / species / f"mr_{mr}"
+        cores = self.resources["genemarkes"][0]
+        cmd = self.monitored(f"gmes_petap.pl --sequence {self.input_fa(species, mr)} --ES --cores {cores}",
+                             cwd / f"{species}_genemark_output.txt", cwd / f"{species}_genemark_time_mem.txt",
+                             dict(tool="genemarkes", species=species, mut_rate=mr, cores=cores), ["genemark.gtf"])
+        name = self.add(f"genemarkes:{species}:{mr}", "genemarkes", cmd, cwd, [dep], cwd / "genemark.gtf")
+        return name, cwd / "genemark.gtf", cwd / f"{species}_genemark_time_mem.txt"
+
+    def prothint(self, species: str, mr: str, hint: str, deps: List[str]) -> Optional[str]:
+        hints_fa = self.hints_dir / f"{species}_{hint}.fa"
+        if not hints_fa.is_file():
+            return None
+        cwd = self.tools_dir / "GeneMark-EPp" / species / f"mr_{mr}" / hint
+        es_gtf = self.tools_dir / "GeneMark-ES" / species / f"mr_{mr}" / "genemark.gtf"
+        cores = self.resources["prothint"][0]
+        prothint_bin = self.bdir / "tools" / "GeneMark-ETP" / "bin" / "gmes" / "ProtHint" / "bin" / "prothint.py"
+        outputs = ["prothint.gff", "evidence.gff", "prothint_augustus.gff"]
+        # same artifact cache key as run_genemark_epP.sh, so hints computed by either are reused
+        step = shlex.join(["prothint", "--input", str(self.input_fa(species, mr)), str(hints_fa), str(es_gtf),
+                           "--tool", str(prothint_bin), "--output", *outputs])
+        cache = f"python3 {self.bdir}/benchmarking_scripts/artifact_cache.py"
+        run = self.monitored(
+            f"{prothint_bin} --threads {cores} --geneMarkGtf {es_gtf} {self.input_fa(species, mr)} {hints_fa}",
+            cwd / f"{species}_{hint}_prothint_output.txt", cwd / f"{species}_{hint}_prothint_time_mem.txt",
+            dict(tool="prothint", species=species, mut_rate=mr, hint=hint), outputs)
+        cmd = f"{cache} fetch {step} || {{ rm -f {' '.join(outputs)} && {run} && {cache} store {step}; }}"
+        return self.add(f"prothint:{species}:{mr}:{hint}", "prothint", cmd, cwd, deps, cwd / "prothint_augustus.gff")
+
+    def genemarkep(self, species: str, mr: str, hint: str, dep: str) -> Tuple[str, Path, Path]:
+        cwd = self.tools_dir / "GeneMark-EPp" / species / f"mr_{mr}" / hint
+        cores = self.resources["genemarkep"][0]
+        cmd = self.monitored(
+            f"gmes_petap.pl --EP prothint.gff --evidence evidence.gff --seq {self.input_fa(species, mr)} --cores {cores}",
+            cwd / f"{species}_{hint}_genemark_output.txt", cwd / f"{species}_{hint}_genemark_time_mem.txt",
+            dict(tool="genemarkep", species=species, mut_rate=mr, hint=hint, cores=cores), ["genemark.gtf"])
+        name = self.add(f"genemarkep:{species}:{mr}:{hint}", "genemarkep", cmd, cwd, [dep], cwd / "genemark.gtf")
+        return name, cwd / "genemark.gtf", cwd / f"{species}_{hint}_genemark_time_mem.txt"
+
+    def augustus(self, species: str, mr: str, hint: str, model: str, dep: str) -> Tuple[str, Path, Path]:
+        cwd = self.tools_dir / "augustus" / species / f"mr_{mr}" / hint
+        prefix, hints_opt = "", ""
+        if hint != "abinitio":
+            prothint_dir = self.tools_dir / "GeneMark-EPp" / species / f"mr_{mr}" / hint
+            prefix = f"cp {prothint_dir}/prothint_augustus.gff . && "
+            hints_opt = (f"--hintsfile=prothint_augustus.gff "
+                         f"--extrinsicCfgFile={self.bdir}/config/augustus/extrinsic.cfg ")
+        run = self.sharded(f"{self.bdir}/tools/Augustus-3.5.0/bin/augustus --outfile={{output}} --species={model} "
+                           f"{hints_opt}{{input}}", self.input_fa(species, mr), "augustus.gtf",
+                           ["prothint_augustus.gff"] if hint != "abinitio" else [])
+        cmd = prefix + self.monitored(
+            f"{run} && mv augustus.gtf.partial augustus.gtf",
+            cwd / f"{species}_{hint}_augustus_output.txt", cwd / f"{species}_{hint}_augustus_time_mem.txt",
+            dict(tool="augustus", species=species, mut_rate=mr, hint=hint, model=model, **self.shard_meta()),
+            ["augustus.gtf"])
+        name = self.add(f"augustus:{species}:{mr}:{hint}", "augustus", cmd, cwd, [dep], cwd / "augustus.gtf",
+                        atomic=True)
+        return name, cwd / "augustus.gtf", cwd / f"{species}_{hint}_augustus_time_mem.txt"
+
+    def genemarketp(self, species: str, mr: str, hint: str, dep: str) -> Optional[Tuple[str, Path, Path]]:
+        cfg = self.species_dir / species / f"{species}_{hint}.yaml"
+        if not cfg.is_file():
+            return None
+        cwd = self.tools_dir / "GeneMark-ETP" / species / f"mr_{mr}" / hint
+        cores = self.resources["genemarketp"][0]
+        # the ETP configs read data/input.fa, so ETP jobs hold the "etp_input" lock
+        data_fa = self.bdir / "data" / "input.fa"
+        # the link into the genome cache is removed however the job ends, before another job writes data/input.fa
+        cmd = (f"trap 'rm -f {data_fa}' EXIT && mkdir -p {data_fa.parent} && ln -f {self.input_fa(species, mr)} {data_fa} && "
+               + self.monitored(f"{self.bdir}/tools/GeneMark-ETP-main/bin/gmetp.pl --cores {cores} --cfg {cfg}",
+                                cwd / f"{species}_{hint}_genemark_output.txt",
+                                cwd / f"{species}_{hint}_genemark_time_mem.txt",
+                                dict(tool="genemarketp", species=species, mut_rate=mr, hint=hint, cores=cores),
+                                ["genemark.gtf"])
+               + " && rm -rf data/ rnaseq/")
+        name = self.add(f"genemarketp:{species}:{mr}:{hint}", "genemarketp", cmd, cwd, [dep], cwd / "genemark.gtf",
+                        lock="etp_input")
+        return name, cwd / "genemark.gtf", cwd / f"{species}_{hint}_genemark_time_mem.txt"
+
+    def gemoma(self, species: str, mr: str, hint: str, model: str, dep: str) -> Tuple[str, Path, Path]:
+        cwd = self.tools_dir / "GeMoMa" / species / f"mr_{mr}" / hint
+        ref = self.bdir / "species" / "reference_species" / model / model
+        cores = self.resources["gemoma"][0]
+        cmd = f"cd {self.bdir}/tools/GeMoMa/ && " + self.monitored(
+            f"./pipeline.sh mmseqs {self.input_fa(species, mr)} {ref}_annotation.gff3 {ref}_dna.fa {cores} {cwd}",
+            cwd / f"{species}_{hint}_output.txt", cwd / f"{species}_{hint}_time_mem.txt",
+            dict(tool="gemoma", species=species, mut_rate=mr, hint=hint, model=model),
+            [cwd / "final_annotation.gff"])
+        name = self.add(f"gemoma:{species}:{mr}:{hint}", "gemoma", cmd, cwd, [dep], cwd / "final_annotation.gff")
+        return name, cwd / "final_annotation.gff", cwd / f"{species}_{hint}_time_mem.txt"
+
+    def snap(self, species: str, mr: str, ref: str, dep: str) -> Tuple[str, Path, Path]:
+        cwd = self.tools_dir / "SNAP" / species / f"{ref}_reference" / f"mr_{mr}"
+        run = self.sharded(f"{self.bdir}/tools/SNAP-master/snap -gff {SNAP_MODELS[ref]} {{input}} > {{output}}",
+                           self.input_fa(species, mr), "output.gff")
+        cmd = self.monitored(
+            f"{run} && mv output.gff.partial output.gff",
+            cwd / f"{species}_a_thaliana_output.txt", cwd / f"{species}_a_thaliana_time_mem.txt",
+            dict(tool="snap", species=species, mut_rate=mr, model=ref, **self.shard_meta()), ["output.gff"])
+        name = self.add(f"snap:{species}:{mr}:{ref}", "snap", cmd, cwd, [dep], cwd / "output.gff", atomic=True)
+        return name, cwd / "output.gff", cwd / f"{species}_a_thaliana_time_mem.txt"
+
+    def geanno(self, species: str, mr: str, dep: str) -> None:
+        """ GeAnno jobs; their evaluation over all thresholds stays in extract_all_values.sh"""
+        mr_dir = "0" if mr == "original" else mr
+        combos = [(w, s) for w in GEANNO_WINDOWS for s in GEANNO_STEPS] if mr == "original" else [(1500, 50)]
+        env = f"source {self.bdir}/tools/GeAnno/env_geanno.sh && source ${{PLANT_DIR}}/.venv/bin/activate && "
+        for model_name, model in GEANNO_MODELS.items():
+            spec_dir = self.tools_dir / "GeAnno" / mr_dir / model_name / species
+            out_dir = spec_dir / "output"
+            for w, s in combos:
+                time_mem = spec_dir / "time_mem" / f"time_{w}_{s}.txt"
+                run = (f"python3 {self.bdir}/tools/GeAnno/src/geanno.py -d {self.input_fa(species, mr)} "
+                       f"-m {self.bdir}/tools/GeAnno/models/{model}/model_undersampling_XGBoost_50.pkl "
+                       f"-w {w} -s {s} -t {GEANNO_THRESHOLDS} -o {out_dir}")
+                args = ["python3", str(self.monitor), "-o", str(time_mem), "--interval",
+                        os.environ.get("MONITOR_INTERVAL", "1"),
+                        "--series", str(time_mem.with_name(time_mem.stem + "_series.tsv")),
+                        "--ledger", str(self.ledger)]
+                for k, v in dict(tool="geanno", species=species, mut_rate=mr_dir, model=model_name,
+                                 window=w, step=s, thresholds=GEANNO_THRESHOLDS).items():
+                    args += ["--meta", f"{k}={v}"]
+                args += ["--record_output", f"{out_dir}/output_{w}_{s}_*.gff3", "bash", "-c", env + run]
+                cmd = f"mkdir -p {out_dir} {time_mem.parent} && {shlex.join(args)}"
+                self.add(f"geanno:{species}:{mr}:{model_name}:{w}_{s}", "geanno", cmd, spec_dir, [dep],
+                         out_dir / f"output_{w}_{s}_0.8.gff3")
+
+    # normalise and evaluate -----------------------------------------------
+
+    def normalise(self, pred_job: str, prefix: str, prediction: Path, time_mem: Path,
+                  species: str, mode: str = "default") -> None:
+        """ Aggregated copy named <prefix>_<time>_<mem> and its formatted GFF3, queued for the species' evaluate job"""
+        work = self.work_dir / pred_job.replace(":", "_")
+        marker = work / "formatted_path.txt"
+        q = shlex.quote
+        # COMPRESS_RESULTS=gz|bgz|zst keeps the aggregated copy and the metric CSVs compressed
+        compress = os.environ.get("COMPRESS_RESULTS")
+        compressed_io = self.bdir / "benchmarking_scripts" / "compressed_io.py"
+        agg = f"{self.aggregated}/${{BASE}}{prediction.suffix}" + (f".{compress}" if compress else "")
+        copy = f"python3 {compressed_io} compress" if compress else "cp"
+        norm = (f"mkdir -p {self.aggregated} && "
+                f"read -r TIME MEM <<< \"$(tail -n 2 {q(str(time_mem))} | grep -v '^$' | tail -n 1)\" && "
+                f"BASE={q(prefix)}_${{TIME}}_${{MEM}} && "
+                f"{copy} {q(str(prediction))} {agg} && "
+                f"{self.bdir}/metrics/normalise_prediction.sh {agg} {mode} && "
+                f"echo {self.compiled}/formatted/${{BASE}}.gff3 > {marker}.partial && mv {marker}.partial {marker}")
+        n = self.add(f"normalise:{pred_job}", "normalise", f"mkdir -p {work} && {norm}", self.work_dir,
+                     [pred_job], marker, atomic=True)
+        self.evaluations.setdefault(species, []).append((n, marker, prefix.startswith("augustus_")))
+
+    def evaluate(self, species: str) -> Optional[str]:
+        """ One batch_evaluate.py process for every normalised prediction of a species, as in extract_all_values.sh"""
+        queued = self.evaluations.get(species)
+        if not queued:
+            return None
+        manifest = self.work_dir / f"evaluate_{species}.tsv"
+        done = self.work_dir / f"evaluate_{species}.done"
+        rows = " ".join(f"\"$(cat {marker})\" {int(auc)}" for _, marker, auc in queued)
+        args = ["python3", str(self.bdir / "metrics" / "batch_evaluate.py"),
+                str(self.species_dir / species / f"{species}_annotation.gff3"),
+                "--manifest", str(manifest), "--per_file", str(self.compiled), "--jobs", str(self.resources["evaluate"][0]),
+                "--gene_level", "--tracks", str(self.compiled / "tracks"),
+                "--bin_size", os.environ.get("TRACK_BIN_SIZE", "100000")]
+        if os.environ.get("COMPRESS_RESULTS"):
+            args += ["--compress", os.environ["COMPRESS_RESULTS"]]
+        cmd = (f"{{ printf 'prediction\\tauc\\n'; printf '%s\\t%s\\n' {rows}; }} > {manifest}.partial && "
+               f"mv {manifest}.partial {manifest} && "
+               f"{shlex.join(args)} && touch {done}")
+        return self.add(f"evaluate:{species}", "evaluate", cmd, self.work_dir, [n for n, _, _ in queued], done,
+                        atomic=True)
+
+    def build(self, tools: List[str], species_list: List[str], mut_rates: List[str], hints: List[str]) -> Dict[str, Job]:
+        aug_models = read_mapping(self.bdir / "config" / "species_model_augustus.txt")
+        gemoma_models = read_mapping(self.bdir / "config" / "species_model_gemoma.txt")
+        needs_ep = {"augustus", "genemarkep"} & set(tools)
+
+        for sp in species_list:
+            if not (self.species_dir / sp / f"{sp}_dna.fa").is_file():
+                print(f"DNA file not found for {sp}. Skipping...", file=sys.stderr)
+                continue
+            for mr in mut_rates:
+                mut = self.mutate(sp, mr)
+                lbl = mr
+
+                es = None
+                if "genemarkes" in tools or needs_ep:
+                    es, gtf, tm = self.genemarkes(sp, mr, mut)
+                    if "genemarkes" in tools:
+                        self.normalise(es, f"genemarkes_{sp}_{lbl}", gtf, tm, sp)
+
+                prothints = {h: self.prothint(sp, mr, h, [mut, es]) for h in hints} if needs_ep else {}
+
+                if "augustus" in tools:
+                    model = aug_models.get(sp)
+                    for h in ["abinitio"] + [h for h in hints if prothints.get(h)]:
+                        j, out, tm = self.augustus(sp, mr, h, model, prothints.get(h) or mut)
+                        self.normalise(j, f"augustus_{sp}_{lbl}_{h}", out, tm, sp)
+
+                if "genemarkep" in tools:
+                    for h in hints:
+                        if prothints.get(h):
+                            j, out, tm = self.genemarkep(sp, mr, h, prothints[h])
+                            self.normalise(j, f"genemarkep_{sp}_{lbl}_{h}", out, tm, sp)
+
+                if "genemarketp" in tools:
+                    for h in hints:
+                        res = self.genemarketp(sp, mr, h, mut)
+                        if res:
+                            self.normalise(res[0], f"genemarketp_{sp}_{lbl}_{h}", res[1], res[2], sp)
+
+                if "gemoma" in tools:
+                    for h in hints:
+                        model = gemoma_models.get(f"{sp}_{h}", "none")
+                        if model != "none":
+                            j, out, tm = self.gemoma(sp, mr, h, model, mut)
+                            self.normalise(j, f"gemoma_{sp}_{lbl}_{h}", out, tm, sp)
+
+                if "snap" in tools:
+                    for ref in SNAP_MODELS:
+                        j, out, tm = self.snap(sp, mr, ref, mut)
+                        self.normalise(j, f"snap_{sp}_{lbl}_{ref}", out, tm, sp, mode="snap")
+
+                if "geanno" in tools:
+                    self.geanno(sp, mr, mut)
+            self.evaluate(sp)
+        return self.jobs
+
+
+def _priorities(jobs: Dict[str, Job], durations: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Length of the longest chain of dependants below each job, counted in jobs or, given predicted
+    durations, in seconds (longest processing time first along the critical path); longer chains start first
+    """
+    children: Dict[str, List[str]] = {n: [] for n in jobs}
+    for j in jobs.values():
+        for d in j.deps:
+            children[d].append(j.name)
+    prio: Dict[str, float] = {}
+
+    def visit(n: str) -> float:
+        if n not in prio:
+            own = 1 if durations is None else durations[n]
+            prio[n] = own + max((visit(c) for c in children[n]), default=0)
+        return prio[n]
+
+    for n in jobs:
+        visit(n)
+    return prio
+
+
+def job_costs(jobs: Dict[str, Job], model: CostModel, sizes: GenomeSizes,
+              shard_jobs: int = 1) -> Dict[str, Tuple[float, Optional[float]]]:
+    """
+    Predicted (seconds, GB of peak RSS) of every job, from the kind, species, mutation rate and hint/model
+    in its name. Jobs without history get DEFAULT_SECONDS and None (their declared RAM).
+    """
+    costs = {}
+    for name, j in jobs.items():
+        parts = name.split(":")
+        if j.kind in DEFAULT_SECONDS:
+            costs[name] = (DEFAULT_SECONDS[j.kind], None)
+            continue
+        species, mr = parts[1], parts[2]
+        pred = model.predict(j.kind, sizes(species), 0.0 if mr == "original" else float(mr),
+                             parts[3] if len(parts) > 3 else "")
+        if pred is None:
+            costs[name] = (DEFAULT_PREDICTOR_SECONDS, None)
+        elif shard_jobs > 1 and j.kind in ("augustus", "snap"):
+            # chunks run side by side; each one holds a fraction of the genome, so keep the declared RAM
+            costs[name] = (pred[0] / shard_jobs, None)
+        else:
+            costs[name] = (pred[0], pred[1] / 1024 ** 2)
+    return costs
+
+
+def simulate(jobs: Dict[str, Job], costs: Dict[str, Tuple[float, Optional[float]]], cpus: int, mem_gb: float,
+             prio: Dict[str, float]) -> Tuple[Dict[str, Tuple[float, float]], float, float]:
+    """
+    Replay DagRunner's policy with the predicted durations: ({job: (start, end)}, makespan, peak GB).
+    Jobs whose output already exists take no time. The peak sums the predicted RSS of concurrent jobs
+    (their declared RAM when there is no prediction).
+    """
+    children: Dict[str, List[str]] = {n: [] for n in jobs}
+    waiting = {n: len(j.deps) for n, j in jobs.items()}
+    for j in jobs.values():
+        for d in j.deps:
+            children[d].append(j.name)
+    ready = [n for n, w in waiting.items() if w == 0]
+    events: List[Tuple[float, str]] = []
+    sched: Dict[str, Tuple[float, float]] = {}
+    now, free_cpus, free_mem, used_gb, peak, locks = 0.0, cpus, mem_gb, 0.0, 0.0, set()
+
+    def rss(j: Job) -> float:
+        return costs[j.name][1] if costs[j.name][1] is not None else j.mem_gb
+
+    while ready or events:
+        ready.sort(key=lambda n: -prio[n])
+        for n in list(ready):
+            j = jobs[n]
+            done = j.done_file is not None and j.done_file.exists()
+            if not done and (min(j.cpus, cpus) > free_cpus or min(j.mem_gb, mem_gb) > free_mem
+                             or (j.lock and j.lock in locks)):
+                continue
+            ready.remove(n)
+            end = now if done else now + costs[n][0]
+            sched[n] = (now, end)
+            if not done:
+                free_cpus -= min(j.cpus, cpus)
+                free_mem -= min(j.mem_gb, mem_gb)
+                used_gb += rss(j)
+                peak = max(peak, used_gb)
+                if j.lock:
+                    locks.add(j.lock)
+            heapq.heappush(events, (end, n))
+        if not events:
+            break
+        now, n = heapq.heappop(events)
+        j = jobs[n]
+        if sched[n][1] > sched[n][0]:
+            free_cpus += min(j.cpus, cpus)
+            free_mem += min(j.mem_gb, mem_gb)
+            used_gb -= rss(j)
+            locks.discard(j.lock)
+        for c in children[n]:
+            waiting[c] -= 1
+            if waiting[c] == 0:
+                ready.append(c)
+    return sched, max((e for _, e in sched.values()), default=0.0), peak
+
+
+def adoptable(jobs: Dict[str, Job], ledger: Optional[Path]) -> List[str]:
+    """
+    Jobs whose existing output can be taken as done: atomic outputs, and outputs a successful ledger run
+    recorded with the same size and SHA-256 (a crashed run that left the file behind never matches)
+    """
+    recorded: Dict[str, set] = {}
+    if ledger is not None and ledger.is_file():
+        con = sqlite3.connect(ledger, timeout=60)
+        try:
+            rows = con.execute("SELECT o.path, o.sha256, o.size_bytes FROM run_outputs o "
+                               "JOIN runs r ON r.run_id = o.run_id WHERE r.exit_code = 0").fetchall()
+        except sqlite3.OperationalError:  # ledger from before run_outputs existed
+            rows = []
+        finally:
+            con.close()
+        for path, sha, size in rows:
+            recorded.setdefault(path, set()).add((sha, size))
+
+    out = []
+    for n, j in jobs.items():
+        if j.done_file is None or not j.done_file.is_file():
+            continue
+        if j.atomic:
+            out.append(n)
+            continue
+        seen = recorded.get(str(j.done_file.resolve()), set())
+        size = j.done_file.stat().st_size
+        if any(sz == size for _, sz in seen) and (file_sha256(j.done_file), size) in seen:
+            out.append(n)
+    return out
+
+
+class DagRunner:
+    """ Runs Jobs once their dependencies are done, within a budget of cores and GB of RAM"""
+
+    def __init__(self, jobs: Dict[str, Job], cpus: int, mem_gb: float, log_dir: Path,
+                 manifest: Optional[Manifest] = None, poll: float = 1.0,
+                 prio: Optional[Dict[str, float]] = None, ledger: Optional[Path] = None):
+        for j in jobs.values():
+            missing = [d for d in j.deps if d not in jobs]
+            if missing:
+                raise ValueError(f"Job {j.name} depends on unknown jobs {missing}")
+            # a job bigger than the whole budget still runs, alone
+            if j.cpus > cpus or j.mem_gb > mem_gb:
+                print(f"Warning: {j.name} needs {j.cpus} cores/{j.mem_gb} GB, more than the budget; "
+                      f"it will run on its own", file=sys.stderr)
+                j.cpus, j.mem_gb = min(j.cpus, cpus), min(j.mem_gb, mem_gb)
+        self.jobs = jobs
+        self.cpus, self.mem_gb = cpus, mem_gb
+        self.log_dir = log_dir
+        self.manifest = manifest
+        self.poll = poll
+        self.status: Dict[str, str] = {n: "pending" for n in jobs}
+        self.prio = prio if prio is not None else _priorities(jobs)
+        self.ledger = ledger
+
+    def _ready(self) -> List[Job]:
+        ready = [j for n, j in self.jobs.items() if self.status[n] == "pending"
+                 and all(self.status[d] in ("done", "skipped") for d in j.deps)]
+        return sorted(ready, key=lambda j: -self.prio[j.name])
+
+    def _cancel_dependants(self, name: str) -> None:
+        todo = [name]
+        while todo:
+            cur = todo.pop()
+            for j in self.jobs.values():
+                if cur in j.deps and self.status[j.name] == "pending":
+                    self.status[j.name] = "cancelled"
+                    todo.append(j.name)
+
+    def run(self) -> Dict[str, str]:
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        running: Dict[str, Tuple[subprocess.Popen, object]] = {}
+        free_cpus, free_mem = self.cpus, self.mem_gb
+        locks = set()
+
+        if self.manifest is not None:
+            start = self.manifest.sync({n: j.cmd for n, j in self.jobs.items()},
+                                       {n: j.kind for n, j in self.jobs.items()},
+                                       adopt=adoptable(self.jobs, self.ledger),
+                                       deps={n: j.deps for n, j in self.jobs.items()})
+            for n, state in start.items():
+                if state == "done":
+                    self.status[n] = "skipped"
+
+        # SIGTERM (e.g. from a batch system) stops the jobs and leaves them pending like Ctrl-C
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+        try:
+            while True:
+                for j in self._ready():
+                    if self.manifest is None and j.done_file is not None and j.done_file.exists():
+                        self.status[j.name] = "skipped"
+                        continue
+                    if j.cpus > free_cpus or j.mem_gb > free_mem or (j.lock and j.lock in locks):
+                        continue
+                    j.cwd.mkdir(parents=True, exist_ok=True)
+                    if j.done_file is not None:
+                        # output of an unfinished attempt, never to be mistaken for a result
+                        j.done_file.unlink(missing_ok=True)
+                    log_path = self.log_dir / f"{j.name.replace(':', '_')}.log"
+                    log = open(log_path, "w")
+                    proc = subprocess.Popen(["bash", "-c", j.cmd], cwd=j.cwd, stdout=log, stderr=subprocess.STDOUT,
+                                            start_new_session=True)
+                    running[j.name] = (proc, log)
+                    self.status[j.name] = "running"
+                    if self.manifest is not None:
+                        self.manifest.started(j.name, log_path)
+                    free_cpus -= j.cpus
+                    free_mem -= j.mem_gb
+                    if j.lock:
+                        locks.add(j.lock)
+                    print(f"[start] {j.name} ({j.cpus} cores, {j.mem_gb:g} GB; "
+                          f"free {free_cpus} cores, {free_mem:g} GB)", flush=True)
+
+                if not running:
+                    if any(s == "pending" for s in self.status.values()) and self._ready():
+                        continue
+                    break
+
+                time.sleep(self.poll)
+                for name, (proc, log) in list(running.items()):
+                    rc = proc.poll()
+                    if rc is None:
+                        continue
+                    log.close()
+                    del running[name]
+                    j = self.jobs[name]
+                    free_cpus += j.cpus
+                    free_mem += j.mem_gb
+                    locks.discard(j.lock)
+                    if self.manifest is not None:
+                        self.manifest.finished(name, rc)
+                    if rc == 0:
+                        self.status[name] = "done"
+                        print(f"[done]  {name}", flush=True)
+                    else:
+                        self.status[name] = "failed"
+                        self._cancel_dependants(name)
+                        print(f"[fail]  {name} (exit {rc}, see {log.name})", flush=True)
+        finally:
+            for proc, log in running.values():
+                try:
+                    os.killpg(proc.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+                log.close()
+            if self.manifest is not None and running:
+                self.manifest.interrupted(running)
+        return self.status
+
+
+def parse_job_resources(values: List[str]) -> Dict[str, Tuple[int, float]]:
+    """ KIND=CPUS:GB overrides of JOB_RESOURCES"""
+    res = dict(JOB_RESOURCES)
+    for v in values:
+        kind, _, spec = v.partition("=")
+        if kind not in res:
+            raise ValueError(f"Unknown job kind {kind}; expected one of {', '.join(res)}")
+        cpus, _, gb = spec.partition(":")
+        res[kind] = (int(cpus), float(gb) if gb else res[kind][1])
+    return res
+
+
+def total_mem_gb() -> float:
+    with open("/proc/meminfo") as fh:
+        for line in fh:
+            if line.startswith("MemTotal:"):
+                return int(line.split()[1]) / 1024 ** 2
+    return 64.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the benchmark matrix as a DAG under CPU/RAM budgets.")
+    ap.add_argument("--cpus", type=int, default=16, help="Cores available to jobs")
+    ap.add_argument("--mem_gb", type=float, default=None, help="RAM available to jobs (default: 90%% of MemTotal)")
+    ap.add_argument("--tools", nargs="+", default=TOOLS, choices=TOOLS)
+    ap.add_argument("--species", nargs="+", default=None, help="Default: every folder in species/benchmark_species")
+    ap.add_argument("--mut_rates", nargs="+", default=MUT_RATES)
+    ap.add_argument("--hints", nargs="+", default=HINTS, choices=HINTS)
+    ap.add_argument("--job_resources", nargs="+", default=[], metavar="KIND=CPUS:GB",
+                    help="Override the declared cores/RAM of a job kind, e.g. gemoma=8:32")
+    ap.add_argument("--shard_jobs", type=int, default=1,
+                    help="Run AUGUSTUS and SNAP on this many overlapping genome chunks in parallel (shard_predict.py)")
+    ap.add_argument("--dry_run", action="store_true", help="Print the jobs and their dependencies only")
+    ap.add_argument("--plan", action="store_true",
+                    help="Print the predicted schedule, makespan and peak memory (cost_model.py) without running")
+    ap.add_argument("--cost_model", action="store_true",
+                    help="Order jobs by predicted remaining time and declare their predicted RAM")
+    ap.add_argument("--no_manifest", action="store_true",
+                    help="Do not track job states; skip jobs whose output file exists, as the run scripts do")
+    args = ap.parse_args()
+
+    if not os.environ.get("BENCHMARK_DIR"):
+        sys.exit("Error: BENCHMARK_DIR is not set. Please source the env.sh file first.")
+    bdir = Path(os.environ["BENCHMARK_DIR"])
+    ledger = Path(os.environ.get("BENCHMARK_LEDGER", bdir / "results" / "ledger.sqlite"))
+    species = args.species or sorted(p.name for p in (bdir / "species" / "benchmark_species").iterdir() if p.is_dir())
+    mem_gb = args.mem_gb if args.mem_gb is not None else 0.9 * total_mem_gb()
+
+    try:
+        resources = parse_job_resources(args.job_resources)
+    except ValueError as e:
+        ap.error(str(e))
+
+    jobs = MatrixBuilder(bdir, resources, ledger, args.shard_jobs).build(args.tools, species, args.mut_rates, args.hints)
+
+    prio = None
+    if args.plan or args.cost_model:
+        model, sizes = default_model(bdir, ledger)
+        costs = job_costs(jobs, model, sizes, args.shard_jobs)
+        for n, (_, gb) in costs.items():
+            if gb is not None:
+                jobs[n].mem_gb = round(max(gb * MEM_HEADROOM, 0.5), 1)
+        prio = _priorities(jobs, {n: c[0] for n, c in costs.items()})
+
+    if args.plan:
+        sched, makespan, peak = simulate(jobs, costs, args.cpus, mem_gb, prio)
+        sys.stdout.write("job\tcores\tmem_gb\tpred_sec\tpred_rss_gb\tstart_sec\tend_sec\n")
+        for n in sorted(sched, key=lambda n: sched[n]):
+            j, (sec, gb) = jobs[n], costs[n]
+            start, end = sched[n]
+            state = f"{start:.0f}\t{end:.0f}" if end > start else "done\tdone"
+            sys.stdout.write(f"{n}\t{j.cpus}\t{j.mem_gb:g}\t{sec:.0f}\t{'' if gb is None else f'{gb:.2f}'}\t{state}\n")
+        fitted = sum(1 for n, j in jobs.items() if j.kind in model.fits)
+        print(f"Predicted makespan {makespan / 3600:.2f} h, peak memory {peak:.1f} GB of {mem_gb:.1f} GB "
+              f"({fitted}/{len(jobs)} jobs with history)", file=sys.stderr)
+        return
+
+    if args.dry_run:
+        prio = prio or _priorities(jobs)
+        sys.stdout.write("job\tcores\tmem_gb\tpriority\tdeps\tcmd\n")
+        for j in jobs.values():
+            sys.stdout.write(f"{j.name}\t{j.cpus}\t{j.mem_gb:g}\t{prio[j.name]:g}\t{','.join(j.deps)}\t{j.cmd}\n")
+        return
+
+    manifest = None if args.no_manifest else Manifest(default_db())
+    try:
+        status = DagRunner(jobs, args.cpus, mem_gb, bdir / "results" / "scheduler" / "logs", manifest,
+                           prio=prio, ledger=ledger).run()
+    finally:
+        if manifest is not None:
+            manifest.close()
+    counts = {s: sum(1 for v in status.values() if v == s) for s in sorted(set(status.values()))}
+    print("Finished:", ", ".join(f"{n} {s}" for s, n in counts.items()))
+    sys.exit(1 if counts.get("failed") or counts.get("cancelled") else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Run a gene predictor on overlapping chunks of a genome in parallel and merge the predictions.
+
+Sequences longer than --chunk_size are cut into windows of --chunk_size bp that
+overlap by --overlap bp; shorter sequences are packed together into chunks of up
+to --chunk_size bp. Each chunk gets its own folder with chunk.fa, and the
+predictor command (with {input} replaced by the chunk FASTA) runs there, --jobs
+chunks at a time. Hint files given with --hints are split into the same folders,
+under the same name, with coordinates shifted to the chunk.
+
+The --result file of every chunk (GTF, SNAP GFF or GFF3) is mapped back to genome
+coordinates. Genes are grouped by gene_id, Parent/ID or their group column, and
+prefixed with their chunk so IDs stay unique. When genes predicted by two
+neighbouring windows overlap on the same strand, the copy further from its
+window edge is kept, since a gene cut by a window edge is complete in the
+neighbouring window as long as --overlap exceeds the gene length. The merged
+prediction keeps the predictor's format, so the normal formatting and
+evaluation stages take it as is.
+
+Usage:
+    shard_predict.py --fasta input.fa --result augustus.gtf --out merged.gtf [--jobs N]
+                     [--chunk_size 5000000] [--overlap 200000] [--hints hints.gff ...] -- COMMAND
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from compressed_io import open_text
+from fasta_index import FastaIndex, read_lengths, write_fasta
+
+LINE_WIDTH = 60
+SEP = "__shard"
+
+GTF_ID = re.compile(r'((?:gene_id|transcript_id) ")([^"]+)(")')
+GFF3_ID = re.compile(r"((?:^|;)\s*(?:ID|Parent)=)([^;]+)")
+GENE_ID = re.compile(r'gene_id "([^"]+)"')
+AUGUSTUS_TX = re.compile(r"^(.+)\.t\d+$")
+
+
+@dataclass
+class Window:
+    seq: str
+    start: int
+    end: int
+    seq_len: int
+
+    @property
+    def record(self) -> str:
+        return f"{self.seq}{SEP}{self.start}"
+
+
+@dataclass
+class Gene:
+    seq: str
+    strand: str
+    start: int
+    end: int
+    chunk: int
+    window: Window
+    lines: List[List[str]] = field(default_factory=list)
+
+    @property
+    def centrality(self) -> float:
+        """ Distance to the nearest window edge that is not a sequence end"""
+        left = self.start - 1 - self.window.start if self.window.start > 0 else float("inf")
+        right = self.window.end - self.end if self.window.end < self.window.seq_len else float("inf")
+        return min(left, right)
+
+
+def plan_chunks(lengths: List[Tuple[str, int]], chunk_size: int, overlap: int) -> List[List[Window]]:
+    """ Windows of each chunk, in genome order"""
+    step = chunk_size - overlap
+    chunks, small, small_bp = [], [], 0
+    for name, length in lengths:
+        if length <= chunk_size:
+            if small and small_bp + length > chunk_size:
+                chunks.append(small)
+                small, small_bp = [], 0
+            small.append(Window(name, 0, length, length))
+            small_bp += length
+            continue
+        if small:
+            chunks.append(small)
+            small, small_bp = [], 0
+        start = 0
+        while True:
+            end = min(start + chunk_size, length)
+            chunks.append([Window(name, start, end, length)])
+            if end == length:
+                break
+            start += step
+    if small:
+        chunks.append(small)
+    return chunks
+
+
+def write_chunks(fasta: Path, chunks: List[List[Window]], work_dir: Path) -> List[Path]:
+    """ chunk_<i>/chunk.fa for every chunk, reading only its windows from the indexed genome"""
+    dirs = [work_dir / f"chunk_{i}" for i in range(len(chunks))]
+    with FastaIndex(fasta) as idx:
+        for d, windows in zip(dirs, chunks):
+            d.mkdir(parents=True, exist_ok=True)
+            with open(d / "chunk.fa", "w") as out:
+                for w, seq in zip(windows, idx.fetch_many([(w.seq, w.start, w.end) for w in windows])):
+                    write_fasta(out, w.record, seq, LINE_WIDTH)
+    return dirs
+
+
+def split_hints(hints: Path, chunks: List[List[Window]], dirs: List[Path]) -> None:
+    """ Copy of the hints file in every chunk folder, with the features inside the chunk"""
+    by_seq: Dict[str, List[Tuple[int, Window]]] = {}
+    for i, windows in enumerate(chunks):
+        for w in windows:
+            by_seq.setdefault(w.seq, []).append((i, w))
+
+    outs = [open(d / hints.name, "w") for d in dirs]
+    try:
+        with open_text(hints) as fh:
+            for line in fh:
+                f = line.rstrip("\n").split("\t")
+                if line.startswith("#") or len(f) < 9:
+                    continue
+                start, end = int(f[3]), int(f[4])
+                for i, w in by_seq.get(f[0], []):
+                    if start > w.start and end <= w.end:
+                        outs[i].write("\t".join([w.record, *f[1:3], str(start - w.start), str(end - w.start),
+                                                 *f[5:]]) + "\n")
+    finally:
+        for o in outs:
+            o.close()
+
+
+def run_chunks(command: str, dirs: List[Path], jobs: int) -> List[int]:
+    """ Run the predictor in every chunk folder, `jobs` at a time; returns the exit codes"""
+    def run(d: Path) -> int:
+        cmd = command.replace("{input}", str((d / "chunk.fa").resolve()))
+        with open(d / "chunk.log", "w") as log:
+            return subprocess.run(["bash", "-c", cmd], cwd=d, stdout=log, stderr=subprocess.STDOUT).returncode
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(run, dirs))
+
+
+def _rename(attr: str, record: str, seq: str, prefix: str) -> str:
+    """ Attributes with the chunk record name replaced and every ID prefixed by the chunk"""
+    attr = attr.replace(record, seq)
+    if GTF_ID.search(attr):
+        return GTF_ID.sub(lambda m: m.group(1) + prefix + m.group(2) + m.group(3), attr)
+    if GFF3_ID.search(attr):
+        return GFF3_ID.sub(lambda m: m.group(1) + ",".join(prefix + v for v in m.group(2).split(",")), attr)
+    return prefix + attr.strip() if attr.strip() else attr
+
+
+def read_genes(result: Path, chunk: int, windows: Dict[str, Window]) -> Tuple[List[Gene], bool]:
+    """ Genes of one chunk in genome coordinates; also whether the file was GFF3"""
+    rows, gff3 = [], False
+    with open_text(result) as fh:
+        for line in fh:
+            if line.startswith("##gff-version 3"):
+                gff3 = True
+            f = line.rstrip("\n").split("\t")
+            if line.startswith("#") or len(f) < 9 or f[0] not in windows:
+                continue
+            rows.append(f)
+
+    # group key of every row: gene_id, the root of the ID/Parent tree, or the group column
+    parents, keys = {}, []
+    for f in rows:
+        attr = f[8]
+        m = GENE_ID.search(attr)
+        if m:
+            keys.append(m.group(1))
+            continue
+        kv = dict(p.strip().split("=", 1) for p in attr.split(";") if "=" in p)
+        if "ID" in kv or "Parent" in kv:
+            if "ID" in kv and "Parent" in kv:
+                parents[kv["ID"]] = kv["Parent"].split(",")[0]
+            keys.append(kv.get("ID") or kv["Parent"].split(",")[0])
+        else:
+            keys.append(attr.strip())
+    plain = set(keys)
+
+    def root(k: str) -> str:
+        seen = set()
+        while k in parents and k not in seen:
+            seen.add(k)
+            k = parents[k]
+        m = AUGUSTUS_TX.match(k)  # AUGUSTUS transcript lines only carry "g1.t1"
+        return m.group(1) if m and m.group(1) in plain else k
+
+    genes: Dict[str, Gene] = {}
+    prefix = f"c{chunk}_"
+    for f, k in zip(rows, keys):
+        w = windows[f[0]]
+        start, end = int(f[3]) + w.start, int(f[4]) + w.start
+        g = genes.get(root(k))
+        if g is None:
+            g = genes[root(k)] = Gene(w.seq, f[6], start, end, chunk, w)
+        g.start, g.end = min(g.start, start), max(g.end, end)
+        g.lines.append([w.seq, f[1], f[2], str(start), str(end), *f[5:8], _rename(f[8], f[0], w.seq, prefix)])
+    return list(genes.values()), gff3
+
+
+def resolve_overlaps(genes: List[Gene], chunks: List[List[Window]]) -> List[Gene]:
+    """ Drop the less central copy of genes predicted twice in the overlap of neighbouring windows"""
+    by_window: Dict[Tuple[str, int], List[Gene]] = {}
+    for g in genes:
+        by_window.setdefault((g.seq, g.window.start), []).append(g)
+
+    windows_of_seq: Dict[str, List[Window]] = {}
+    for windows in chunks:
+        for w in windows:
+            windows_of_seq.setdefault(w.seq, []).append(w)
+
+    dropped = set()
+    for seq, windows in windows_of_seq.items():
+        windows.sort(key=lambda w: w.start)
+        for a_win, b_win in zip(windows, windows[1:]):
+            if a_win.end <= b_win.start:
+                continue
+            left = [g for g in by_window.get((seq, a_win.start), []) if g.end > b_win.start]
+            right = [g for g in by_window.get((seq, b_win.start), []) if g.start <= a_win.end]
+            for a in left:
+                for b in right:
+                    if a.strand == b.strand and a.start <= b.end and b.start <= a.end:
+                        dropped.add(id(a) if a.centrality < b.centrality else id(b))
+    return [g for g in genes if id(g) not in dropped]
+
+
+def merge(dirs: List[Path], chunks: List[List[Window]], result: str, order: List[str], out: Path) -> int:
+    """ Merged prediction of all chunks written to `out`; returns the number of genes"""
+    genes, gff3 = [], False
+    for i, (d, windows) in enumerate(zip(dirs, chunks)):
+        chunk_genes, chunk_gff3 = read_genes(d / result, i, {w.record: w for w in windows})
+        genes.extend(chunk_genes)
+        gff3 = gff3 or chunk_gff3
+    genes = resolve_overlaps(genes, chunks)
+
+    rank = {name: i for i, name in enumerate(order)}
+    genes.sort(key=lambda g: (rank[g.seq], g.start, g.end))
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as fh:
+        if gff3:
+            fh.write("##gff-version 3\n")
+        for g in genes:
+            fh.write("".join("\t".join(line) + "\n" for line in g.lines))
+    os.replace(tmp, out)
+    return len(genes)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a gene predictor on overlapping genome chunks in parallel.")
+    ap.add_argument("--fasta", type=Path, required=True)
+    ap.add_argument("--result", required=True, help="Prediction file written by the command in each chunk folder")
+    ap.add_argument("--out", type=Path, required=True, help="Merged prediction")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunk_size", type=int, default=5_000_000)
+    ap.add_argument("--overlap", type=int, default=200_000)
+    ap.add_argument("--hints", type=Path, nargs="+", default=[], help="GFF hint files to split per chunk")
+    ap.add_argument("--work_dir", type=Path, default=None, help="Default: <out>.shards")
+    ap.add_argument("--keep", action="store_true", help="Keep the chunk folders")
+    ap.add_argument("command", nargs=argparse.REMAINDER, help="Predictor command; {input} is the chunk FASTA")
+    args = ap.parse_args()
+
+    command = " ".join(args.command[1:] if args.command[:1] == ["--"] else args.command)
+    if "{input}" not in command:
+        ap.error("the command must contain {input}")
+    if not 0 <= args.overlap < args.chunk_size:
+        ap.error("--overlap must be smaller than --chunk_size")
+
+    lengths = read_lengths(args.fasta)
+    chunks = plan_chunks(lengths, args.chunk_size, args.overlap)
+    work_dir = args.work_dir or args.out.with_name(args.out.name + ".shards")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    dirs = write_chunks(args.fasta, chunks, work_dir)
+    for h in args.hints:
+        split_hints(h, chunks, dirs)
+
+    print(f"Running {len(chunks)} chunks, {args.jobs} at a time...", file=sys.stderr)
+    codes = run_chunks(command, dirs, args.jobs)
+    failed = [str(d / "chunk.log") for d, rc in zip(dirs, codes) if rc != 0 or not (d / args.result).is_file()]
+    if failed:
+        sys.exit(f"Error: {len(failed)} chunks failed, see {', '.join(failed[:5])}")
+
+    n = merge(dirs, chunks, args.result, [name for name, _ in lengths], args.out)
+    print(f"Merged {n} genes into {args.out}", file=sys.stderr)
+    if not args.keep:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
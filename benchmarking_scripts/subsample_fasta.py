@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Build nested subsamples of a genome FASTA for input-size scaling runs.
+
+The genome is cut into regions of --region_size bp (0 keeps whole sequences),
+the regions are shuffled with --seed and each fraction takes the shortest
+prefix of that order covering at least that share of the genome, so every
+subsample contains all the smaller ones. Regions are written as records named
+"<sequence>:<start>-<end>" (1-based, inclusive) to <out_dir>/subsample_<pct>.fa,
+and a TSV with the size of each subsample (and of the genome) is printed to stdout.
+
+Usage:
+    subsample_fasta.py genome.fa out_dir [--fractions 0.1 0.25 0.5 1.0] [--region_size BP] [--seed N]
+"""
+
+import argparse
+import random
+import sys
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from fasta_index import read_lengths
+
+LINE_WIDTH = 60
+
+
+def make_regions(lengths: List[Tuple[str, int]], region_size: int) -> List[Tuple[str, int, int]]:
+    """ (name, start, end) half-open regions tiling every sequence"""
+    regions = []
+    for name, length in lengths:
+        step = region_size if region_size > 0 else length
+        for start in range(0, length, step):
+            regions.append((name, start, min(start + step, length)))
+    return regions
+
+
+def assign_regions(regions: List[Tuple[str, int, int]], fractions: List[float],
+                   seed: int) -> Dict[Tuple[str, int, int], float]:
+    """ Smallest fraction each region belongs to; larger subsamples include it too"""
+    order = regions[:]
+    random.Random(seed).shuffle(order)
+    total = sum(e - s for _, s, e in regions)
+
+    smallest, covered, i = {}, 0, 0
+    for frac in sorted(fractions):
+        while i < len(order) and covered < frac * total:
+            _, s, e = order[i]
+            smallest[order[i]] = frac
+            covered += e - s
+            i += 1
+    return smallest
+
+
+def iter_blocks(fasta: Path, lengths: List[Tuple[str, int]], region_size: int) -> Iterator[Tuple[str, int, int, str]]:
+    """ Stream (name, start, end, sequence) blocks matching make_regions without loading whole sequences"""
+    sizes = dict(lengths)
+    name, start, buf, buf_len = None, 0, [], 0
+
+    def step():
+        return region_size if region_size > 0 else sizes[name]
+
+    with open(fasta) as fh:
+        for line in fh:
+            if line.startswith(">"):
+                if name is not None and buf_len:
+                    yield name, start, start + buf_len, "".join(buf)
+                name, start, buf, buf_len = line[1:].split()[0], 0, [], 0
+                continue
+            seq = line.strip()
+            while seq:
+                take = step() - buf_len
+                buf.append(seq[:take])
+                buf_len += len(seq[:take])
+                seq = seq[take:]
+                if buf_len == step():
+                    yield name, start, start + buf_len, "".join(buf)
+                    start, buf, buf_len = start + buf_len, [], 0
+    if name is not None and buf_len:
+        yield name, start, start + buf_len, "".join(buf)
+
+
+def write_subsamples(fasta: Path, out_dir: Path, fractions: List[float], region_size: int,
+                     seed: int) -> Tuple[Dict[float, int], int]:
+    """ Write one FASTA per fraction; returns the bp in each and the bp of the whole genome"""
+    lengths = read_lengths(fasta)
+    smallest = assign_regions(make_regions(lengths, region_size), fractions, seed)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    handles = {f: open(out_dir / f"subsample_{round(f * 100)}.fa", "w") for f in fractions}
+    sizes = {f: 0 for f in fractions}
+    try:
+        for name, start, end, seq in iter_blocks(fasta, lengths, region_size):
+            first = smallest.get((name, start, end))
+            if first is None:
+                continue
+            record = f">{name}:{start + 1}-{end}\n" + \
+                     "".join(seq[i:i + LINE_WIDTH] + "\n" for i in range(0, len(seq), LINE_WIDTH))
+            for f, fh in handles.items():
+                if f >= first:
+                    fh.write(record)
+                    sizes[f] += end - start
+    finally:
+        for fh in handles.values():
+            fh.close()
+    return sizes, sum(length for _, length in lengths)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write nested random subsamples of a genome FASTA.")
+    ap.add_argument("fasta", type=Path)
+    ap.add_argument("out_dir", type=Path)
+    ap.add_argument("--fractions", type=float, nargs="+", default=[0.1, 0.25, 0.5, 1.0])
+    ap.add_argument("--region_size", type=int, default=1_000_000,
+                    help="Region length in bp (0 samples whole sequences)")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    if any(not 0 < f <= 1 for f in args.fractions):
+        ap.error("fractions must be in (0, 1]")
+
+    sizes, genome_bp = write_subsamples(args.fasta, args.out_dir, args.fractions, args.region_size, args.seed)
+    sys.stdout.write("fraction\tfile\tinput_bp\tgenome_bp\n")
+    for f in sorted(sizes):
+        sys.stdout.write(f"{f}\t{args.out_dir / f'subsample_{round(f * 100)}.fa'}\t{sizes[f]}\t{genome_bp}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Evaluate many predictions against one reference annotation in a single process.
+
+The reference genes are parsed once into a sorted interval index (merged
+intervals per sequence and strand, with cumulative lengths), which the worker
+processes inherit; each prediction is then scored with interval arithmetic
+instead of per-nucleotide sets. The gene_nucleotide row is the one written by
+obtain_metrics (a nucleotide is a (sequence, position, strand) triple, and
+strands other than '+' count as one); gene_nucleotide_unstranded counts the
+same overlap regardless of strand, from the per-strand merged intervals folded
+per sequence, so a locus predicted on the wrong strand shows up as the
+difference between the two rows. For the AUCs, the nucleotides of every
+predicted gene carry the gene's score; ties are resolved per distinct score,
+giving one ROC/PRC point per threshold.
+
+Predictions are given on the command line or in a manifest: a tab-separated
+file with a header, a `prediction` column, an optional `auc` column (1 to also
+compute the AUCs) and any other columns, which are copied to the output rows.
+
+Outputs (at least one):
+    --output FILE     one table: manifest columns (or `name`) + label,tp,fp,fn,sensitivity,specificity
+                      (a gene_nucleotide and a gene_nucleotide_unstranded row per prediction)
+    --auc_table FILE  manifest columns + auc_roc,auc_prc, for the predictions with AUCs
+    --gene_table FILE manifest columns + gene-level matching rows (gene_match.py), one per --overlap
+    --per_file DIR    <stem>.csv (and <stem>_auc/_roc/_prc.csv, <stem>_genes.csv) per prediction, like obtain_metrics
+
+With --tracks DIR, the gene_nucleotide TP/FP/FN are also counted per --bin_size
+bases along every sequence (both strands summed) and saved as <stem>_tracks.npz:
+`counts` (uint32, bins x [tp, fp, fn]), `seqids`, `offsets` (first bin of each
+sequence in `counts`) and `bin_size`. The bins come from one sweep over the
+merged intervals: +1/-1 difference arrays at the interval bounds, with the bin
+edges as extra breakpoints, are accumulated and the segment lengths summed per
+bin, so the cost grows with the number of intervals and bins, not of bases.
+
+Usage:
+    batch_evaluate.py REFERENCE.gff3 PRED.gff3 ... --output metrics.csv [--auc] [--jobs N]
+    batch_evaluate.py REFERENCE.gff3 --manifest predictions.tsv --per_file DIR [--compress gz|bgz|zst]
+                      [--tracks DIR] [--bin_size 100000]
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarking_scripts"))
+from compressed_io import open_text, strip_compression
+from gene_match import GENE_COLUMNS, Key, format_row, match_genes, read_genes
+
+METRIC_COLUMNS = ["label", "tp", "fp", "fn", "sensitivity", "specificity"]
+NUCLEOTIDE_LABELS = ["gene_nucleotide", "gene_nucleotide_unstranded"]
+
+def merge_intervals(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Union of half-open intervals, as sorted disjoint intervals"""
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    s, e = starts[order], ends[order]
+    reach = np.maximum.accumulate(e)
+    first = np.concatenate(([0], np.flatnonzero(s[1:] > reach[:-1]) + 1))
+    return s[first], np.maximum.reduceat(e, first)
+
+
+def fold_strands(intervals: Dict[Key, Tuple[np.ndarray, np.ndarray]]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """ Merged intervals per sequence from merged intervals per sequence and strand"""
+    by_seqid: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+    for (seqid, _), se in intervals.items():
+        by_seqid.setdefault(seqid, []).append(se)
+    return {seqid: merge_intervals(np.concatenate([s for s, _ in parts]), np.concatenate([e for _, e in parts]))
+            if len(parts) > 1 else parts[0] for seqid, parts in by_seqid.items()}
+
+
+class ReferenceIndex:
+    """ Sorted disjoint reference intervals per key, with prefix sums of their lengths"""
+
+    def __init__(self, merged: Dict):
+        self.intervals: Dict = {}
+        self.total = 0
+        for key, (s, e) in merged.items():
+            cum = np.concatenate(([0], np.cumsum(e - s)))
+            self.intervals[key] = (s, e, cum)
+            self.total += int(cum[-1])
+
+    def unstranded(self) -> "ReferenceIndex":
+        """ The same genes, keyed by sequence only"""
+        return ReferenceIndex(fold_strands({k: (s, e) for k, (s, e, _) in self.intervals.items()}))
+
+    def _before(self, key, x: np.ndarray) -> np.ndarray:
+        """ Reference bases of `key` left of each position in `x`"""
+        s, e, cum = self.intervals[key]
+        i = np.searchsorted(s, x, side="right") - 1
+        j = np.maximum(i, 0)
+        inside = np.clip(x - s[j], 0, e[j] - s[j])
+        return np.where(i >= 0, cum[j] + inside, 0)
+
+    def covered(self, key, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """ Reference bases inside each half-open interval [start, end) of `key`"""
+        if key not in self.intervals:
+            return np.zeros(len(starts), dtype=np.int64)
+        return self._before(key, ends) - self._before(key, starts)
+
+
+def overlap_counts(ref: ReferenceIndex, merged: Dict) -> Tuple[int, int, int]:
+    """ (TP, FP, FN) nucleotides of merged predicted intervals"""
+    tp = predicted = 0
+    for key, (s, e) in merged.items():
+        predicted += int((e - s).sum())
+        tp += int(ref.covered(key, s, e).sum())
+    return tp, predicted - tp, ref.total - tp
+
+
+def gene_nucleotide(ref: ReferenceIndex, ref_unstranded: ReferenceIndex, genes,
+                    bin_size: Optional[int] = None) -> Tuple[List[Tuple[int, int, int]], Optional[Dict]]:
+    """ Strand-aware and strand-agnostic (TP, FP, FN) of the predicted genes, from one merge, and their tracks"""
+    merged = {key: merge_intervals(starts, ends) for key, (starts, ends, _) in genes.items()}
+    tracks = binned_tracks(ref, merged, bin_size) if bin_size else None
+    return [overlap_counts(ref, merged), overlap_counts(ref_unstranded, fold_strands(merged))], tracks
+
+
+def binned_tracks(ref: ReferenceIndex, merged: Dict, bin_size: int) -> Dict[str, np.ndarray]:
+    """ (TP, FP, FN) nucleotides per bin of `bin_size` bases along each sequence, both strands summed"""
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    tracks: Dict[str, np.ndarray] = {}
+    for key in set(ref.intervals) | set(merged):
+        rs, re = ref.intervals[key][:2] if key in ref.intervals else empty
+        ps, pe = merged.get(key, empty)
+        end = int(max(re[-1] if len(re) else 0, pe[-1] if len(pe) else 0))
+        n_bins = -(-end // bin_size)
+        edges = np.arange(bin_size, end, bin_size, dtype=np.int64)
+        # difference arrays: +1 at the starts and -1 at the ends of the prediction and of the reference,
+        # with the bin edges as extra breakpoints so that every segment between two events lies in one bin
+        pos = np.concatenate((ps, pe, rs, re, edges))
+        zeros = np.zeros(len(rs) + len(re) + len(edges), dtype=np.int64)
+        d_pred = np.concatenate((np.ones(len(ps), dtype=np.int64), -np.ones(len(pe), dtype=np.int64), zeros))
+        d_ref = np.concatenate((np.zeros(len(ps) + len(pe), dtype=np.int64), np.ones(len(rs), dtype=np.int64),
+                                -np.ones(len(re), dtype=np.int64), np.zeros(len(edges), dtype=np.int64)))
+        order = np.argsort(pos, kind="stable")
+        pos = pos[order]
+        in_pred = np.cumsum(d_pred[order])[:-1] > 0
+        in_ref = np.cumsum(d_ref[order])[:-1] > 0
+        length = np.diff(pos)
+        bins = pos[:-1] // bin_size
+        counts = np.column_stack([np.bincount(bins, weights=length * mask, minlength=n_bins)
+                                  for mask in (in_pred & in_ref, in_pred & ~in_ref, ~in_pred & in_ref)])
+        counts = counts.astype(np.int64)
+        prev = tracks.get(key[0])
+        if prev is not None:
+            if len(prev) < len(counts):
+                prev, counts = counts, prev
+            prev[:len(counts)] += counts
+            counts = prev
+        tracks[key[0]] = counts
+    return tracks
+
+
+def save_tracks(path: Path, tracks: Dict[str, np.ndarray], bin_size: int) -> None:
+    """ Tracks as one uint32 (bins x [tp, fp, fn]) array with per-sequence offsets, in a compressed .npz"""
+    seqids = sorted(tracks)
+    sizes = [len(tracks[s]) for s in seqids]
+    counts = np.concatenate([tracks[s] for s in seqids]) if seqids else np.empty((0, 3), dtype=np.int64)
+    np.savez_compressed(path, bin_size=np.int64(bin_size), seqids=np.array(seqids, dtype=str),
+                        offsets=np.concatenate(([0], np.cumsum(sizes))).astype(np.int64),
+                        counts=counts.astype(np.uint32))
+
+
+def auc_curves(ref: ReferenceIndex, genes) -> Tuple[float, float, np.ndarray, np.ndarray]:
+    """ AUC-ROC, AUC-PRC and the (FPR, TPR) and (recall, precision) points, one per distinct score"""
+    scores, pos, neg = [], [], []
+    for key, (starts, ends, sc) in genes.items():
+        p = ref.covered(key, starts, ends)
+        scores.append(sc)
+        pos.append(p)
+        neg.append(ends - starts - p)
+    if not scores or sum(len(s) for s in scores) == 0:
+        return 0.0, 0.0, np.empty((0, 2)), np.empty((0, 2))
+
+    uniq, inv = np.unique(np.concatenate(scores), return_inverse=True)
+    tp = np.cumsum(np.bincount(inv, weights=np.concatenate(pos), minlength=len(uniq))[::-1])
+    fp = np.cumsum(np.bincount(inv, weights=np.concatenate(neg), minlength=len(uniq))[::-1])
+    tpr = tp / tp[-1] if tp[-1] > 0 else np.zeros_like(tp)
+    fpr = fp / fp[-1] if fp[-1] > 0 else np.zeros_like(fp)
+    precision = np.where(tp + fp > 0, tp / np.maximum(tp + fp, 1), 1.0)
+
+    d_fpr = np.diff(fpr, prepend=0.0)
+    d_tpr = np.diff(tpr, prepend=0.0)
+    auc_roc = float(np.sum(d_fpr * (tpr + (tpr - d_tpr)) / 2.0))
+    auc_prc = float(np.sum(d_tpr * precision))
+    return auc_roc, auc_prc, np.column_stack((fpr, tpr)), np.column_stack((tpr, precision))
+
+
+def write_csv(path: Path, header: str, rows: List[str]) -> None:
+    with open_text(path, "w") as out:
+        out.write(header + "\n")
+        for row in rows:
+            out.write(row + "\n")
+
+
+def per_file_outputs(out_dir: Path, stem: str, suffix: str, rows: List[str], auc=None) -> None:
+    """ The files obtain_metrics writes for one prediction"""
+    write_csv(out_dir / f"{stem}.csv{suffix}", ",".join(METRIC_COLUMNS), rows)
+    if auc is not None:
+        auc_roc, auc_prc, roc, prc = auc
+        write_csv(out_dir / f"{stem}_auc.csv{suffix}", "AUC_ROC,AUC_PRC", [f"{auc_roc:.4f},{auc_prc:.4f}"])
+        write_csv(out_dir / f"{stem}_roc.csv{suffix}", "FPR,TPR", [f"{a:.6f},{b:.6f}" for a, b in roc])
+        write_csv(out_dir / f"{stem}_prc.csv{suffix}", "Recall,Precision", [f"{a:.6f},{b:.6f}" for a, b in prc])
+
+
+# reference index and gene-matching settings, inherited by the worker processes
+_CTX: Dict = {}
+
+
+def _init_worker(ctx: Dict) -> None:
+    _CTX.update(ctx)
+
+
+def evaluate(job: Tuple[str, bool, Optional[str], str, bool]):
+    """ Metric rows, AUCs and gene-level rows of one prediction; runs in a worker process"""
+    path, want_auc, per_file, suffix, want_genes = job
+    try:
+        genes = read_genes(Path(path))
+    except (OSError, ValueError, IndexError, RuntimeError) as e:
+        return None, None, None, f"{path}: {e}"
+    ref = _CTX["ref"]
+    rows = []
+    counts, tracks = gene_nucleotide(ref, _CTX["ref_unstranded"], genes, _CTX["bin_size"] if _CTX["tracks"] else None)
+    for label, (tp, fp, fn) in zip(NUCLEOTIDE_LABELS, counts):
+        sens = 100.0 * tp / (tp + fn) if tp + fn else 0.0
+        spec = 100.0 * tp / (tp + fp) if tp + fp else 0.0
+        rows.append(f"{label},{tp},{fp},{fn},{sens:.2f},{spec:.2f}")
+
+    auc = auc_curves(ref, genes) if want_auc else None
+    gene_rows = ([format_row(r) for r in match_genes(_CTX["ref_genes"], genes, _CTX["overlap"], _CTX["part"])]
+                 if want_genes else None)
+    stem = Path(strip_compression(Path(path).name)).stem
+    if tracks is not None:
+        save_tracks(Path(_CTX["tracks"]) / f"{stem}_tracks.npz", tracks, _CTX["bin_size"])
+    if per_file:
+        per_file_outputs(Path(per_file), stem, suffix, rows, auc)
+        if gene_rows is not None:
+            write_csv(Path(per_file) / f"{stem}_genes.csv{suffix}", ",".join(GENE_COLUMNS), gene_rows)
+    return rows, (auc[0], auc[1]) if auc else None, gene_rows, None
+
+
+def read_manifest(path: Path) -> List[Dict[str, str]]:
+    with open(path, newline="") as fh:
+        rows = list(csv.DictReader(fh, delimiter="\t"))
+    if rows and "prediction" not in rows[0]:
+        raise ValueError(f"{path}: the header has no 'prediction' column")
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Evaluate many predictions against one reference annotation.")
+    ap.add_argument("reference", type=Path)
+    ap.add_argument("predictions", nargs="*", type=Path)
+    ap.add_argument("--manifest", type=Path, default=None, help="TSV with a 'prediction' column (and 'auc', metadata)")
+    ap.add_argument("--output", type=Path, default=None, help="Table with one metric row per prediction")
+    ap.add_argument("--auc_table", type=Path, default=None, help="Table with the AUCs of the predictions that have them")
+    ap.add_argument("--per_file", type=Path, default=None, help="Folder for obtain_metrics-style per-prediction CSVs")
+    ap.add_argument("--auc", action="store_true", help="Compute the AUCs of every prediction")
+    ap.add_argument("--gene_level", action="store_true", help="Also match gene models (<stem>_genes.csv with --per_file)")
+    ap.add_argument("--gene_table", type=Path, default=None, help="Table with the gene-level rows (implies --gene_level)")
+    ap.add_argument("--overlap", type=float, nargs="+", default=[0.5, 0.8], help="Gene-level reciprocal-overlap thresholds")
+    ap.add_argument("--part", type=float, default=0.5, help="Share of a gene inside another for splits/merges")
+    ap.add_argument("--tracks", type=Path, default=None, help="Folder for per-bin TP/FP/FN tracks (<stem>_tracks.npz)")
+    ap.add_argument("--bin_size", type=int, default=100_000, help="Bin size of the tracks, in bases")
+    ap.add_argument("--compress", choices=["gz", "bgz", "zst"], default=None, help="Compress the per-prediction CSVs")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    if args.output is None and args.auc_table is None and args.per_file is None and args.gene_table is None:
+        ap.error("give at least one of --output, --auc_table, --gene_table, --per_file")
+    gene_level = args.gene_level or args.gene_table is not None
+    try:
+        rows = read_manifest(args.manifest) if args.manifest else []
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    rows += [{"name": Path(strip_compression(p.name)).stem, "prediction": str(p)} for p in args.predictions]
+    if not rows:
+        ap.error("no predictions given")
+
+    try:
+        ref_genes = read_genes(args.reference)
+    except (OSError, ValueError, IndexError, RuntimeError) as e:
+        sys.exit(f"Error parsing reference: {e}")
+    ref = ReferenceIndex({k: merge_intervals(s, e) for k, (s, e, _) in ref_genes.items()})
+    ctx = dict(ref=ref, ref_unstranded=ref.unstranded(), overlap=args.overlap, part=args.part,
+               ref_genes=ref_genes if gene_level else None,
+               tracks=str(args.tracks) if args.tracks else None, bin_size=args.bin_size)
+    if args.per_file:
+        args.per_file.mkdir(parents=True, exist_ok=True)
+    if args.tracks:
+        if args.bin_size <= 0:
+            ap.error("--bin_size must be positive")
+        args.tracks.mkdir(parents=True, exist_ok=True)
+
+    suffix = f".{args.compress}" if args.compress else ""
+    jobs = [(r["prediction"], args.auc or r.get("auc", "").strip().lower() in ("1", "true", "yes"),
+             str(args.per_file) if args.per_file else None, suffix, gene_level) for r in rows]
+    meta = [c for c in rows[0] if c not in ("prediction", "auc")]
+
+    table, auc_table, gene_table, failed = [], [], [], 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(jobs))),
+                             initializer=_init_worker, initargs=(ctx,)) as pool:
+        for r, (metric_rows, auc, gene_rows, error) in zip(rows, pool.map(evaluate, jobs)):
+            if error:
+                failed += 1
+                print(f"Skipping (parse error): {error}", file=sys.stderr)
+                continue
+            values = ",".join(r.get(c, "") for c in meta)
+            table += [f"{values},{row}" if meta else row for row in metric_rows]
+            if auc:
+                auc_table.append((f"{values}," if meta else "") + f"{auc[0]:.4f},{auc[1]:.4f}")
+            if gene_rows:
+                gene_table += [f"{values},{row}" if meta else row for row in gene_rows]
+            print(f"Processed {r['prediction']}", flush=True)
+
+    if args.output:
+        write_csv(args.output, ",".join(meta + METRIC_COLUMNS), table)
+    if args.auc_table:
+        write_csv(args.auc_table, ",".join(meta + ["auc_roc", "auc_prc"]), auc_table)
+    if args.gene_table:
+        write_csv(args.gene_table, ",".join(meta + GENE_COLUMNS), gene_table)
+    if failed:
+        sys.exit(f"{failed} of {len(rows)} predictions could not be evaluated.")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,20 @@ FORMATTED_RESULTS="${COMPILED_RESULTS_DIR}/formatted"
 mkdir -p ${AGGREGATED_RESULTS}
 mkdir -p ${FORMATTED_RESULTS}
 
-OBTAIN_METRICS_BIN="${BENCHMARK_DIR}/metrics/obtain_metrics"
-OBTAIN_METRICS_SRC="${OBTAIN_METRICS_BIN}.cpp"
+# COMPRESS_RESULTS=gz|bgz|zst keeps aggregated predictions and metric CSVs compressed;
+# normalise_prediction.sh and the plots read them as they are
+COMPRESSED_IO="${BENCHMARK_DIR}/benchmarking_scripts/compressed_io.py"
+
+aggregate() {
+    local SRC="$1"
+    local DEST="$2"
+
+    if [ -n "$COMPRESS_RESULTS" ]; then
+        python3 "$COMPRESSED_IO" compress "$SRC" "${DEST}.${COMPRESS_RESULTS}"
+    else
+        cp "$SRC" "$DEST"
+    fi
+}
 
 getAugustusResults() {
     for SPECIES in ${RESULTS_TOOL_DIR}/augustus/*; do
@@ -41,7 +53,7 @@ getAugustusResults() {
 
                 TIME=$(echo "$TIME" | tr -d '[:space:]')
                 MEM=$(echo "$MEM" | tr -d '[:space:]')
-                cp "${HINTS_TYPE}/augustus.gtf" "${AGGREGATED_RESULTS}/augustus_${SPECIES_NAME}_${MR_NUMBER}_${HINTS_TYPE_NAME}_${TIME}_${MEM}.gtf"
+                aggregate "${HINTS_TYPE}/augustus.gtf" "${AGGREGATED_RESULTS}/augustus_${SPECIES_NAME}_${MR_NUMBER}_${HINTS_TYPE_NAME}_${TIME}_${MEM}.gtf"
             done
         done
     done
@@ -74,7 +86,7 @@ getGenemarkEPpResults() {
                 TIME=$(echo "$TIME" | tr -d '[:space:]')
                 MEM=$(echo "$MEM" | tr -d '[:space:]')
 
-                cp ${HINTS_TYPE}/genemark.gtf ${AGGREGATED_RESULTS}/genemarkep_${SPECIES_NAME}_${MR_NUMBER}_${HINTS_TYPE_NAME}_${TIME}_${MEM}.gtf
+                aggregate ${HINTS_TYPE}/genemark.gtf ${AGGREGATED_RESULTS}/genemarkep_${SPECIES_NAME}_${MR_NUMBER}_${HINTS_TYPE_NAME}_${TIME}_${MEM}.gtf
             done
         done
     done
@@ -102,7 +114,7 @@ getGenemarkESResults() {
             TIME=$(echo "$TIME" | tr -d '[:space:]')
             MEM=$(echo "$MEM" | tr -d '[:space:]')
 
-            cp ${MR}/genemark.gtf ${AGGREGATED_RESULTS}/genemarkes_${SPECIES_NAME}_${MR_NUMBER}_${TIME}_${MEM}.gtf
+            aggregate ${MR}/genemark.gtf ${AGGREGATED_RESULTS}/genemarkes_${SPECIES_NAME}_${MR_NUMBER}_${TIME}_${MEM}.gtf
         done
     done
 }
@@ -133,7 +145,7 @@ getGenemarkETPResults() {
                 TIME=$(echo "$TIME" | tr -d '[:space:]')
                 MEM=$(echo "$MEM" | tr -d '[:space:]')
 
-                cp ${HINTS_TYPE}/genemark.gtf ${AGGREGATED_RESULTS}/genemarketp_${SPECIES_NAME}_${MR_NUMBER}_${HINTS_TYPE_NAME}_${TIME}_${MEM}.gtf
+                aggregate ${HINTS_TYPE}/genemark.gtf ${AGGREGATED_RESULTS}/genemarketp_${SPECIES_NAME}_${MR_NUMBER}_${HINTS_TYPE_NAME}_${TIME}_${MEM}.gtf
             done
         done
     done
@@ -165,7 +177,7 @@ getGeMoMaResults() {
                 TIME=$(echo "$TIME" | tr -d '[:space:]')
                 MEM=$(echo "$MEM" | tr -d '[:space:]')
 
-                cp ${HINTS_TYPE}/final_annotation.gff ${AGGREGATED_RESULTS}/gemoma_${SPECIES_NAME}_${MR_NUMBER}_${HINTS_TYPE_NAME}_${TIME}_${MEM}.gff
+                aggregate ${HINTS_TYPE}/final_annotation.gff ${AGGREGATED_RESULTS}/gemoma_${SPECIES_NAME}_${MR_NUMBER}_${HINTS_TYPE_NAME}_${TIME}_${MEM}.gff
             done
         done
     done
@@ -200,60 +212,18 @@ getSNAPResults() {
                 TIME=$(echo "$TIME" | tr -d '[:space:]')
                 MEM=$(echo "$MEM" | tr -d '[:space:]')
 
-                cp ${MR}/output.gff ${AGGREGATED_RESULTS}/snap_${SPECIES_NAME}_${MR_NUMBER}_${REFERENCE_TYPE_SPECIES}_${TIME}_${MEM}.gff
+                aggregate ${MR}/output.gff ${AGGREGATED_RESULTS}/snap_${SPECIES_NAME}_${MR_NUMBER}_${REFERENCE_TYPE_SPECIES}_${TIME}_${MEM}.gff
 
             done
         done
     done
 }
 
-convert_and_merge() {
-    local BASENAME="$1"
-    local MODE="$2"
-
-    merged_gff3="merged.gff3"
-    > "$merged_gff3"
-    echo "##gff-version 3" >> "$merged_gff3"
-
-    echo "Merging cleaned files for $BASENAME ($MODE mode)..."
-
-    for file in ${AGGREGATED_RESULTS}/${BASENAME}_cleaned_*; do
-        if [[ -f "$file" ]]; then
-            echo "Processing $file"
-
-            case "$MODE" in
-                "snap")
-                    SNAP_ExonEtermEinitEsngl_gff_to_gff3.pl "$file" > "snap.gff3"
-                    agat_convert_sp_gxf2gxf.pl -g "snap.gff3" -o "temp.gff3"
-                    ;;
-                *)
-                    agat_convert_sp_gxf2gxf.pl -g "$file" -o "temp.gff3"
-                    ;;
-            esac
-
-            gt gff3 -sort -tidy -o "temp_sorted.gff3" "temp.gff3"
-            tail -n +2 "temp_sorted.gff3" >> "$merged_gff3"
-
-            rm "$file" temp.gff3 temp_sorted.gff3
-            [ "$MODE" = "snap" ] && rm -f snap.gff3
-        fi
-    done
-
-    echo "Final sorting and ID assignment for $BASENAME"
-    gt gff3 -force -tidy -sort -addids -o "${FORMATTED_RESULTS}/${BASENAME}.gff3" "$merged_gff3"
-    rm "$merged_gff3"
-    rm -f ${FORMATTED_RESULTS}/*.log *.log
-}
-
 process_file() {
     local FILE="$1"
     local MODE="$2"
-    local EXT="${FILE##*.}"
-    local BASENAME=$(basename "$FILE" ."$EXT")
 
-    echo "Processing $BASENAME with mode: $MODE"
-    python3 ${BENCHMARK_DIR}/metrics/modify_output.py "$FILE"
-    convert_and_merge "$BASENAME" "$MODE"
+    BENCHMARK_DIR="$BENCHMARK_DIR" ${BENCHMARK_DIR}/metrics/normalise_prediction.sh "$FILE" "$MODE"
 }
 
 # 1a fase -----------------------------------------------
@@ -299,12 +269,24 @@ echo "Finished formatting all annotations."
 
 mkdir -p ${COMPILED_RESULTS_DIR}
 
+# one batch_evaluate.py process per reference: the species annotation is indexed once
+# and its predictions are evaluated by a pool of workers
+BATCH_EVALUATE="${BENCHMARK_DIR}/metrics/batch_evaluate.py"
+EVAL_JOBS="${EVAL_JOBS:-20}"
+
+TMP_DIR="./tmp_metrics"
+rm -rf "$TMP_DIR"
+mkdir -p "$TMP_DIR/formatted" "$TMP_DIR/geanno"
+
 for FILE in ${FORMATTED_RESULTS}/*; do
     FILE_NAME=$(basename "$FILE")
-    PRINT_AUC=""
+    AUC=0
+
+    # left over by an interrupted normalise_prediction.sh
+    [[ "$FILE_NAME" == *.partial ]] && continue
 
     if [[ "$FILE_NAME" == augustus_* ]]; then
-        PRINT_AUC="--print_auc"
+        AUC=1
     fi
 
     SPECIES_NAME=$(echo "$FILE_NAME" | cut -d'_' -f2,3)
@@ -321,36 +303,34 @@ for FILE in ${FORMATTED_RESULTS}/*; do
         continue
     fi
     
-    if [ -f "${COMPILED_RESULTS_DIR}/${FILE_NAME%.*}.csv" ]; then
+    if compgen -G "${COMPILED_RESULTS_DIR}/${FILE_NAME%.*}.csv*" > /dev/null; then
         echo "CSV result already exists. Skipping..."
         continue
     fi
 
-    if [[ ! -x "${OBTAIN_METRICS_BIN}" ]]; then
+    MANIFEST="$TMP_DIR/formatted/${SPECIES_NAME}.tsv"
+    [ -f "$MANIFEST" ] || printf 'prediction\tauc\n' > "$MANIFEST"
+    printf '%s\t%s\n' "$FILE" "$AUC" >> "$MANIFEST"
+done
 
-        echo "Metrics executable not found, building from source..."
-        if [[ -f "${OBTAIN_METRICS_SRC}" ]]; then
-            g++ "$METRICS_SRC" -o "${OBTAIN_METRICS_BIN}"
-            echo "Metrics executable compiled successfully."
-        else
-            echo "Error: Source file $METRICS_SRC not found."
-            exit 1
-        fi
-    fi
+for MANIFEST in "$TMP_DIR"/formatted/*.tsv; do
+    [ -f "$MANIFEST" ] || continue
+    SPECIES_NAME=$(basename "$MANIFEST" .tsv)
+    echo "Evaluating $(( $(wc -l < "$MANIFEST") - 1 )) predictions of ${SPECIES_NAME}..."
 
-    ${OBTAIN_METRICS_BIN} ${SPECIES_FOLDER}/${SPECIES_NAME}_annotation.gff3 ${FILE} --output_folder ${COMPILED_RESULTS_DIR} --threads 20 ${PRINT_AUC}
+    python3 "$BATCH_EVALUATE" "${BENCHMARK_DIR}/species/benchmark_species/${SPECIES_NAME}/${SPECIES_NAME}_annotation.gff3" \
+        --manifest "$MANIFEST" --per_file "${COMPILED_RESULTS_DIR}" --jobs "$EVAL_JOBS" --gene_level \
+        --tracks "${COMPILED_RESULTS_DIR}/tracks" --bin_size "${TRACK_BIN_SIZE:-100000}" \
+        ${COMPRESS_RESULTS:+--compress "$COMPRESS_RESULTS"}
 done
 
 # extrair os do GeAnno
-TMP_DIR="./tmp_metrics"
-mkdir -p "$TMP_DIR"
-
 RESULTS_GEANNO="${BENCHMARK_DIR}/results/GeAnno"
 AUC_OUT="${RESULTS_GEANNO}/auc_csv/"
 
 rm -rf ${RESULTS_GEANNO}/*
 
-mkdir -p "${AUC_OUT}"
+mkdir -p "${AUC_OUT}" "${RESULTS_GEANNO}/gene_level"
 
 for MR in ${RESULTS_TOOL_DIR}/GeAnno/*; do
   [ -d "$MR" ] || continue
@@ -364,10 +344,14 @@ for MR in ${RESULTS_TOOL_DIR}/GeAnno/*; do
       [ -d "$SPECIES_DIR" ] || continue
       SPECIES_NAME=${SPECIES_DIR##*/}
 
-      REF_GFF="${BENCHMARK_DIR}/species/benchmark_species/${SPECIES_NAME}/${SPECIES_NAME}_annotation.gff3"
       OUTPUT_DIR="$SPECIES_DIR/output"
       [ -d "$OUTPUT_DIR" ] || { echo "No ouput in $SPECIES_DIR"; continue; }
 
+      MANIFEST="$TMP_DIR/geanno/${SPECIES_NAME}.tsv"
+      if [ ! -f "$MANIFEST" ]; then
+        printf 'species\tmodel\tmutation_rate\twindow\tstep\tthreshold\ttime\tmem\tprediction\tauc\n' > "$MANIFEST"
+      fi
+
       for GFF in "$OUTPUT_DIR"/*.gff3; do
         [ -f "$GFF" ] || continue
 
@@ -379,8 +363,6 @@ for MR in ${RESULTS_TOOL_DIR}/GeAnno/*; do
         STEP="$PART2"
         THRESHOLD="$PART3"
 
-        echo "Processing $FILE_NAME: window=$WINDOW, step=$STEP, threshold=$THRESHOLD"
-
         TIME_FILE="$SPECIES_DIR/time_mem/time_${WINDOW}_${STEP}.txt"
         TIME=""; MEM=""
         if [ -f "$TIME_FILE" ]; then
@@ -392,51 +374,37 @@ for MR in ${RESULTS_TOOL_DIR}/GeAnno/*; do
           echo "No time file file for ${WINDOW}_${STEP} in $SPECIES_DIR (time/mem will be empty)"
         fi
 
-        ${OBTAIN_METRICS_BIN} "$REF_GFF" "$GFF" --output_folder "$TMP_DIR"
-
-        METRICS_FILE="$TMP_DIR/${BASE}.csv"
-        if [ ! -f "$METRICS_FILE" ]; then
-          echo "No metrics file created for $BASE"
-          continue
-        fi
-
-        METRICS_HEADER=$(head -n 1 "$METRICS_FILE" | tr -d '\r')
-        METRICS_VALUES=$(tail -n 1 "$METRICS_FILE" | tr -d '\r')
-
-        CSV_FILE="${RESULTS_GEANNO}/${MODEL_NAME}_${SPECIES_NAME}.csv"
-        if [ ! -f "$CSV_FILE" ]; then
-          echo "species,model,mutation_rate,window,step,threshold,time,mem,${METRICS_HEADER}" > "$CSV_FILE"
-        fi
-
-        echo "${SPECIES_NAME},${MODEL_NAME},${MUT_RATE},${WINDOW},${STEP},${THRESHOLD},${TIME},${MEM},${METRICS_VALUES}" >> "$CSV_FILE"
-
         # tratar de AUC-ROC
+        AUC=0
         if [[ "$WINDOW" == "1500" && "$STEP" == "50" && "$THRESHOLD" == "0.8" ]]; then
-            
-            ${OBTAIN_METRICS_BIN} "$REF_GFF" "$GFF" --output_folder "$TMP_DIR" --print_auc
-
-            AUC_FILE="$TMP_DIR/${BASE}_auc.csv"
-            if [ ! -f "$AUC_FILE" ]; then
-                echo "WARN: não encontrei ${AUC_FILE}"
-                continue
-            fi
-
-            if [ ! -f "$AUC_OUT/geanno_auc.csv" ]; then
-                echo "species,model,mutation_rate,window,step,threshold,auc_roc,auc_prc" > "$AUC_OUT/geanno_auc.csv"
-            fi
-
-            AUC_VALUES=$(tail -n 1 "$AUC_FILE" | tr -d '\r')
-            AUC_ROC=$(echo "$AUC_VALUES" | cut -d',' -f1)
-            AUC_PRC=$(echo "$AUC_VALUES" | cut -d',' -f2)
-
-            echo "${SPECIES_NAME},${MODEL_NAME},0,1500,50,0.8,${AUC_ROC},${AUC_PRC}" >> "$AUC_OUT/geanno_auc.csv"
-
+          AUC=1
         fi
 
-        echo "Processed $FILE_NAME - $CSV_FILE"
+        printf '%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\n' "$SPECIES_NAME" "$MODEL_NAME" "$MUT_RATE" \
+          "$WINDOW" "$STEP" "$THRESHOLD" "$TIME" "$MEM" "$GFF" "$AUC" >> "$MANIFEST"
       done
     done
   done
 done
 
+# the whole GeAnno grid of a species is evaluated by one process
+for MANIFEST in "$TMP_DIR"/geanno/*.tsv; do
+  [ -f "$MANIFEST" ] || continue
+  SPECIES_NAME=$(basename "$MANIFEST" .tsv)
+  REF_GFF="${BENCHMARK_DIR}/species/benchmark_species/${SPECIES_NAME}/${SPECIES_NAME}_annotation.gff3"
+  echo "Evaluating $(( $(wc -l < "$MANIFEST") - 1 )) GeAnno predictions of ${SPECIES_NAME}..."
+
+  python3 "$BATCH_EVALUATE" "$REF_GFF" --manifest "$MANIFEST" --jobs "$EVAL_JOBS" \
+    --output "${RESULTS_GEANNO}/geanno_${SPECIES_NAME}.csv" --auc_table "$TMP_DIR/geanno/${SPECIES_NAME}_auc.csv" \
+    --gene_table "${RESULTS_GEANNO}/gene_level/geanno_${SPECIES_NAME}.csv"
+
+  # species,model,mutation_rate,window,step,threshold,auc_roc,auc_prc
+  AUC_FILE="$TMP_DIR/geanno/${SPECIES_NAME}_auc.csv"
+  [ -f "$AUC_FILE" ] || { echo "WARN: não encontrei ${AUC_FILE}"; continue; }
+  if [ ! -f "$AUC_OUT/geanno_auc.csv" ]; then
+    head -n 1 "$AUC_FILE" | cut -d',' -f1-6,9,10 > "$AUC_OUT/geanno_auc.csv"
+  fi
+  tail -n +2 "$AUC_FILE" | cut -d',' -f1-6,9,10 >> "$AUC_OUT/geanno_auc.csv"
+done
+
 rm -rf $TMP_DIR
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Gene-level matching of a prediction against a reference annotation.
+
+Base overlap cannot tell a fused prediction from two correct gene models. Here
+every predicted gene is compared with the reference genes it overlaps on the
+same sequence and strand:
+
+  - a reference (predicted) gene is matched at threshold t when some gene of
+    the other set overlaps it reciprocally by at least t of both lengths;
+    recall = matched reference genes / reference genes, precision = matched
+    predicted genes / predicted genes;
+  - a split is a reference gene holding at least `part` of the length of two
+    or more predicted genes; a merge is a predicted gene holding at least
+    `part` of the length of two or more reference genes.
+
+Overlapping pairs come from an interval index (genes sorted by start, with the
+running maximum of their ends), so finding them costs
+O((R + P) log(R + P) + pairs) instead of comparing all pairs.
+
+Usage:
+    gene_match.py REFERENCE.gff3 PREDICTION.gff3 [--overlap 0.5 0.8] [--part 0.5]
+"""
+
+import argparse
+import os
+import sys
+
+from dataclasses import astuple, dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarking_scripts"))
+from compressed_io import open_text
+
+GENE_COLUMNS = ["overlap", "ref_genes", "pred_genes", "matched_ref", "matched_pred",
+                "recall", "precision", "f1", "split_ref", "split_pred", "merged_pred", "merged_ref"]
+
+# (seqid, on the + strand)
+Key = Tuple[str, bool]
+
+
+def read_genes(path: Path) -> Dict[Key, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """ Gene features of a GFF/GTF: (starts, half-open ends, scores) per sequence and strand"""
+    genes: Dict[Key, Tuple[list, list, list]] = {}
+    with open_text(path) as fh:
+        for line in fh:
+            if line.startswith("#") or "\tgene\t" not in line:
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 9 or fields[2] != "gene":
+                continue
+            start, end = int(fields[3]), int(fields[4])
+            if start > end:
+                start, end = end, start
+            score = 0.0 if fields[5] == "." else float(fields[5])
+            starts, ends, scores = genes.setdefault((fields[0], fields[6][:1] in ("+", "")), ([], [], []))
+            starts.append(start)
+            ends.append(end + 1)
+            scores.append(score)
+    return {k: (np.array(s, dtype=np.int64), np.array(e, dtype=np.int64), np.array(sc, dtype=float))
+            for k, (s, e, sc) in genes.items()}
+
+
+class IntervalIndex:
+    """ Half-open intervals sorted by start, with the running maximum of their ends"""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        self.order = np.argsort(starts, kind="stable")
+        self.starts = starts[self.order]
+        self.ends = ends[self.order]
+        self.max_end = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def overlaps(self, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ (query, interval) index pairs of every query interval overlapping an indexed one"""
+        # intervals before `lo` all end at or before the query start, those from `hi` start after its end
+        hi = np.searchsorted(self.starts, ends, side="left")
+        lo = np.searchsorted(self.max_end, starts, side="right")
+        n = np.maximum(hi - lo, 0)
+        query = np.repeat(np.arange(len(starts)), n)
+        cand = np.repeat(lo, n) + np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        keep = self.ends[cand] > starts[query]
+        return query[keep], self.order[cand[keep]]
+
+
+@dataclass
+class GeneCounts:
+    ref_genes: int = 0
+    pred_genes: int = 0
+    split_ref: int = 0
+    split_pred: int = 0
+    merged_pred: int = 0
+    merged_ref: int = 0
+
+    def __add__(self, other: "GeneCounts") -> "GeneCounts":
+        return GeneCounts(*(a + b for a, b in zip(astuple(self), astuple(other))))
+
+
+def match_key(ref: Tuple[np.ndarray, np.ndarray], pred: Tuple[np.ndarray, np.ndarray],
+              thresholds: Sequence[float], part: float) -> Tuple[GeneCounts, np.ndarray, np.ndarray]:
+    """ Split/merge counts and matched reference/predicted genes per threshold, for one sequence and strand"""
+    (rs, re), (ps, pe) = ref, pred
+    counts = GeneCounts(len(rs), len(ps))
+    matched_ref = np.zeros(len(thresholds), dtype=np.int64)
+    matched_pred = np.zeros(len(thresholds), dtype=np.int64)
+    if len(rs) == 0 or len(ps) == 0:
+        return counts, matched_ref, matched_pred
+
+    p, r = IntervalIndex(rs, re).overlaps(ps, pe)
+    ov = np.minimum(re[r], pe[p]) - np.maximum(rs[r], ps[p])
+    frac_ref = ov / (re[r] - rs[r])
+    frac_pred = ov / (pe[p] - ps[p])
+    recip = np.minimum(frac_ref, frac_pred)
+
+    for i, t in enumerate(thresholds):
+        hit = recip >= t
+        matched_ref[i] = len(np.unique(r[hit]))
+        matched_pred[i] = len(np.unique(p[hit]))
+
+    inside_ref = frac_pred >= part
+    per_ref = np.bincount(r[inside_ref], minlength=len(rs))
+    counts.split_ref = int((per_ref >= 2).sum())
+    counts.split_pred = len(np.unique(p[inside_ref & (per_ref[r] >= 2)]))
+
+    inside_pred = frac_ref >= part
+    per_pred = np.bincount(p[inside_pred], minlength=len(ps))
+    counts.merged_pred = int((per_pred >= 2).sum())
+    counts.merged_ref = len(np.unique(r[inside_pred & (per_pred[p] >= 2)]))
+    return counts, matched_ref, matched_pred
+
+
+def match_genes(ref_genes: Dict, pred_genes: Dict, thresholds: Sequence[float] = (0.5,),
+                part: float = 0.5) -> List[Dict[str, float]]:
+    """ One row of GENE_COLUMNS per reciprocal-overlap threshold"""
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    total = GeneCounts()
+    matched_ref = np.zeros(len(thresholds), dtype=np.int64)
+    matched_pred = np.zeros(len(thresholds), dtype=np.int64)
+    for key in set(ref_genes) | set(pred_genes):
+        counts, mr, mp = match_key(ref_genes.get(key, empty)[:2], pred_genes.get(key, empty)[:2], thresholds, part)
+        total += counts
+        matched_ref += mr
+        matched_pred += mp
+
+    rows = []
+    for t, mr, mp in zip(thresholds, matched_ref, matched_pred):
+        recall = mr / total.ref_genes if total.ref_genes else 0.0
+        precision = mp / total.pred_genes if total.pred_genes else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        rows.append(dict(overlap=t, ref_genes=total.ref_genes, pred_genes=total.pred_genes,
+                         matched_ref=int(mr), matched_pred=int(mp), recall=recall, precision=precision, f1=f1,
+                         split_ref=total.split_ref, split_pred=total.split_pred,
+                         merged_pred=total.merged_pred, merged_ref=total.merged_ref))
+    return rows
+
+
+def format_row(row: Dict[str, float]) -> str:
+    """ CSV line of a match_genes row"""
+    rates = ("recall", "precision", "f1")
+    return ",".join(f"{row[c]:.4f}" if c in rates else f"{row[c]:g}" if c == "overlap" else str(row[c])
+                    for c in GENE_COLUMNS)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Gene-level precision/recall and split/merge counts of a prediction.")
+    ap.add_argument("reference", type=Path)
+    ap.add_argument("prediction", type=Path)
+    ap.add_argument("--overlap", type=float, nargs="+", default=[0.5, 0.8], help="Reciprocal-overlap thresholds")
+    ap.add_argument("--part", type=float, default=0.5, help="Share of a gene inside another for splits/merges")
+    args = ap.parse_args()
+
+    try:
+        rows = match_genes(read_genes(args.reference), read_genes(args.prediction), args.overlap, args.part)
+    except (OSError, ValueError, IndexError, RuntimeError) as e:
+        sys.exit(f"Error: {e}")
+    sys.stdout.write(",".join(GENE_COLUMNS) + "\n")
+    for row in rows:
+        sys.stdout.write(format_row(row) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 import sys
 import os
 
+# aggregated predictions may be gzip/BGZF/zstd compressed (COMPRESS_RESULTS)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarking_scripts"))
+from compressed_io import open_text, strip_compression
+
 def open_file(file_name):
 
     dirname = os.getcwd()
@@ -12,12 +16,13 @@ def open_file(file_name):
         print(f"Error: File '{filename}' does not exist.")
         sys.exit(1)
 
-    output_file_name = os.path.splitext(filename)[0] + "_cleaned" + os.path.splitext(filename)[1]
+    plain_name = strip_compression(filename)
+    output_file_name = os.path.splitext(plain_name)[0] + "_cleaned" + os.path.splitext(plain_name)[1]
     
     print(f"Output file path: {output_file_name}")
     
-    with open(filename, "r") as input_file:
-        for line in input_file.readlines():
+    with open_text(filename) as input_file:
+        for line in input_file:
             if line.startswith("#"):
                 continue
             original_line = line.split("\t")
@@ -26,7 +31,7 @@ def open_file(file_name):
             rest_element = first_element + "\t" + rest_element
             
             # dividir o output em varios ficheiros
-            write_to_output(os.path.splitext(filename)[0] + "_cleaned_" + str(first_element[0:3]) + os.path.splitext(filename)[1], rest_element)
+            write_to_output(os.path.splitext(plain_name)[0] + "_cleaned_" + str(first_element[0:3]) + os.path.splitext(plain_name)[1], rest_element)
 
 
 def write_to_output(filename, text):
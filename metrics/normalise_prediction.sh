@@ -0,0 +1,71 @@
+#!/bin/bash
+
+# Convert one aggregated prediction (results/compiled/aggregated/<name>.<ext>) into the
+# sorted, tidied GFF3 results/compiled/formatted/<name>.gff3 used by obtain_metrics.
+#
+# Usage: normalise_prediction.sh <aggregated prediction> [snap|default]
+#
+# The prediction may be gzip, BGZF or zstd compressed (<name>.<ext>.gz/.bgz/.zst).
+#
+# Temporary files live in a private folder, so several predictions can be normalised at once.
+
+BENCHMARK_DIR="${BENCHMARK_DIR:-$HOME/benchmark}"
+
+RESULTS_DIR="${BENCHMARK_DIR}/results"
+COMPILED_RESULTS_DIR="${RESULTS_DIR}/compiled"
+AGGREGATED_RESULTS="${COMPILED_RESULTS_DIR}/aggregated"
+FORMATTED_RESULTS="${COMPILED_RESULTS_DIR}/formatted"
+
+if [ $# -lt 1 ]; then
+    echo "Usage: $0 <aggregated prediction> [snap|default]"
+    exit 1
+fi
+
+FILE="$(realpath "$1")"
+MODE="${2:-default}"
+NAME=$(basename "$FILE")
+NAME="${NAME%.gz}"; NAME="${NAME%.bgz}"; NAME="${NAME%.zst}"  # compressed predictions are read as they are
+EXT="${NAME##*.}"
+BASENAME=$(basename "$NAME" ."$EXT")
+
+mkdir -p "${FORMATTED_RESULTS}"
+WORK_DIR=$(mktemp -d "${TMPDIR:-/tmp}/normalise_${BASENAME}.XXXXXX")
+trap 'rm -rf "$WORK_DIR"' EXIT
+cd "$WORK_DIR" || exit 1
+
+echo "Processing $BASENAME with mode: $MODE"
+python3 ${BENCHMARK_DIR}/metrics/modify_output.py "$FILE"
+
+merged_gff3="merged.gff3"
+> "$merged_gff3"
+echo "##gff-version 3" >> "$merged_gff3"
+
+echo "Merging cleaned files for $BASENAME ($MODE mode)..."
+
+for file in ${AGGREGATED_RESULTS}/${BASENAME}_cleaned_*; do
+    if [[ -f "$file" ]]; then
+        echo "Processing $file"
+
+        case "$MODE" in
+            "snap")
+                SNAP_ExonEtermEinitEsngl_gff_to_gff3.pl "$file" > "snap.gff3"
+                agat_convert_sp_gxf2gxf.pl -g "snap.gff3" -o "temp.gff3"
+                ;;
+            *)
+                agat_convert_sp_gxf2gxf.pl -g "$file" -o "temp.gff3"
+                ;;
+        esac
+
+        gt gff3 -sort -tidy -o "temp_sorted.gff3" "temp.gff3"
+        tail -n +2 "temp_sorted.gff3" >> "$merged_gff3"
+
+        rm "$file" temp.gff3 temp_sorted.gff3
+        [ "$MODE" = "snap" ] && rm -f snap.gff3
+    fi
+done
+
+echo "Final sorting and ID assignment for $BASENAME"
+# written under a temporary name, so an interrupted run never leaves a truncated result behind
+gt gff3 -force -tidy -sort -addids -o "${FORMATTED_RESULTS}/${BASENAME}.gff3.partial" "$merged_gff3" || exit 1
+mv "${FORMATTED_RESULTS}/${BASENAME}.gff3.partial" "${FORMATTED_RESULTS}/${BASENAME}.gff3"
+rm -f ${FORMATTED_RESULTS}/${BASENAME}*.log
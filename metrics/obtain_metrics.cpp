@@ -28,6 +28,11 @@ inline uint64_t encode_nuc(int seqid_id, int pos, char strand) {
            (strand == '+' ? 1 : 0);
 }
 
+// same key with the strand bit cleared, for strand-agnostic overlap
+inline uint64_t encode_locus(int seqid_id, int pos) {
+    return encode_nuc(seqid_id, pos, '.');
+}
+
 std::vector<GFFFeature> parse_gff_parallel(const std::string& file_path, unsigned n_threads) {
     std::ifstream file(file_path);
     if (!file) {
@@ -183,34 +188,45 @@ void write_gene_nucleotide_csv(const std::vector<GFFFeature>& refs,
         return seqid_to_id[s] = next_id++;
     };
 
-    std::unordered_set<uint64_t> ref_nucs, pred_nucs;
+    // strand-aware and strand-agnostic nucleotides, filled in the same pass
+    std::unordered_set<uint64_t> ref_nucs, pred_nucs, ref_loci, pred_loci;
 
     auto fill_gene = [&](const std::vector<GFFFeature>& data,
-                         std::unordered_set<uint64_t>& target) {
+                         std::unordered_set<uint64_t>& target,
+                         std::unordered_set<uint64_t>& target_loci) {
         for (const auto& f : data) {
             if (f.feature_type != "gene") continue;
             int id = get_seqid_id(f.seqid);
-            for (int p = f.start; p <= f.end; ++p)
+            for (int p = f.start; p <= f.end; ++p) {
                 target.insert(encode_nuc(id, p, f.strand));
+                target_loci.insert(encode_locus(id, p));
+            }
         }
     };
 
-    fill_gene(refs, ref_nucs);
-    fill_gene(preds, pred_nucs);
-
-    int TP = 0;
-    for (const auto& n : pred_nucs)
-        if (ref_nucs.count(n)) ++TP;
-
-    int FN = static_cast<int>(ref_nucs.size()) - TP;
-    int FP = static_cast<int>(pred_nucs.size()) - TP;
-    double sens = (TP + FN) ? 100.0 * TP / (TP + FN) : 0.0;
-    double spec = (TP + FP) ? 100.0 * TP / (TP + FP) : 0.0;
+    fill_gene(refs, ref_nucs, ref_loci);
+    fill_gene(preds, pred_nucs, pred_loci);
 
     std::ofstream out(csv_path);
     out << "label,tp,fp,fn,sensitivity,specificity\n";
-    out << "gene_nucleotide," << TP << ',' << FP << ',' << FN << ','
-        << std::fixed << std::setprecision(2) << sens << ',' << spec << '\n';
+
+    auto write_row = [&](const char* label, const std::unordered_set<uint64_t>& ref_set,
+                         const std::unordered_set<uint64_t>& pred_set) {
+        int TP = 0;
+        for (const auto& n : pred_set)
+            if (ref_set.count(n)) ++TP;
+
+        int FN = static_cast<int>(ref_set.size()) - TP;
+        int FP = static_cast<int>(pred_set.size()) - TP;
+        double sens = (TP + FN) ? 100.0 * TP / (TP + FN) : 0.0;
+        double spec = (TP + FP) ? 100.0 * TP / (TP + FP) : 0.0;
+
+        out << label << ',' << TP << ',' << FP << ',' << FN << ','
+            << std::fixed << std::setprecision(2) << sens << ',' << spec << '\n';
+    };
+
+    write_row("gene_nucleotide", ref_nucs, pred_nucs);
+    write_row("gene_nucleotide_unstranded", ref_loci, pred_loci);
 }
 
 static inline bool is_gff_like(const std::filesystem::path& p) {
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Evaluate a prediction while the predictor is still writing it.
+
+The GFF/GTF is tailed as it grows. Its genes (gene lines, or for GTFs without
+them the span of each gene_id) are compared with the reference genes of the
+region the predictor has covered so far: every sequence it has finished, plus
+the current one up to the end of its last prediction. AUGUSTUS announces each
+sequence ("# ----- prediction on sequence number ..."), so sequences without
+predictions count as covered too. The counts of finished sequences are kept,
+so each update only re-merges the sequence being written.
+
+Every --interval seconds the running gene_nucleotide tp/fp/fn, precision and
+recall are printed (and appended to --log). Once the covered region holds
+--min_ref_bp reference gene bases, a precision or recall under --min_precision
+or --min_recall ends the evaluation with exit code 3; with --kill the
+processes that have the file open for writing (found through /proc) and --pid
+are sent SIGTERM first, so a misconfigured run (e.g. a wrong AUGUSTUS
+--species) stops after minutes instead of hours.
+
+The evaluator stops by itself when the file is renamed or removed after having
+been seen (e.g. augustus.gtf.partial moved to augustus.gtf) or when --pid exits.
+
+Usage:
+    stream_evaluate.py REFERENCE.gff3 PREDICTION.gtf [--min_precision 0.2] [--min_recall 0.2] [--kill]
+                       [--pid PID] [--interval 30] [--min_ref_bp 1000000] [--log FILE]
+"""
+
+import argparse
+import os
+import re
+import signal
+import sys
+import time
+
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from batch_evaluate import ReferenceIndex, merge_intervals
+from gene_match import read_genes
+
+SEQUENCE_HEADER = re.compile(r"^# -+ prediction on sequence number \d+ .*name = (\S+)\)")
+GENE_ID = re.compile(r'gene_id "([^"]+)"')
+LOG_COLUMNS = ["elapsed_sec", "sequences", "region_ref_bp", "tp", "fp", "fn", "precision", "recall"]
+ABORTED = 3
+
+
+class StreamState:
+    """ Genes read so far, per sequence, and the cached counts of the finished sequences"""
+
+    def __init__(self, ref: ReferenceIndex):
+        self.ref = ref
+        self.genes: Dict[str, List[Tuple[bool, int, int]]] = {}
+        self.hulls: Dict[str, Dict[str, List]] = {}   # gene_id spans, for GTFs without gene lines
+        self.saw_gene_lines = False
+        self.current: Optional[str] = None
+        self.frontier = 0
+        self.done: Dict[str, Tuple[int, int, int, int]] = {}
+        self.seen: Set[str] = set()
+
+    def _enter(self, seqid: str) -> None:
+        if seqid == self.current:
+            return
+        if self.current is not None:
+            self.done[self.current] = self._counts(self.current, None)
+        # a sequence written again is recounted
+        self.done.pop(seqid, None)
+        self.current, self.frontier = seqid, 0
+        self.seen.add(seqid)
+
+    def feed(self, line: str) -> None:
+        if line.startswith("#"):
+            m = SEQUENCE_HEADER.match(line)
+            if m:
+                self._enter(m.group(1))
+            return
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) < 9:
+            return
+        start, end = sorted((int(fields[3]), int(fields[4])))
+        plus = fields[6][:1] in ("+", "")
+        self._enter(fields[0])
+        self.frontier = max(self.frontier, end + 1)
+        if fields[2] == "gene":
+            self.saw_gene_lines = True
+            self.genes.setdefault(fields[0], []).append((plus, start, end + 1))
+            return
+        m = GENE_ID.search(fields[8])
+        if m:
+            hull = self.hulls.setdefault(fields[0], {}).setdefault(m.group(1), [plus, start, end + 1])
+            hull[1], hull[2] = min(hull[1], start), max(hull[2], end + 1)
+
+    def _counts(self, seqid: str, limit: Optional[int]) -> Tuple[int, int, int, int]:
+        """ (tp, fp, fn, reference bp) of one sequence, up to `limit` (None: all of it)"""
+        recs = self.genes.get(seqid, []) if self.saw_gene_lines else list(self.hulls.get(seqid, {}).values())
+        tp = predicted = region = 0
+        for plus in (True, False):
+            key = (seqid, plus)
+            s = np.array([r[1] for r in recs if r[0] == plus], dtype=np.int64)
+            e = np.array([r[2] for r in recs if r[0] == plus], dtype=np.int64)
+            s, e = merge_intervals(s, e)
+            predicted += int((e - s).sum())
+            tp += int(self.ref.covered(key, s, e).sum())
+            if key in self.ref.intervals:
+                region += (int(self.ref.intervals[key][2][-1]) if limit is None
+                           else int(self.ref.covered(key, np.array([0]), np.array([limit]))[0]))
+        return tp, predicted - tp, region - tp, region
+
+    def finish(self) -> None:
+        """ The file is complete: the current sequence counts in full"""
+        if self.current is not None:
+            self.done[self.current] = self._counts(self.current, None)
+            self.current = None
+
+    def totals(self) -> Tuple[int, int, int, int]:
+        parts = list(self.done.values())
+        if self.current is not None:
+            parts.append(self._counts(self.current, self.frontier))
+        return tuple(int(sum(p[i] for p in parts)) for i in range(4)) if parts else (0, 0, 0, 0)
+
+
+def writers_of(path: Path) -> List[int]:
+    """ PIDs with `path` open for writing, from /proc/<pid>/fd and the access mode in /proc/<pid>/fdinfo"""
+    target = os.path.realpath(path)
+    pids = []
+    for proc in Path("/proc").iterdir():
+        if not proc.name.isdigit() or int(proc.name) == os.getpid():
+            continue
+        try:
+            for fd in (proc / "fd").iterdir():
+                if os.readlink(fd) == target and _opened_for_writing(proc / "fdinfo" / fd.name):
+                    pids.append(int(proc.name))
+                    break
+        except OSError:
+            continue
+    return pids
+
+
+def _opened_for_writing(fdinfo: Path) -> bool:
+    """ O_WRONLY or O_RDWR in the octal flags of a /proc/<pid>/fdinfo/<fd> entry (readers such as tail -f are skipped)"""
+    for line in fdinfo.read_text().splitlines():
+        if line.startswith("flags:"):
+            return (int(line.split()[1], 8) & os.O_ACCMODE) in (os.O_WRONLY, os.O_RDWR)
+    return False
+
+
+def alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Running precision/recall of a growing GFF/GTF, with an early abort.")
+    ap.add_argument("reference", type=Path)
+    ap.add_argument("prediction", type=Path)
+    ap.add_argument("--min_precision", type=float, default=None)
+    ap.add_argument("--min_recall", type=float, default=None)
+    ap.add_argument("--min_ref_bp", type=int, default=1_000_000,
+                    help="Reference gene bases the covered region must hold before the thresholds apply")
+    ap.add_argument("--kill", action="store_true", help="SIGTERM the writers of the file (and --pid) on abort")
+    ap.add_argument("--pid", type=int, default=None, help="Predictor process; the evaluator stops when it exits")
+    ap.add_argument("--interval", type=float, default=30.0, help="Seconds between updates")
+    ap.add_argument("--poll", type=float, default=1.0, help="Seconds between reads of the file")
+    ap.add_argument("--log", type=Path, default=None, help="TSV the updates are appended to")
+    args = ap.parse_args()
+
+    try:
+        ref = ReferenceIndex({k: merge_intervals(s, e) for k, (s, e, _) in read_genes(args.reference).items()})
+    except (OSError, ValueError, IndexError, RuntimeError) as e:
+        sys.exit(f"Error parsing reference: {e}")
+
+    state = StreamState(ref)
+    log = open(args.log, "a") if args.log else None
+    if log is not None and log.tell() == 0:
+        log.write("\t".join(LOG_COLUMNS) + "\n")
+    t0 = time.time()
+    fh, inode, pending, last_report = None, None, "", 0.0
+
+    def report(final: bool = False) -> Optional[str]:
+        tp, fp, fn, region = state.totals()
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        row = [f"{time.time() - t0:.0f}", str(len(state.seen)), str(region), str(tp), str(fp), str(fn),
+               f"{precision:.4f}", f"{recall:.4f}"]
+        print(("final " if final else "") + " ".join(f"{k}={v}" for k, v in zip(LOG_COLUMNS, row)), flush=True)
+        if log is not None:
+            log.write("\t".join(row) + "\n")
+            log.flush()
+        if final or region < args.min_ref_bp:
+            return None
+        if args.min_precision is not None and precision < args.min_precision:
+            return f"precision {precision:.4f} < {args.min_precision}"
+        if args.min_recall is not None and recall < args.min_recall:
+            return f"recall {recall:.4f} < {args.min_recall}"
+        return None
+
+    while True:
+        if fh is None and args.prediction.exists():
+            fh = open(args.prediction)
+            inode = os.fstat(fh.fileno()).st_ino
+        if fh is not None:
+            chunk = fh.read()
+            if chunk:
+                lines = (pending + chunk).split("\n")
+                pending = lines.pop()
+                for line in lines:
+                    state.feed(line)
+
+        gone = fh is not None and (not args.prediction.exists() or os.stat(args.prediction).st_ino != inode)
+        if gone or (args.pid is not None and not alive(args.pid)):
+            # lines written between the read above and the rename are still in the open file
+            lines = (pending + (fh.read() if fh is not None else "")).split("\n")
+            for line in lines:
+                state.feed(line)
+            state.finish()
+            report(final=True)
+            return
+
+        if time.time() - last_report >= args.interval:
+            last_report = time.time()
+            reason = report()
+            if reason:
+                print(f"Aborting {args.prediction}: {reason}", file=sys.stderr, flush=True)
+                if args.kill:
+                    targets = writers_of(args.prediction) + ([args.pid] if args.pid else [])
+                    for pid in sorted(set(targets)):
+                        try:
+                            os.kill(pid, signal.SIGTERM)
+                        except OSError:
+                            pass
+                sys.exit(ABORTED)
+        time.sleep(args.poll)
+
+
+if __name__ == "__main__":
+    main()
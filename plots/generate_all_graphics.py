@@ -1,15 +1,23 @@
 import argparse
+import sys
 import warnings
 import seaborn as sns
 
 from pathlib import Path
 
-from modules.load_save import load_results, load_geanno
+from modules.load_save import load_gene_level, load_results, load_geanno, load_size_scaling, load_thread_scaling, \
+                              load_tracks
+
+from modules.common import enable_copy_on_write
+
+from modules.memory import ExporterMemory, parse_budgets
 
 from modules.ab_initio_comp import plot_geanno_vs_abinitio_for_model, plot_geanno_vs_genemark
 
 from modules.comparison_tools import export_geanno_models_table_csv
 
+from modules.gene_level import plot_gene_level_heatmaps
+
 from modules.geanno_plots import export_all_tools_table_csv, export_threshold_curves_and_tripanel, \
                                 export_window_step_by_species_mut0
 
@@ -21,8 +29,12 @@ from modules.mut_rate import export_fixedpoint_species_model, export_tool_by_mut
 
 from modules.roc_prc import plot_auc_heatmap_stack_geanno_mesc_vs_aug_abinitio
 
+from modules.significance import export_pairwise_significance
+
+from modules.tracks import plot_accuracy_tracks
+
 from modules.time_ram import plot_ram_time_all_tools_by_species_linepairs_plus_geanno, plot_ram_time_all_tools_overall_dots_plus_geanno, \
-                            plot_ram_time_summaries_and_plots
+                            plot_ram_time_summaries_and_plots, plot_size_scaling, plot_thread_scaling
 
 
 try:
@@ -40,46 +52,83 @@ def main():
     ap.add_argument("--results_geanno", type=Path, required=True, help="Path to GeAnno's results")
     ap.add_argument("--geanno_auc_csv", type=Path, required=True, help="CSV with GeAnno AUCs (species,model,mutation_rate,window,step,threshold,auc_roc,auc_prc)")
     ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--tracks_dir", type=Path, default=None, help="Accuracy tracks (batch_evaluate.py --tracks); default <csv_dir>/tracks")
+    ap.add_argument("--permutations", type=int, default=10000, help="Permutations of the paired F1 tests between tools")
+    ap.add_argument("--compact", action="store_true", help="Categorical/float32/int32 columns in the results frames (prints their memory)")
+    ap.add_argument("--copy_on_write", action="store_true", help="pandas copy-on-write: helpers share the frames' data instead of copying them")
+    ap.add_argument("--memory_budget", nargs="+", default=None, metavar="[EXPORTER=]MB",
+                    help="Peak memory allowed per exporter (tracemalloc); exits with 1 and a report if one exceeds it")
+    ap.add_argument("--ledger", type=Path, default=None, help="SQLite run ledger; time/RAM are taken from it instead of the CSV filenames")
     
     args = ap.parse_args()
 
+    if args.copy_on_write:
+        enable_copy_on_write()
+    run = ExporterMemory(parse_budgets(args.memory_budget) if args.memory_budget else None)
+
     args.fig_dir.mkdir(parents=True, exist_ok=True)
-    df = load_results(args.csv_dir)
-    df_geanno = load_geanno(args.results_geanno)
+    df = load_results(args.csv_dir, ledger_db=args.ledger, compact=args.compact)
+    df_geanno = load_geanno(args.results_geanno, ledger_db=args.ledger, compact=args.compact)
     geanno_path = args.fig_dir / "geanno"
 
     geanno_path.mkdir(parents=True, exist_ok=True)
 
     # GEANNO CONFIGS
-    export_threshold_curves_and_tripanel(df_geanno, out_dir=geanno_path, dpi=args.dpi)
-    export_window_step_by_species_mut0(df_geanno, out_dir=geanno_path)
+    run(export_threshold_curves_and_tripanel, df_geanno, out_dir=geanno_path, dpi=args.dpi)
+    run(export_window_step_by_species_mut0, df_geanno, out_dir=geanno_path)
 
     # MODEL TRAINING COMPARISON
-    plot_geanno_vs_abinitio_for_model(df, args.results_geanno, model="arabidopsis", out_dir=geanno_path)
-    plot_geanno_vs_abinitio_for_model(df, args.results_geanno, model="rice",        out_dir=geanno_path)
-    plot_geanno_vs_genemark(df, args.results_geanno, out_dir=geanno_path)
+    run(plot_geanno_vs_abinitio_for_model, df, args.results_geanno, model="arabidopsis", out_dir=geanno_path)
+    run(plot_geanno_vs_abinitio_for_model, df, args.results_geanno, model="rice",        out_dir=geanno_path)
+    run(plot_geanno_vs_genemark, df, args.results_geanno, out_dir=geanno_path)
 
     # COMPARISON WITH EVIDENCE-BASED HINTS
-    plot_evidence_species_by_hints_plus_geanno(df, df_geanno, out_dir=geanno_path, dpi=args.dpi)
+    run(plot_evidence_species_by_hints_plus_geanno, df, df_geanno, out_dir=geanno_path, dpi=args.dpi)
 
     # COMPARISON ACROSS DIFFERENT SPECIES
-    export_geanno_models_table_csv(df_geanno, out_dir=geanno_path)
-    export_all_tools_table_csv(df, df_geanno, out_dir=geanno_path)
+    run(export_geanno_models_table_csv, df_geanno, out_dir=geanno_path)
+    run(export_all_tools_table_csv, df, df_geanno, out_dir=geanno_path)
 
     # MUTATION RATES
-    plot_geanno_vs_tools_mut_rate_per_species(df, df_geanno, out_dir=geanno_path)
-    plot_geanno_vs_tools_mut_rate(df, df_geanno, out_dir=geanno_path, dpi=args.dpi)
-    export_fixedpoint_species_model(df_geanno, out_dir=geanno_path)
-    export_tool_by_mutrate_avg_across_species(df_geanno, out_dir=geanno_path)
-    export_tool_mutation_drop_csv(df, df_geanno, out_dir=geanno_path)
+    run(plot_geanno_vs_tools_mut_rate_per_species, df, df_geanno, out_dir=geanno_path)
+    run(plot_geanno_vs_tools_mut_rate, df, df_geanno, out_dir=geanno_path, dpi=args.dpi)
+    run(export_fixedpoint_species_model, df_geanno, out_dir=geanno_path)
+    run(export_tool_by_mutrate_avg_across_species, df_geanno, out_dir=geanno_path)
+    run(export_tool_mutation_drop_csv, df, df_geanno, out_dir=geanno_path)
 
     # TIME AND RAM
-    plot_ram_time_summaries_and_plots(df_geanno, out_dir=geanno_path, dpi=args.dpi)
-    plot_ram_time_all_tools_overall_dots_plus_geanno(df, df_geanno, out_dir=geanno_path, dpi=args.dpi)
-    plot_ram_time_all_tools_by_species_linepairs_plus_geanno(df, df_geanno, out_dir=geanno_path, dpi=args.dpi)
+    run(plot_ram_time_summaries_and_plots, df_geanno, out_dir=geanno_path, dpi=args.dpi)
+    run(plot_ram_time_all_tools_overall_dots_plus_geanno, df, df_geanno, out_dir=geanno_path, dpi=args.dpi)
+    run(plot_ram_time_all_tools_by_species_linepairs_plus_geanno, df, df_geanno, out_dir=geanno_path, dpi=args.dpi)
+
+    # THREAD SCALING (run_thread_scaling.sh)
+    if args.ledger is not None:
+        scaling_runs = load_thread_scaling(args.ledger)
+        if not scaling_runs.empty:
+            run(plot_thread_scaling, scaling_runs, out_dir=geanno_path, dpi=args.dpi)
+
+        # INPUT-SIZE SCALING (run_size_scaling.sh)
+        size_runs = load_size_scaling(args.ledger)
+        if not size_runs.empty:
+            run(plot_size_scaling, size_runs, out_dir=geanno_path, dpi=args.dpi)
     
+    # GENE-LEVEL MATCHING (batch_evaluate.py --gene_level)
+    gene_level = load_gene_level(args.csv_dir, args.results_geanno / "gene_level")
+    if not gene_level.empty:
+        run(plot_gene_level_heatmaps, gene_level, out_dir=geanno_path, dpi=args.dpi)
+
+    # ACCURACY ALONG THE GENOME (batch_evaluate.py --tracks)
+    tracks_dir = args.tracks_dir or args.csv_dir / "tracks"
+    if tracks_dir.is_dir():
+        tracks = load_tracks(tracks_dir)
+        if not tracks.empty:
+            run(plot_accuracy_tracks, tracks, out_dir=geanno_path / "tracks", dpi=args.dpi)
+            # paired permutation/bootstrap tests of the F1 differences, with the track bins as loci
+            run(export_pairwise_significance, tracks, out_dir=geanno_path / "significance",
+                n_perm=args.permutations, dpi=args.dpi)
+
     # AUC-ROC AU-PRC - DONE
-    plot_auc_heatmap_stack_geanno_mesc_vs_aug_abinitio(args.geanno_auc_csv,
+    run(plot_auc_heatmap_stack_geanno_mesc_vs_aug_abinitio, args.geanno_auc_csv,
         bench_auc_dir=args.csv_dir,
         out_dir=geanno_path,
         dpi=args.dpi
@@ -87,5 +136,12 @@ def main():
 
     print("Figures written to", args.fig_dir)
 
+    if args.memory_budget:
+        report = run.report()
+        report.to_csv(args.fig_dir / "memory_budget.csv", index=False)
+        print(report.to_string(index=False, float_format="%.1f"))
+        if report["over_budget"].any():
+            sys.exit(f"Over the memory budget: {', '.join(report.loc[report['over_budget'], 'exporter'])}")
+
 if __name__ == "__main__":
     main()
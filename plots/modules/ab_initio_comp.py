@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import seaborn as sns
 
@@ -10,7 +11,7 @@ from modules.load_save import load_geanno
 from modules.common import GEANNO_WIN, GEANNO_STEP, GEANNO_THR,\
                           _ensure_numeric, _compute_prec_rec_f1, _ensure_prf_metrics, \
                           _species_to_pretty, _geanno_slice_for_models, _bench_abinitio_slice_for_model, \
-                          _concat_nonempty
+                          _concat_nonempty, _pivot_dense, _working_copy
 
 
 def _palette_for_tools(tools: List[str]) -> Dict[str, Tuple[float, float, float]]:
@@ -30,10 +31,10 @@ def _cleveland_triple(df_plot: pd.DataFrame, title_prefix: str, out_png: Path, d
     metric_cols = ["precision", "recall", "f1"]
 
     if df_plot.duplicated(group_cols).any():
-        agg = (df_plot.groupby(group_cols, as_index=False).agg({m: ["mean", "std"] for m in metric_cols}))
+        agg = (df_plot.groupby(group_cols, as_index=False, observed=True).agg({m: ["mean", "std"] for m in metric_cols}))
         agg.columns = ["_".join(col).rstrip("_") if isinstance(col, tuple) else col for col in agg.columns]
     else:
-        agg = df_plot.copy()
+        agg = _working_copy(df_plot)
         for m in metric_cols:
             if f"{m}_std" not in agg.columns: agg[f"{m}_std"] = 0.0
             if f"{m}_mean" not in agg.columns and m in agg.columns:
@@ -57,6 +58,7 @@ def _cleveland_triple(df_plot: pd.DataFrame, title_prefix: str, out_png: Path, d
     marker_size = 6
 
     base_x = {s: i for i, s in enumerate(species_present)}
+    xs_base = np.arange(len(species_present), dtype=float)
     n_tools = len(tools)
     width = 0.16 if n_tools >= 4 else 0.18
     offsets = {t: (j - (n_tools - 1) / 2.0) * width for j, t in enumerate(tools)}
@@ -68,29 +70,26 @@ def _cleveland_triple(df_plot: pd.DataFrame, title_prefix: str, out_png: Path, d
         mean_col = mkey if mkey in agg.columns else f"{mkey}_mean"
         std_col  = f"{mkey}_std"
 
-        for t in tools:
-            xs, ys = [], []
-            for s in species_present:
-                rows = agg[(agg["species_pretty"] == s) & (agg["tool_pretty"] == t)]
-                if not rows.empty:
-                    xs.append(base_x[s] + offsets[t])
-                    ys.append(float(rows[mean_col].iloc[0]))
-            if xs:
-                ax.plot(xs, ys, linestyle=tool_ls[t], linewidth=tool_lw[t], alpha=0.9, zorder=1, color=tool_color[t])
-
-        for t in tools:
+        Y   = _pivot_dense(agg, "tool_pretty", "species_pretty", mean_col, tools, species_present, aggfunc="first")
+        YSD = _pivot_dense(agg, "tool_pretty", "species_pretty", std_col, tools, species_present, aggfunc="first")
+
+        for j, t in enumerate(tools):
+            ok = ~np.isnan(Y[j])
+            if ok.any():
+                ax.plot(xs_base[ok] + offsets[t], Y[j][ok], linestyle=tool_ls[t], linewidth=tool_lw[t],
+                        alpha=0.9, zorder=1, color=tool_color[t])
+
+        for j, t in enumerate(tools):
             c = tool_color[t]
             lw = tool_lw[t]
-            for s in species_present:
-                rows = agg[(agg["species_pretty"] == s) & (agg["tool_pretty"] == t)]
-                if rows.empty: continue
-                x = base_x[s] + offsets[t]
-                y = float(rows[mean_col].iloc[0])
-                ysd = float(rows[std_col].iloc[0])
-                ax.errorbar(x, y, yerr=(ysd if ysd > 0 else None),
-                            fmt="o", markersize=marker_size,
-                            linewidth=max(lw * 0.8, 1.0), capsize=2,
-                            color=c, ecolor=c, markerfacecolor=c, markeredgecolor=c, zorder=3)
+            ok = ~np.isnan(Y[j])
+            if not ok.any(): continue
+            ysd = YSD[j][ok]
+            ysd = np.where(ysd > 0, ysd, np.nan)
+            ax.errorbar(xs_base[ok] + offsets[t], Y[j][ok], yerr=(ysd if np.isfinite(ysd).any() else None),
+                        fmt="o", markersize=marker_size,
+                        linewidth=max(lw * 0.8, 1.0), capsize=2,
+                        color=c, ecolor=c, markerfacecolor=c, markeredgecolor=c, zorder=3)
 
         ax.set_title(mtitle, fontsize=16)
         ax.set_ylim(0, 1)
@@ -117,7 +116,7 @@ def _geanno_fixedpoint_from_df(df: pd.DataFrame,
                               step: int = GEANNO_STEP,
                               threshold: float = GEANNO_THR,
                               mut_rate: float = 0.0) -> pd.DataFrame:
-    d = df.copy()
+    d = _working_copy(df)
     d = _ensure_numeric(d, ["window","step","threshold","tp","fp","fn","mut_rate"])
     sel = (
         (d["window"] == window) &
@@ -125,7 +124,7 @@ def _geanno_fixedpoint_from_df(df: pd.DataFrame,
         (d["threshold"] == threshold) &
         (d["mut_rate"].fillna(0) == mut_rate)
     )
-    d = d[sel].copy()
+    d = _working_copy(d[sel])
     if d.empty:
         return pd.DataFrame(columns=["species","species_pretty","tool_pretty","precision","recall","f1"])
 
@@ -133,7 +132,7 @@ def _geanno_fixedpoint_from_df(df: pd.DataFrame,
         d = _compute_prec_rec_f1(d)
     else:
         d = _ensure_prf_metrics(d)
-    out = (d.groupby(["species","species_pretty","tool_pretty"], as_index=False)
+    out = (d.groupby(["species","species_pretty","tool_pretty"], as_index=False, observed=True)
              .agg(precision=("precision","mean"),
                   recall=("recall","mean"),
                   f1=("f1","mean")))
@@ -148,14 +147,14 @@ def plot_geanno_vs_genemark(df_bench: pd.DataFrame, geanno_folder: Path, out_dir
         model_keys=["GeneMark model", "GeneMark model (PCA)"],
         labels    =["GeAnno (GeneMark)", "GeAnno (GeneMark, PCA)"])
 
-    d = df_bench.copy()
+    d = _working_copy(df_bench)
     d["species_pretty"] = _species_to_pretty(d["species"])
-    gmes = d[(d["tool"].astype(str).str.lower() == "genemarkes") & (d["mut_rate"] == 0.0)][
-        ["species","species_pretty","precision","recall","f1"]].copy()
+    gmes = _working_copy(d[(d["tool"].astype(str).str.lower() == "genemarkes") & (d["mut_rate"] == 0.0)][
+        ["species","species_pretty","precision","recall","f1"]])
     gmes["tool_pretty"] = "GeneMark-ES"
 
     comb = _concat_nonempty([ge_slice, gmes])
-    comb = (comb.groupby(["species","species_pretty","tool_pretty"], as_index=False)[["precision","recall","f1"]].mean())
+    comb = (comb.groupby(["species","species_pretty","tool_pretty"], as_index=False, observed=True)[["precision","recall","f1"]].mean())
 
     out_dir.mkdir(parents=True, exist_ok=True)
     return _cleveland_triple(comb, title_prefix="GeAnno (GeneMark variants) and GeneMark-ES comparison",
@@ -177,7 +176,7 @@ def plot_geanno_vs_abinitio_for_model(df_bench: pd.DataFrame, geanno_folder: Pat
 
     ab = _bench_abinitio_slice_for_model(df_bench, model=model)
     comb = _concat_nonempty([ge_slice, ab])
-    comb = (comb.groupby(["species","species_pretty","tool_pretty"], as_index=False)[["precision","recall","f1"]].mean())
+    comb = (comb.groupby(["species","species_pretty","tool_pretty"], as_index=False, observed=True)[["precision","recall","f1"]].mean())
 
     out_dir.mkdir(parents=True, exist_ok=True)
     title_prefix = ("A. thaliana" if model == "arabidopsis" else "O. sativa") + "-trained models comparison"
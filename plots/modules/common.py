@@ -46,9 +46,17 @@ METRIC_LABELS = {
     "f1":        "F1-score",
 }
 
+def enable_copy_on_write(enabled: bool = True) -> None:
+    """ pandas copy-on-write: helpers and exporters share the input frames' data instead of copying them"""
+    pd.set_option("mode.copy_on_write", enabled)
+
+def _working_copy(df):
+    """ A frame (or series) the caller may modify without touching `df`: a deep copy, or a lazy one under copy-on-write"""
+    return df.copy(deep=pd.get_option("mode.copy_on_write") is not True)
+
 def _subset_geanno_mesculenta_any(df: pd.DataFrame) -> pd.DataFrame:
     """Filter to M. esculenta PCA"""
-    d = df.copy()
+    d = _working_copy(df)
     if "tool" in d.columns:
         m_raw = d["tool"].astype(str).str.contains("m_esculenta_model_PCA", case=False, regex=False)
     else:
@@ -75,7 +83,7 @@ def _filter_geanno_fixed_config(df: pd.DataFrame,
     """
     Keep only GeAnno rows at a certain window, step and threshold
     """
-    d = df.copy()
+    d = _working_copy(df)
 
     def _col_like(cols: Iterable[str], *cands: str) -> Optional[str]:
         cols = set(cols)
@@ -101,7 +109,7 @@ def _normalise_hint_column(df: pd.DataFrame, src_col: str = "hint") -> pd.Series
     """ Normalize hint column to lowercase stripped strings."""
     if src_col not in df.columns:
         return pd.Series(pd.NA, index=df.index, name="hint_l")
-    s = df[src_col].copy()
+    s = _working_copy(df[src_col])
     m = s.notna()
     s.loc[m] = s.loc[m].astype(str).str.lower().str.strip()
     return s.rename("hint_l")
@@ -120,7 +128,7 @@ def _species_to_pretty(s: pd.Series) -> pd.Series:
 
 def _ensure_numeric(df: pd.DataFrame, cols) -> pd.DataFrame:
     """ Ensure specified columns are numeric, and if they aren't, convert them"""
-    d = df.copy()
+    d = _working_copy(df)
     for c in cols:
         if c in d.columns:
             d[c] = pd.to_numeric(d[c], errors="coerce")
@@ -129,7 +137,7 @@ def _ensure_numeric(df: pd.DataFrame, cols) -> pd.DataFrame:
 
 def _compute_prec_rec_f1(df: pd.DataFrame) -> pd.DataFrame:
     """ Compute precision, recall, f1 from tp, fp, fn columns"""
-    d = df.copy()
+    d = _working_copy(df)
     for c in ("tp","fp","fn"):
         if c not in d.columns:
             raise ValueError(f"Missing column: {c}")
@@ -148,7 +156,7 @@ def _compute_prec_rec_f1(df: pd.DataFrame) -> pd.DataFrame:
 
 def _ensure_prf_metrics(df: pd.DataFrame) -> pd.DataFrame:
     """ Ensure precision, recall, f1 columns exist and are numeric and in [0,1]"""
-    d = df.copy()
+    d = _working_copy(df)
     have = set(d.columns)
 
     if "precision" not in have and "specificity" in have:
@@ -174,24 +182,24 @@ def _ensure_prf_metrics(df: pd.DataFrame) -> pd.DataFrame:
 
 def _bench_abinitio_slice_for_model(df: pd.DataFrame, model: str) -> pd.DataFrame:
     """ Get AUGUSTUS ab initio + SNAP rows for a given model (arabidopsis or rice) at 0% mut rate"""
-    d = df.copy()
+    d = _working_copy(df)
     d["species_pretty"] = _species_to_pretty(d["species"])
-    d = d[d["mut_rate"] == 0.0].copy()
+    d = _working_copy(d[d["mut_rate"] == 0.0])
     d["hint_l"] = _normalise_hint_column(d)
 
     m_aug_ab = _is_abinitio_aug(d)
-    aug = d[m_aug_ab].copy()
+    aug = _working_copy(d[m_aug_ab])
     aug["model_used"] = np.where(aug["species"] == "oryza_sativa", "rice", "arabidopsis")
     aug = aug[aug["model_used"] == model]
 
-    snap = d[d["tool"].astype(str).str.lower().eq("snap")].copy()
+    snap = _working_copy(d[d["tool"].astype(str).str.lower().eq("snap")])
     snap["train_species_norm"] = snap.get("train_species", "").astype(str).str.lower().str.strip()
     ok = {"arabidopsis", "arabidopsis_thaliana", "a_thaliana"} if model == "arabidopsis" else {"rice", "oryza_sativa", "o_sativa"}
     snap = snap[snap["train_species_norm"].isin(ok)]
 
     def _keep_cols(x: pd.DataFrame, name: str) -> pd.DataFrame:
         cols = ["species", "species_pretty", "precision", "recall", "f1"]
-        y = x[cols].copy()
+        y = _working_copy(x[cols])
         y["tool_pretty"] = name
         return y
 
@@ -205,7 +213,7 @@ def _geanno_slice_for_models(geanno_df: pd.DataFrame, model_keys: List[str], lab
     """ Get GeAnno rows for specified models, relabelled """
     rows = []
     for key, lab in zip(model_keys, labels):
-        sub = geanno_df[geanno_df["tool_pretty"].astype(str).str.contains(key, case=False, regex=False)].copy()
+        sub = _working_copy(geanno_df[geanno_df["tool_pretty"].astype(str).str.contains(key, case=False, regex=False)])
         if sub.empty:
             continue
         sub = sub[["species", "species_pretty", "precision", "recall", "f1"]]
@@ -214,6 +222,15 @@ def _geanno_slice_for_models(geanno_df: pd.DataFrame, model_keys: List[str], lab
     return _concat_nonempty(rows, cols=["species","species_pretty","precision","recall","f1","tool_pretty"])
 
 
+def _pivot_dense(df: pd.DataFrame, index: str, columns: str, values: str,
+                 index_order: List, columns_order: List, aggfunc: str = "mean") -> np.ndarray:
+    """ Pivot once into a dense (index x columns) float matrix, NaN where a cell has no rows"""
+    if df.empty or values not in df.columns:
+        return np.full((len(index_order), len(columns_order)), np.nan)
+    piv = df.pivot_table(index=index, columns=columns, values=values, aggfunc=aggfunc, observed=True)
+    return piv.reindex(index=index_order, columns=columns_order).to_numpy(dtype=float)
+
+
 def _concat_nonempty(dfs: Iterable[pd.DataFrame], cols: Optional[List[str]] = None) -> pd.DataFrame:
     """ Concatenate only non-empty dataframes from an iterable"""
     parts = [x for x in dfs if x is not None and not x.empty]
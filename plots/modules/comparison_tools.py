@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import Tuple
 
 from modules.common import GEANNO_STEP, GEANNO_THR, GEANNO_WIN, TOOL_MAP, _compute_prec_rec_f1, \
-                    _ensure_numeric, _ensure_prf_metrics, _species_to_pretty
+                    _ensure_numeric, _ensure_prf_metrics, _species_to_pretty, _working_copy
 
 from modules.load_save import save_table_csv
 
@@ -20,7 +20,7 @@ def export_geanno_models_table_csv(
     """ Precision/Recall/F1-score table for GeAnno models """
 
     out_dir.mkdir(parents=True, exist_ok=True)
-    d = df_geanno.copy()
+    d = _working_copy(df_geanno)
 
     d = _ensure_numeric(d, ["window","step","threshold","mut_rate","tp","fp","fn",
                             "precision","recall","f1"])
@@ -30,7 +30,7 @@ def export_geanno_models_table_csv(
         (d.get("threshold", threshold) == threshold) &
         (d.get("mut_rate", mut_rate).fillna(0) == mut_rate)
     )
-    d = d[sel].copy()
+    d = _working_copy(d[sel])
     if d.empty:
         raise RuntimeError("No GeAnno rows at the requested fixed operating point.")
 
@@ -53,10 +53,10 @@ def export_geanno_models_table_csv(
         "GeneMark model",
         "M. esculenta model",
     ]
-    d = d[d["model_base"].isin(model_order)].copy()
+    d = _working_copy(d[d["model_base"].isin(model_order)])
 
     agg = (
-        d.groupby(["species_pretty","model_base","is_pca"], as_index=False)
+        d.groupby(["species_pretty","model_base","is_pca"], as_index=False, observed=True)
          .agg(precision=("precision","mean"),
               recall=("recall","mean"),
               f1=("f1","mean"))
@@ -86,7 +86,7 @@ def export_geanno_models_table_csv(
 
     blocks = []
     for metric, mlabel in (("precision","Precision"), ("recall","Recall"), ("f1","F1-score")):
-        piv = (agg.pivot_table(index="species_pretty", columns="column", values=metric, aggfunc="mean")
+        piv = (agg.pivot_table(index="species_pretty", columns="column", values=metric, aggfunc="mean", observed=True)
                  .reindex(index=species_present, columns=final_cols))
         piv.insert(0, "Metric", mlabel)
         piv.insert(1, "Species", piv.index)
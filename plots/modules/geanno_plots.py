@@ -14,7 +14,7 @@ from modules.load_save import save_table_csv
 
 from modules.common import _compute_prec_rec_f1, _concat_nonempty, _ensure_numeric,\
                         _ensure_prf_metrics, _filter_geanno_fixed_config, _is_abinitio_aug, \
-                        _normalise_hint_column, _species_to_pretty, _subset_geanno_mesculenta_any
+                        _normalise_hint_column, _pivot_dense, _species_to_pretty, _subset_geanno_mesculenta_any, _working_copy
 from modules.time_ram import _coerce_ram_to_gb
 
 GEANNO_WIN = 1500
@@ -73,11 +73,9 @@ def _plot_metrics_triple(g: pd.DataFrame, thr_axis: np.ndarray, tools: List[str]
     legend_lines = []
     for col_idx, (metric, title) in enumerate(metrics):
         ax = axes[col_idx]
+        Y = _pivot_dense(g, "tool_pretty", "threshold", metric, tools, list(thr_axis), aggfunc="first")
         for i, t in enumerate(tools):
-            sub = g[g["tool_pretty"] == t]
-            y = [sub.loc[sub["threshold"] == thr, metric].values[0] if thr in set(sub["threshold"]) else np.nan
-                 for thr in thr_axis]
-            (ln,) = ax.plot(thr_axis, y, marker="o", linewidth=1.8, markersize=6, label=t, color=cmap(i % cmap.N))
+            (ln,) = ax.plot(thr_axis, Y[i], marker="o", linewidth=1.8, markersize=6, label=t, color=cmap(i % cmap.N))
             if col_idx == 0:
                 legend_lines.append(ln)
         ax.set_title(title, fontsize=14)
@@ -99,10 +97,10 @@ def export_threshold_curves_and_tripanel(
 ) -> None:
     """Export mean metrics by tool and threshold at a fixed window/step and mutation rate, plus a 3-panel figure."""
     dd = _ensure_numeric(d, ["window","step","threshold","tp","fp","fn","mut_rate"])
-    df = dd[(dd["window"] == window) & (dd["step"] == step) & (dd["mut_rate"].fillna(0) == mut_rate)].copy()
+    df = _working_copy(dd[(dd["window"] == window) & (dd["step"] == step) & (dd["mut_rate"].fillna(0) == mut_rate)])
     df = _compute_prec_rec_f1(df)
 
-    g = (df.groupby(["tool_pretty","threshold"], as_index=False)
+    g = (df.groupby(["tool_pretty","threshold"], as_index=False, observed=True)
            .agg(precision=("precision","mean"),
                 recall=("recall","mean"),
                 f1=("f1","mean"))
@@ -115,13 +113,13 @@ def export_threshold_curves_and_tripanel(
 
 def export_window_step_by_species_mut0(d_perf: pd.DataFrame, out_dir: Path) -> None:
     """Table: mean metrics and resources by species, window and step at mut_rate=0"""
-    dd = _coerce_ram_to_gb(d_perf.copy())
+    dd = _coerce_ram_to_gb(_working_copy(d_perf))
 
     dd = _ensure_numeric(dd, ["tp","fp","fn","time_sec","ram_gb","window","step","sensitivity","specificity","mut_rate"])
-    dd = dd[dd["mut_rate"].fillna(0) == 0].copy()
+    dd = _working_copy(dd[dd["mut_rate"].fillna(0) == 0])
     dd = _compute_prec_rec_f1(dd)
 
-    agg = (dd.groupby(["species","species_pretty","window","step"], as_index=False)
+    agg = (dd.groupby(["species","species_pretty","window","step"], as_index=False, observed=True)
              .agg(
                  n_runs           = ("time_sec", "size"),
                  mean_time_sec    = ("time_sec","mean"),
@@ -151,30 +149,30 @@ def export_all_tools_table_csv(
     def _pct_round(s: pd.Series) -> pd.Series:
         return (pd.to_numeric(s, errors="coerce") * 100.0).round(decimals)
 
-    b = df_bench.copy()
+    b = _working_copy(df_bench)
     b["tool_l"] = b["tool"].astype(str).str.lower().str.strip()
     b["hint_l"] = _normalise_hint_column(b)
     b["species_pretty"] = _species_to_pretty(b["species"])
 
     b = _ensure_prf_metrics(b)
     if "mut_rate" in b.columns:
-        b = b[pd.to_numeric(b["mut_rate"], errors="coerce").fillna(0) == mut_rate].copy()
+        b = _working_copy(b[pd.to_numeric(b["mut_rate"], errors="coerce").fillna(0) == mut_rate])
 
-    aug_ab = b[_is_abinitio_aug(b)][["species","species_pretty","precision","recall","f1"]].copy()
+    aug_ab = _working_copy(b[_is_abinitio_aug(b)][["species","species_pretty","precision","recall","f1"]])
     aug_ab["column"] = "AUGUSTUS (ab initio)"
 
-    snap = b[b["tool_l"].eq("snap")].copy()
+    snap = _working_copy(b[b["tool_l"].eq("snap")])
     snap["train_species_norm"] = snap.get("train_species","").astype(str).str.lower().str.strip()
 
     snap_arab = snap[snap["train_species_norm"].isin({"arabidopsis","arabidopsis_thaliana","a_thaliana"})]
-    snap_arab = snap_arab[["species","species_pretty","precision","recall","f1"]].copy()
+    snap_arab = _working_copy(snap_arab[["species","species_pretty","precision","recall","f1"]])
     snap_arab["column"] = "SNAP (A. thaliana*)"
 
     snap_rice = snap[snap["train_species_norm"].isin({"oryza_sativa","o_sativa","rice"})]
-    snap_rice = snap_rice[["species","species_pretty","precision","recall","f1"]].copy()
+    snap_rice = _working_copy(snap_rice[["species","species_pretty","precision","recall","f1"]])
     snap_rice["column"] = "SNAP (O. sativa*)"
 
-    gmes = b[b["tool_l"].eq("genemarkes")][["species","species_pretty","precision","recall","f1"]].copy()
+    gmes = _working_copy(b[b["tool_l"].eq("genemarkes")][["species","species_pretty","precision","recall","f1"]])
     gmes["column"] = "GeneMark-ES"
 
     ab_parts = [aug_ab, snap_arab, snap_rice, gmes]
@@ -185,7 +183,7 @@ def export_all_tools_table_csv(
         b["tool_l"].isin({"genemarkep","genemarketp","gemoma"}) |
         (b["tool_l"].eq("augustus") & b["hint_l"].notna() & ~b["hint_l"].eq("abinitio"))
     )
-    ev = b[is_ev & b["hint_l"].isin(allowed_hints)].copy()
+    ev = _working_copy(b[is_ev & b["hint_l"].isin(allowed_hints)])
     if not ev.empty:
         ev["tool_pretty"] = ev["tool_l"].map({
             "genemarkep":  "GeneMark-EP+",
@@ -194,25 +192,25 @@ def export_all_tools_table_csv(
             "augustus":    "AUGUSTUS (hints)",
         }).fillna(ev["tool"])
         per_hint = (
-            ev.groupby(["species","species_pretty","tool_pretty","hint_l"], as_index=False)
+            ev.groupby(["species","species_pretty","tool_pretty","hint_l"], as_index=False, observed=True)
               [["precision","recall","f1"]].mean()
         )
         ev_macro = (
-            per_hint.groupby(["species","species_pretty","tool_pretty"], as_index=False)
+            per_hint.groupby(["species","species_pretty","tool_pretty"], as_index=False, observed=True)
                     [["precision","recall","f1"]].mean()
         )
         ev_macro = ev_macro.rename(columns={"tool_pretty":"column"})
     else:
         ev_macro = pd.DataFrame(columns=["species","species_pretty","precision","recall","f1","column"])
 
-    g = _ensure_prf_metrics(df_geanno.copy())
+    g = _ensure_prf_metrics(_working_copy(df_geanno))
     g = _filter_geanno_fixed_config(g, win=window, step=step, thr=threshold)
-    g = _subset_geanno_mesculenta_any(g).copy()
+    g = _working_copy(_subset_geanno_mesculenta_any(g))
     if "mut_rate" in g.columns:
-        g = g[pd.to_numeric(g["mut_rate"], errors="coerce").fillna(0) == mut_rate].copy()
+        g = _working_copy(g[pd.to_numeric(g["mut_rate"], errors="coerce").fillna(0) == mut_rate])
     if not g.empty:
         g["species_pretty"] = _species_to_pretty(g["species"])
-        ge = (g.groupby(["species","species_pretty"], as_index=False)
+        ge = (g.groupby(["species","species_pretty"], as_index=False, observed=True)
                 [["precision","recall","f1"]].mean())
         ge["column"] = "GeAnno (M. esculenta, PCA)"
     else:
@@ -236,7 +234,7 @@ def export_all_tools_table_csv(
 
     blocks = []
     for metric, mlabel in (("precision","Precision"), ("recall","Recall"), ("f1","F1-score")):
-        piv = (comb.pivot_table(index="species_pretty", columns="column", values=metric, aggfunc="mean")
+        piv = (comb.pivot_table(index="species_pretty", columns="column", values=metric, aggfunc="mean", observed=True)
                      .reindex(index=species_present, columns=present_cols))
 
         piv = piv.apply(_pct_round)
@@ -0,0 +1,57 @@
+import warnings
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import matplotlib.pyplot as plt
+
+from pathlib import Path
+from typing import Optional
+
+from modules.load_save import save_table_csv
+from modules.common import TOOL_MAP, TOOL_MAPPING, _filter_geanno_fixed_config, _map_snap_model, _species_to_pretty, _working_copy
+
+def _gene_level_label(row: pd.Series) -> str:
+    """ Tool name with its hint, SNAP training species or GeAnno model"""
+    if row.get("geanno", False):
+        return f"GeAnno ({TOOL_MAP.get(row['tool'], row['tool'])})"
+    name = TOOL_MAPPING.get(row["tool"], row["tool"])
+    if row["tool"] == "snap":
+        return f"{name} ({_map_snap_model(row.get('train_species'))})"
+    hint = row.get("hint")
+    return f"{name} ({hint})" if isinstance(hint, str) and hint else \
+        f"{name} (ab initio)" if row["tool"] == "augustus" else name
+
+def plot_gene_level_heatmaps(df: pd.DataFrame, out_dir: Path, overlap: float = 0.5, dpi: int = 300) -> Optional[Path]:
+    """ Gene-level F1, split rate and merge rate per tool and species (original genomes, one overlap threshold)"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    d = _working_copy(df[np.isclose(pd.to_numeric(df["overlap"], errors="coerce"), overlap)
+                         & (pd.to_numeric(df["mut_rate"], errors="coerce") == 0)])
+    if d.empty:
+        warnings.warn(f"No gene-level rows at overlap {overlap} on the original genomes.")
+        return None
+    # GeAnno at its reference window, step and threshold only
+    d = pd.concat([d[~d["geanno"]], _filter_geanno_fixed_config(d[d["geanno"]])], ignore_index=True)
+
+    d["tool_pretty"] = d.apply(_gene_level_label, axis=1)
+    d["species_pretty"] = _species_to_pretty(d["species"])
+    cols = ["tool_pretty", "species", "species_pretty", "ref_genes", "pred_genes", "recall", "precision", "f1",
+            "split_ref", "merged_pred", "split_rate", "merge_rate"]
+    save_table_csv(d[cols].sort_values(["tool_pretty", "species"]), out_dir / "csv/gene_level_summary.csv")
+
+    panels = [("f1", "Gene-level F1-score", "viridis"),
+              ("split_rate", "Reference genes split", "rocket_r"),
+              ("merge_rate", "Predicted genes merging several", "rocket_r")]
+    n_tools = d["tool_pretty"].nunique()
+    fig, axes = plt.subplots(len(panels), 1, figsize=(10, 0.45 * n_tools * len(panels) + 3), dpi=dpi)
+    for ax, (metric, title, cmap) in zip(axes, panels):
+        piv = d.pivot_table(index="tool_pretty", columns="species_pretty", values=metric, aggfunc="mean")
+        sns.heatmap(piv, ax=ax, annot=True, fmt=".3f", cmap=cmap, cbar_kws={"shrink": 0.9})
+        ax.set_title(f"{title} (reciprocal overlap ≥ {overlap:g})")
+        ax.set_xlabel(""); ax.set_ylabel("")
+
+    plt.tight_layout()
+    out = out_dir / f"gene_level_overlap_{overlap:g}.png"
+    fig.savefig(out, dpi=dpi)
+    plt.close(fig)
+    return out
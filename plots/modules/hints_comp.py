@@ -10,7 +10,7 @@ from matplotlib.lines import Line2D
 
 from modules.load_save import save_table_csv
 from modules.common import _ensure_prf_metrics, _filter_geanno_fixed_config,\
-                         _normalise_hint_column, _species_to_pretty, _subset_geanno_mesculenta_any
+                         _normalise_hint_column, _species_to_pretty, _subset_geanno_mesculenta_any, _working_copy
 
 
 def plot_evidence_species_by_hints_plus_geanno(
@@ -28,7 +28,7 @@ def plot_evidence_species_by_hints_plus_geanno(
     """
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    d = df_bench.copy()
+    d = _working_copy(df_bench)
     d["tool_l"] = d["tool"].astype(str).str.lower().str.strip()
     d["hint_l"] = _normalise_hint_column(d)
     d["species_pretty"] = _species_to_pretty(d["species"])
@@ -38,7 +38,7 @@ def plot_evidence_species_by_hints_plus_geanno(
         d["tool_l"].isin({"genemarkep", "genemarketp", "gemoma"}) |
         (d["tool_l"].eq("augustus") & d["hint_l"].notna() & ~d["hint_l"].eq("abinitio"))
     )
-    ev = d[is_ev & d["hint_l"].isin(allowed_hints)].copy()
+    ev = _working_copy(d[is_ev & d["hint_l"].isin(allowed_hints)])
     if ev.empty:
         raise RuntimeError("No evidence-based rows with hints in {'genus','order','far'} found in df_bench.")
 
@@ -50,11 +50,11 @@ def plot_evidence_species_by_hints_plus_geanno(
     }).fillna(ev["tool"])
 
     ev_agg = (
-        ev.groupby(["species", "species_pretty", "tool_pretty", "hint_l"], as_index=False)
+        ev.groupby(["species", "species_pretty", "tool_pretty", "hint_l"], as_index=False, observed=True)
           [["precision", "recall", "f1"]].mean()
     )
 
-    g = _ensure_prf_metrics(df_geanno.copy())
+    g = _ensure_prf_metrics(_working_copy(df_geanno))
     g = _filter_geanno_fixed_config(g)
     g = _subset_geanno_mesculenta_any(g)
     if g.empty:
@@ -62,7 +62,7 @@ def plot_evidence_species_by_hints_plus_geanno(
 
     g["species_pretty"] = _species_to_pretty(g["species"])
     ge_agg = (
-        g.groupby(["species", "species_pretty"], as_index=False)[["precision", "recall", "f1"]]
+        g.groupby(["species", "species_pretty"], as_index=False, observed=True)[["precision", "recall", "f1"]]
          .mean()
          .assign(tool_pretty="GeAnno (M. esculenta, PCA)")
     )
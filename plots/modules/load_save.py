@@ -1,11 +1,35 @@
+import json
+import sqlite3
+
 from pathlib import Path
+from typing import Optional
+
 import numpy as np
 import pandas as pd
 
 from modules.common import SPECIES_PRETTY, TOOL_MAP
 
+# metric CSVs may be compressed (COMPRESS_RESULTS in extract_all_values.sh / scheduler.py)
+COMPRESSION = {".gz": "gzip", ".bgz": "gzip", ".zst": "zstd"}
+
+def strip_compression(fname: str) -> str:
+    """ File name without its compression suffix: x.csv.gz -> x.csv"""
+    suffix = Path(fname).suffix
+    return fname[:-len(suffix)] if suffix in COMPRESSION else fname
+
+def csv_files(csv_dir: Path, pattern: str = "*.csv"):
+    """ Files matching `pattern`, plain or compressed (.gz, .bgz, .zst)"""
+    files = list(csv_dir.glob(pattern))
+    for suffix in COMPRESSION:
+        files += csv_dir.glob(pattern + suffix)
+    return sorted(files)
+
+def load_table_csv(fp: Path, **kwargs) -> pd.DataFrame:
+    """ pd.read_csv for plain or compressed CSVs (BGZF is read as gzip)"""
+    return pd.read_csv(fp, compression=COMPRESSION.get(Path(fp).suffix, "infer"), **kwargs)
+
 def parse_filename(fname: str):
-    stem = Path(fname).stem
+    stem = Path(strip_compression(fname)).stem
     parts = stem.split("_")
     if len(parts) < 6:
         raise ValueError(f"Filename {fname} has <6 tokens - cannot parse.")
@@ -78,16 +102,173 @@ def parse_filename(fname: str):
             ram_mb=int(parts[6]),
         )
 
-def load_results(csv_dir: Path) -> pd.DataFrame:
+LEDGER_KEYS = ["tool", "species", "mut_rate", "hint", "train_species"]
+GEANNO_LEDGER_KEYS = ["tool", "species", "mut_rate", "window", "step"]
+
+# resource columns copied from the ledger (wall_sec/max_rss_kb are renamed to time_sec/ram_kb)
+LEDGER_RESOURCES = ["time_sec", "ram_kb", "cpu_sec", "user_sec", "sys_sec",
+                    "vol_ctx_switches", "invol_ctx_switches", "major_faults", "minor_faults",
+                    "read_bytes", "write_bytes"]
+
+# spread of repeated trials (monitor.py --trials), kept next to the per-configuration medians
+TRIAL_SPREAD = [f"{c}_{q}" for c in ("time_sec", "ram_kb", "cpu_sec") for q in ("q1", "q3")] + ["n_trials"]
+
+def _summarise_trials(d: pd.DataFrame, keys) -> pd.DataFrame:
+    """
+    One row per configuration from its latest batch of trials: resource columns become the
+    median over the trials, with the quartiles of time, RAM and CPU time in TRIAL_SPREAD.
+    """
+    if d.empty:
+        return d.assign(**{c: pd.Series(dtype=float) for c in TRIAL_SPREAD})
+    d = d.sort_values("run_id").copy()
+    d["_cfg"] = d[keys].astype(str).agg("|".join, axis=1)
+    latest_batch = d.groupby("_cfg")["batch"].last()
+    d = d[d["batch"] == d["_cfg"].map(latest_batch)]
+
+    grp = d.groupby("_cfg", sort=False)
+    out = grp.tail(1).set_index("_cfg")
+    out[LEDGER_RESOURCES] = grp[LEDGER_RESOURCES].median()
+    for c in ("time_sec", "ram_kb", "cpu_sec"):
+        out[f"{c}_q1"] = grp[c].quantile(0.25)
+        out[f"{c}_q3"] = grp[c].quantile(0.75)
+    out["n_trials"] = grp.size()
+    return out.reset_index(drop=True)
+
+def load_ledger(db_path: Path, latest_only: bool = True, mode: Optional[str] = None) -> pd.DataFrame:
+    """
+    Successful runs from the SQLite run ledger, keyed like parse_filename (tool, species, mut_rate, hint, train_species).
+    With latest_only, each configuration is summarised over the trials of its latest batch.
+    `mode` selects experiment runs (e.g. "thread_scaling"); by default only the regular benchmark runs are returned.
+    """
+    con = sqlite3.connect(db_path)
+    try:
+        d = pd.read_sql_query("SELECT * FROM runs WHERE exit_code = 0", con)
+    finally:
+        con.close()
+
+    d = d.rename(columns={"wall_sec": "time_sec", "max_rss_kb": "ram_kb"})
+    for c in LEDGER_RESOURCES:
+        d[c] = pd.to_numeric(d[c], errors="coerce") if c in d.columns else np.nan
+    d["train_species"] = np.where(d["tool"] == "snap", d["model"], None)
+    # AUGUSTUS ab initio rows carry no hint in the compiled filenames
+    d.loc[(d["tool"] == "augustus") & (d["hint"] == "abinitio"), "hint"] = None
+
+    params = d["params"].fillna("{}").map(json.loads)
+    d["window"] = pd.to_numeric(params.map(lambda p: p.get("window")), errors="coerce")
+    d["step"]   = pd.to_numeric(params.map(lambda p: p.get("step")), errors="coerce")
+    d["threads"] = pd.to_numeric(params.map(lambda p: p.get("threads")), errors="coerce")
+    d["mode"] = params.map(lambda p: p.get("mode"))
+    d = (d[d["mode"].isna()] if mode is None else d[d["mode"] == mode]).copy()
+    # runs recorded before --trials existed are batches of one
+    d["batch"] = params.map(lambda p: p.get("batch")).fillna(d["run_id"].astype(str))
+
+    if latest_only:
+        # model separates the GeAnno models, which share every other key
+        d = _summarise_trials(d, LEDGER_KEYS + ["model", "window", "step"])
+    return d
+
+def load_thread_scaling(db_path: Path) -> pd.DataFrame:
+    """ Every successful run of run_thread_scaling.sh (one row per tool, species, hint, threads and repeat)"""
+    d = load_ledger(db_path, latest_only=False, mode="thread_scaling")
+    return d.dropna(subset=["threads", "time_sec"]).reset_index(drop=True)
+
+def load_size_scaling(db_path: Path) -> pd.DataFrame:
+    """ Every successful run of run_size_scaling.sh, with the subsample fraction and its size in bp"""
+    d = load_ledger(db_path, latest_only=False, mode="size_scaling")
+    params = d["params"].fillna("{}").map(json.loads)
+    for key in ("fraction", "input_bp", "genome_bp"):
+        d[key] = pd.to_numeric(params.map(lambda p: p.get(key)), errors="coerce")
+    return d.dropna(subset=["input_bp", "time_sec"]).reset_index(drop=True)
+
+def _attach_ledger_resources(d: pd.DataFrame, runs: pd.DataFrame, keys) -> pd.DataFrame:
+    """ Left-join ledger resource columns on `keys`; ledger values win over the ones already in `d`."""
+    runs = runs[keys + LEDGER_RESOURCES + [c for c in TRIAL_SPREAD if c in runs.columns]].copy()
+    for k in keys:
+        if k not in d.columns:
+            d[k] = np.nan
+        runs[k] = runs[k].where(runs[k].notna(), np.nan)
+    d = d.merge(runs, on=keys, how="left", suffixes=("", "_ledger"))
+    for c in LEDGER_RESOURCES + TRIAL_SPREAD:
+        if f"{c}_ledger" in d.columns:
+            d[c] = d[f"{c}_ledger"].fillna(d[c])
+            d = d.drop(columns=[f"{c}_ledger"])
+    return d
+
+# strand-agnostic overlap, written next to gene_nucleotide by obtain_metrics and batch_evaluate.py
+UNSTRANDED_LABEL = "gene_nucleotide_unstranded"
+NUCLEOTIDE_COUNTS = ["tp", "fp", "fn", "sensitivity", "specificity"]
+UNSTRANDED_METRICS = ["precision_unstranded", "recall_unstranded", "f1_unstranded"]
+
+def _with_unstranded(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    gene_nucleotide rows, with the gene_nucleotide_unstranded row of the same prediction as
+    <count>_unstranded columns and precision/recall/f1_unstranded in [0, 1] (NaN when absent).
+    """
+    label = df["label"].astype(str).str.strip().str.lower()
+    out = df[label == "gene_nucleotide"].assign(label="gene_nucleotide")
+    uns = df[label == UNSTRANDED_LABEL]
+    keys = [c for c in df.columns if c not in NUCLEOTIDE_COUNTS + ["label"]]
+    if uns.empty:
+        out = out.assign(**{f"{c}_unstranded": np.nan for c in NUCLEOTIDE_COUNTS})
+    else:
+        uns = uns[keys + NUCLEOTIDE_COUNTS].rename(columns={c: f"{c}_unstranded" for c in NUCLEOTIDE_COUNTS})
+        out = out.merge(uns, on=keys, how="left") if keys else out.assign(
+            **{c: uns[c].iloc[0] for c in uns.columns})
+
+    p = out["specificity_unstranded"] / 100.0
+    r = out["sensitivity_unstranded"] / 100.0
+    out["precision_unstranded"] = p
+    out["recall_unstranded"] = r
+    out["f1_unstranded"] = 2 * p * r / (p + r).replace(0, np.nan)
+    return out
+
+# compact=True in the loaders: text columns become categoricals, rates float32 and counts int32 (int64 if needed);
+# keys compared for equality (mut_rate, window, step, threshold) stay float64
+COMPACT_FLOATS = ["sensitivity", "specificity", "precision", "recall", "f1", "auc_roc", "auc_prc"]
+COMPACT_COUNTS = ["tp", "fp", "fn"]
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """ Bytes held by a frame, strings included"""
+    return int(df.memory_usage(deep=True).sum())
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """ The frame with categorical text columns, float32 rates and the smallest of int32/int64 for counts"""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        base = col[:-len("_unstranded")] if col.endswith("_unstranded") else col
+        if s.dtype == object:
+            s = s.astype("category")
+        elif base in COMPACT_FLOATS and pd.api.types.is_float_dtype(s):
+            s = s.astype(np.float32)
+        elif base in COMPACT_COUNTS and pd.api.types.is_numeric_dtype(s) and s.notna().all() \
+                and (s == np.floor(s)).all():
+            fits = s.empty or (s.min() >= np.iinfo(np.int32).min and s.max() <= np.iinfo(np.int32).max)
+            s = s.astype(np.int32 if fits else np.int64)
+        out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+def _compacted(d: pd.DataFrame, name: str) -> pd.DataFrame:
+    before = frame_memory(d)
+    d = compact_frame(d)
+    print(f"{name}: {len(d)} rows, {before / 2**20:.2f} MB -> {frame_memory(d) / 2**20:.2f} MB (compact)")
+    return d
+
+def load_results(csv_dir: Path, ledger_db: Optional[Path] = None, compact: bool = False) -> pd.DataFrame:
+    """
+    Gene-nucleotide metrics of every compiled CSV. If a run ledger is given, time and peak RSS
+    come from the matching ledger rows instead of the values encoded in the filenames.
+    With compact=True the frame uses compact dtypes (compact_frame) and its memory before/after is printed.
+    """
     frames = []
-    for fp in csv_dir.glob("*.csv"):
+    for fp in csv_files(csv_dir):
         meta = parse_filename(fp.name)
-        df = pd.read_csv(fp)
+        df = load_table_csv(fp)
 
         if "label" not in df.columns:
             continue
-        df["label"] = df["label"].astype(str).str.strip().str.lower()
-        df = df[df["label"] == "gene_nucleotide"]
+        # the strand-agnostic row of the same file becomes the *_unstranded columns
+        df = _with_unstranded(df)
         if df.empty:
             continue
 
@@ -98,7 +279,9 @@ def load_results(csv_dir: Path) -> pd.DataFrame:
 
         df["recall"] = df["sensitivity"]
         df["f1"] = 2 * df.specificity * df.sensitivity / (df.specificity + df.sensitivity).replace(0, np.nan)
-        df.fillna(0, inplace=True)
+        # only the numbers: hint/train_species of a file are never missing, but 0 is not a hint either
+        stranded = [c for c in df.select_dtypes("number").columns if not c.endswith("_unstranded")]
+        df[stranded] = df[stranded].fillna(0)
         frames.append(df)
 
     if not frames:
@@ -110,20 +293,35 @@ def load_results(csv_dir: Path) -> pd.DataFrame:
         if col in dataset.columns:
             dataset[col] = dataset[col] / 100.0
 
-    return dataset
+    if ledger_db is not None:
+        dataset = _attach_ledger_resources(dataset, load_ledger(ledger_db), LEDGER_KEYS)
+        # filenames carry %M (KB) under the historical ram_mb name
+        dataset["ram_kb"] = dataset["ram_kb"].fillna(dataset["ram_mb"])
+
+    return _compacted(dataset, "load_results") if compact else dataset
 
-def load_geanno(csv_dir: Path) -> pd.DataFrame:
+def load_geanno(csv_dir: Path, ledger_db: Optional[Path] = None, compact: bool = False) -> pd.DataFrame:
+    """
+    All GeAnno metric CSVs; with a run ledger, resource columns are joined per (model, species, mut_rate, window, step).
+    With compact=True the frame uses compact dtypes and __file is a category (one string per file, a code per row).
+    """
     frames = []
 
-    for p in csv_dir.glob("*.csv"):
-        df = pd.read_csv(p)
-        df["__file"] = p.name
+    files = csv_files(csv_dir)
+    for i, p in enumerate(files):
+        df = load_table_csv(p)
+        df["__file"] = i if compact else p.name
         frames.append(df)
 
     if not frames:
         raise SystemExit("No CSVs found.")
     
     d = pd.concat(frames, ignore_index=True)
+    if compact:
+        d["__file"] = pd.Categorical.from_codes(d["__file"], [p.name for p in files])
+    if "label" in d.columns:
+        # batch_evaluate.py tables hold a gene_nucleotide and a gene_nucleotide_unstranded row per prediction
+        d = _with_unstranded(d)
     d = d.rename(columns={
         "model": "tool",
         "time": "time_sec",
@@ -137,8 +335,53 @@ def load_geanno(csv_dir: Path) -> pd.DataFrame:
 
     d["tool_pretty"] = d["tool"].map(TOOL_MAP).fillna(d["tool"])
 
+    if ledger_db is not None:
+        runs = load_ledger(ledger_db)
+        runs = runs[runs["tool"] == "geanno"].assign(tool=lambda r: r["model"])
+        d = _attach_ledger_resources(d, runs, GEANNO_LEDGER_KEYS)
+
+    return _compacted(d, "load_geanno") if compact else d
+
+def load_gene_level(csv_dir: Path, geanno_dir: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Gene-level matching rows (metrics/gene_match.py): one per prediction and reciprocal-overlap threshold,
+    from the <name>_genes.csv files of the compiled results and, optionally, the GeAnno gene_level tables.
+    """
+    frames = []
+    for fp in csv_files(csv_dir, "*_genes.csv"):
+        name = strip_compression(fp.name)
+        meta = parse_filename(name[:-len("_genes.csv")] + ".csv")
+        frames.append(load_table_csv(fp).assign(**meta, geanno=False))
+    if geanno_dir is not None and geanno_dir.is_dir():
+        for fp in csv_files(geanno_dir):
+            frames.append(load_table_csv(fp).rename(columns={"model": "tool", "mutation_rate": "mut_rate"})
+                          .assign(geanno=True))
+    if not frames:
+        return pd.DataFrame()
+
+    d = pd.concat(frames, ignore_index=True)
+    d["split_rate"] = d["split_ref"] / d["ref_genes"].replace(0, np.nan)
+    d["merge_rate"] = d["merged_pred"] / d["pred_genes"].replace(0, np.nan)
     return d
 
+def load_tracks(track_dir: Path) -> pd.DataFrame:
+    """
+    Per-bin TP/FP/FN along each sequence (batch_evaluate.py --tracks): one row per prediction, sequence and bin,
+    with the run metadata of the prediction's file name.
+    """
+    frames = []
+    for fp in sorted(track_dir.glob("*_tracks.npz")):
+        meta = parse_filename(fp.name[:-len("_tracks.npz")] + ".csv")
+        with np.load(fp) as z:
+            bin_size, offsets, counts = int(z["bin_size"]), z["offsets"], z["counts"].astype(np.int64)
+            seqids = np.repeat(z["seqids"], np.diff(offsets))
+        bins = np.arange(len(counts)) - np.repeat(offsets[:-1], np.diff(offsets))
+        frames.append(pd.DataFrame(dict(seqid=seqids, bin_start=bins * bin_size, bin_size=bin_size,
+                                        tp=counts[:, 0], fp=counts[:, 1], fn=counts[:, 2])).assign(**meta))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
 def save_table_csv(pd_table: pd.DataFrame, output: str):
     filepath = Path(output)
     filepath.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,40 @@
+import tracemalloc
+import pandas as pd
+
+from typing import Callable, Dict, List, Optional, Sequence
+
+def parse_budgets(values: Sequence[str]) -> Dict[Optional[str], float]:
+    """ ["300", "plot_ram_time_summaries_and_plots=500"] -> {None: 300, "plot_ram_time_summaries_and_plots": 500} (MB)"""
+    budgets: Dict[Optional[str], float] = {}
+    for v in values:
+        name, _, mb = v.rpartition("=")
+        budgets[name or None] = float(mb)
+    return budgets
+
+class ExporterMemory:
+    """
+    Runs exporters one by one and, when budgets are given, records the peak memory each allocates while it
+    runs (tracemalloc: Python objects and NumPy/pandas buffers, not matplotlib's C++ renderer) against its
+    budget in MB (the one given for its name, else the default one).
+    """
+
+    def __init__(self, budgets: Optional[Dict[Optional[str], float]] = None):
+        self.budgets = budgets or {}
+        self.rows: List[dict] = []
+
+    def __call__(self, exporter: Callable, *args, **kwargs):
+        if not self.budgets:
+            return exporter(*args, **kwargs)
+        name = exporter.__name__
+        tracemalloc.start()
+        try:
+            return exporter(*args, **kwargs)
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            budget = self.budgets.get(name, self.budgets.get(None))
+            self.rows.append(dict(exporter=name, peak_mb=peak / 2**20, budget_mb=budget,
+                                  over_budget=budget is not None and peak / 2**20 > budget))
+
+    def report(self) -> pd.DataFrame:
+        return pd.DataFrame(self.rows, columns=["exporter", "peak_mb", "budget_mb", "over_budget"])
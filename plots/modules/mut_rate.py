@@ -10,7 +10,7 @@ from matplotlib.lines import Line2D
 from modules.common import GEANNO_STEP, GEANNO_THR, GEANNO_WIN, _compute_prec_rec_f1, \
                         _ensure_numeric, _ensure_prf_metrics, _filter_geanno_fixed_config, \
                         _is_abinitio_aug, _map_snap_model, _normalise_hint_column, _species_to_pretty, \
-                        _subset_geanno_mesculenta_any
+                        _subset_geanno_mesculenta_any, _working_copy
 
 from modules.load_save import save_table_csv
 
@@ -22,12 +22,12 @@ def plot_geanno_vs_tools_mut_rate_per_species(
 ):
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    d = df_bench.copy()
+    d = _working_copy(df_bench)
     d["tool_l"] = d["tool"].astype(str).str.lower().str.strip()
     d["hint_l"] = _normalise_hint_column(d)
     d["species_pretty"] = _species_to_pretty(d["species"])
 
-    g = _ensure_prf_metrics(df_geanno.copy())
+    g = _ensure_prf_metrics(_working_copy(df_geanno))
     if "mut_rate" not in g.columns:
         raise RuntimeError("GeAnno dataframe must contain 'mut_rate' for mutation-rate plotting.")
     g = _filter_geanno_fixed_config(g)
@@ -40,13 +40,13 @@ def plot_geanno_vs_tools_mut_rate_per_species(
     g["species_pretty"] = _species_to_pretty(g["species"])
 
     geanno_overall = (
-        g.groupby(["species","species_pretty","mut_rate"], as_index=False)[["precision","recall","f1"]]
+        g.groupby(["species","species_pretty","mut_rate"], as_index=False, observed=True)[["precision","recall","f1"]]
         .mean()
         .assign(tool_pretty="GeAnno (M. esculenta, PCA)", setting="GeAnno")
     )
 
     is_ab = (_is_abinitio_aug(d) | d["tool_l"].eq("genemarkes") | d["tool_l"].eq("snap"))
-    ab_df = d[is_ab].copy()
+    ab_df = _working_copy(d[is_ab])
     ab_df["tool_pretty"] = np.where(
         ab_df["tool_l"].eq("augustus"), "AUGUSTUS (ab initio)",
         np.where(ab_df["tool_l"].eq("genemarkes"), "GeneMark-ES",
@@ -55,7 +55,7 @@ def plot_geanno_vs_tools_mut_rate_per_species(
                           ab_df["tool"]))
     )
     overall_ab = (
-        ab_df.groupby(["species","species_pretty","tool_pretty","mut_rate"], as_index=False)
+        ab_df.groupby(["species","species_pretty","tool_pretty","mut_rate"], as_index=False, observed=True)
              [["precision","recall","f1"]].mean()
              .assign(setting="Ab initio")
     )
@@ -63,7 +63,7 @@ def plot_geanno_vs_tools_mut_rate_per_species(
     allowed_hints = {"genus","order","far"}
     is_ev = (d["tool_l"].isin({"genemarkep","genemarketp","gemoma"})
              | (d["tool_l"].eq("augustus") & d["hint_l"].notna() & ~d["hint_l"].eq("abinitio")))
-    ev_df = d[is_ev & d["hint_l"].isin(allowed_hints)].copy()
+    ev_df = _working_copy(d[is_ev & d["hint_l"].isin(allowed_hints)])
     if not ev_df.empty:
         ev_df["tool_pretty"] = ev_df["tool_l"].map({
             "genemarkep": "GeneMark-EP+",
@@ -72,11 +72,11 @@ def plot_geanno_vs_tools_mut_rate_per_species(
             "augustus": "AUGUSTUS (hints)",
         })
         per_hint = (
-            ev_df.groupby(["species","species_pretty","tool_pretty","mut_rate","hint_l"], as_index=False)
+            ev_df.groupby(["species","species_pretty","tool_pretty","mut_rate","hint_l"], as_index=False, observed=True)
                  [["precision","recall","f1"]].mean()
         )
         overall_ev = (
-            per_hint.groupby(["species","species_pretty","tool_pretty","mut_rate"], as_index=False)
+            per_hint.groupby(["species","species_pretty","tool_pretty","mut_rate"], as_index=False, observed=True)
                     [["precision","recall","f1"]].mean()
                     .assign(setting="Evidence-based (macro)")
         )
@@ -104,7 +104,7 @@ def plot_geanno_vs_tools_mut_rate_per_species(
     metrics = [("precision","Precision"),("recall","Recall"),("f1","F1-score")]
 
     for sp_pretty in species_list:
-        sp_df = overall[overall["species_pretty"] == sp_pretty].copy()
+        sp_df = _working_copy(overall[overall["species_pretty"] == sp_pretty])
         tool_order = [t for t in tool_order_master if t in set(sp_df["tool_pretty"])]
 
         fig, axes = plt.subplots(1, 3, figsize=(15, 6), sharey=True)
@@ -157,11 +157,11 @@ def plot_geanno_vs_tools_mut_rate(df_bench: pd.DataFrame, df_geanno: pd.DataFram
     """
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    d = df_bench.copy()
+    d = _working_copy(df_bench)
     d["tool_l"] = d["tool"].astype(str).str.lower().str.strip()
     d["hint_l"] = _normalise_hint_column(d)
 
-    g = _ensure_prf_metrics(df_geanno.copy())
+    g = _ensure_prf_metrics(_working_copy(df_geanno))
     if "mut_rate" not in g.columns:
         raise RuntimeError("GeAnno dataframe must contain 'mut_rate' for mutation-rate plotting.")
 
@@ -172,24 +172,24 @@ def plot_geanno_vs_tools_mut_rate(df_bench: pd.DataFrame, df_geanno: pd.DataFram
     if not need.issubset(g.columns):
         raise RuntimeError(f"GeAnno dataframe missing columns: {need - set(g.columns)}")
 
-    geanno_overall = (g.groupby(["mut_rate"], as_index=False)[["precision","recall","f1"]].mean()
+    geanno_overall = (g.groupby(["mut_rate"], as_index=False, observed=True)[["precision","recall","f1"]].mean()
                         .assign(tool_pretty="GeAnno (M. esculenta, PCA)", setting="GeAnno"))
 
     is_ab = (_is_abinitio_aug(d) | d["tool_l"].eq("genemarkes") | d["tool_l"].eq("snap"))
-    ab_df = d[is_ab].copy()
+    ab_df = _working_copy(d[is_ab])
     ab_df["tool_pretty"] = np.where(
         ab_df["tool_l"].eq("augustus"),   "AUGUSTUS (ab initio)",
         np.where(ab_df["tool_l"].eq("genemarkes"), "GeneMark-ES",
                  np.where(ab_df["tool_l"].eq("snap"), "SNAP (" + ab_df.get("train_species","Unknown").map(_map_snap_model) + ")",
                           ab_df["tool"]))
     )
-    overall_ab = (ab_df.groupby(["tool_pretty","mut_rate"], as_index=False)[["precision","recall","f1"]].mean()
+    overall_ab = (ab_df.groupby(["tool_pretty","mut_rate"], as_index=False, observed=True)[["precision","recall","f1"]].mean()
                         .assign(setting="Ab initio"))
 
     allowed_hints = {"genus","order","far"}
     is_ev = (d["tool_l"].isin({"genemarkep","genemarketp","gemoma"})
              | (d["tool_l"].eq("augustus") & d["hint_l"].notna() & ~d["hint_l"].eq("abinitio")))
-    ev_df = d[is_ev & d["hint_l"].isin(allowed_hints)].copy()
+    ev_df = _working_copy(d[is_ev & d["hint_l"].isin(allowed_hints)])
     if not ev_df.empty:
         ev_df["tool_pretty"] = ev_df["tool_l"].map({
             "genemarkep": "GeneMark-EP+",
@@ -197,8 +197,8 @@ def plot_geanno_vs_tools_mut_rate(df_bench: pd.DataFrame, df_geanno: pd.DataFram
             "gemoma": "GeMoMa",
             "augustus": "AUGUSTUS (hints)",
         })
-        per_hint = ev_df.groupby(["tool_pretty","mut_rate","hint_l"], as_index=False)[["precision","recall","f1"]].mean()
-        overall_ev = per_hint.groupby(["tool_pretty","mut_rate"], as_index=False)[["precision","recall","f1"]].mean().assign(setting="Evidence-based (macro)")
+        per_hint = ev_df.groupby(["tool_pretty","mut_rate","hint_l"], as_index=False, observed=True)[["precision","recall","f1"]].mean()
+        overall_ev = per_hint.groupby(["tool_pretty","mut_rate"], as_index=False, observed=True)[["precision","recall","f1"]].mean().assign(setting="Evidence-based (macro)")
     else:
         overall_ev = pd.DataFrame(columns=["tool_pretty","mut_rate","precision","recall","f1","setting"])
 
@@ -260,11 +260,11 @@ def export_fixedpoint_species_model(
 ) -> None:
     """Per (species, model) metrics at a fixed operating point."""
     dd = _ensure_numeric(d, ["window","step","threshold","tp","fp","fn","mut_rate"])
-    df = dd[(dd["window"] == window) & (dd["step"] == step) &
-            (dd["threshold"] == threshold) & (dd["mut_rate"].fillna(0) == mut_rate)].copy()
+    df = _working_copy(dd[(dd["window"] == window) & (dd["step"] == step) &
+            (dd["threshold"] == threshold) & (dd["mut_rate"].fillna(0) == mut_rate)])
     df = _compute_prec_rec_f1(df)
 
-    out = (df.groupby(["species","species_pretty","tool_pretty"], as_index=False)
+    out = (df.groupby(["species","species_pretty","tool_pretty"], as_index=False, observed=True)
              .agg(precision=("precision","mean"),
                   recall=("recall","mean"),
                   f1=("f1","mean"))
@@ -294,7 +294,7 @@ def export_tool_mutation_drop_csv(
     out_dir.mkdir(parents=True, exist_ok=True)
 
 
-    d = df_bench.copy()
+    d = _working_copy(df_bench)
     d["tool_l"] = d["tool"].astype(str).str.lower().str.strip()
     d["hint_l"] = _normalise_hint_column(d)
     d = _ensure_prf_metrics(d)
@@ -302,7 +302,7 @@ def export_tool_mutation_drop_csv(
 
 
     is_ab = (_is_abinitio_aug(d) | d["tool_l"].eq("genemarkes") | d["tool_l"].eq("snap"))
-    ab = d[is_ab].copy()
+    ab = _working_copy(d[is_ab])
     def _tool_pretty_row(r) -> str:
         tl = str(r["tool"]).lower()
         if tl == "augustus":   return "AUGUSTUS (ab initio)"
@@ -311,14 +311,14 @@ def export_tool_mutation_drop_csv(
         return r["tool"]
     ab["tool_pretty"] = [_tool_pretty_row(r) for _, r in ab.iterrows()]
 
-    ab_avg = (ab.groupby(["tool_pretty","mut_rate"], as_index=False)[["precision","recall","f1"]].mean()
+    ab_avg = (ab.groupby(["tool_pretty","mut_rate"], as_index=False, observed=True)[["precision","recall","f1"]].mean()
                 .assign(tool_type="Ab initio"))
 
 
     allowed_hints = {"genus","order","far"}
     is_ev = (d["tool_l"].isin({"genemarkep","genemarketp","gemoma"})
              | (d["tool_l"].eq("augustus") & d["hint_l"].notna() & ~d["hint_l"].eq("abinitio")))
-    ev = d[is_ev & d["hint_l"].isin(allowed_hints)].copy()
+    ev = _working_copy(d[is_ev & d["hint_l"].isin(allowed_hints)])
 
     ev["tool_pretty"] = ev["tool_l"].map({
         "genemarkep":  "GeneMark-EP+",
@@ -327,19 +327,19 @@ def export_tool_mutation_drop_csv(
         "augustus":    "AUGUSTUS (hints)",
     }).fillna(ev["tool"])
 
-    ev_sp_hint = (ev.groupby(["species","tool_pretty","hint_l","mut_rate"], as_index=False)
+    ev_sp_hint = (ev.groupby(["species","tool_pretty","hint_l","mut_rate"], as_index=False, observed=True)
                     [["precision","recall","f1"]].mean())
-    ev_species_mean = (ev_sp_hint.groupby(["tool_pretty","species","mut_rate"], as_index=False)
+    ev_species_mean = (ev_sp_hint.groupby(["tool_pretty","species","mut_rate"], as_index=False, observed=True)
                        [["precision","recall","f1"]].mean())
-    ev_avg = (ev_species_mean.groupby(["tool_pretty","mut_rate"], as_index=False)
+    ev_avg = (ev_species_mean.groupby(["tool_pretty","mut_rate"], as_index=False, observed=True)
                          [["precision","recall","f1"]].mean()
                          .assign(tool_type="Evidence-based"))
 
-    g = _ensure_prf_metrics(df_geanno.copy())
+    g = _ensure_prf_metrics(_working_copy(df_geanno))
     g = _filter_geanno_fixed_config(g)
     g = _subset_geanno_mesculenta_any(g)
     if not g.empty:
-        geanno_avg = (g.groupby(["mut_rate"], as_index=False)[["precision","recall","f1"]].mean()
+        geanno_avg = (g.groupby(["mut_rate"], as_index=False, observed=True)[["precision","recall","f1"]].mean()
                         .assign(tool_pretty="GeAnno (M. esculenta, PCA)", tool_type="GeAnno"))
     else:
         geanno_avg = pd.DataFrame(columns=["tool_pretty","mut_rate","precision","recall","f1","tool_type"])
@@ -353,7 +353,7 @@ def export_tool_mutation_drop_csv(
         return None
 
     rows = []
-    for (ttype, tname), sub in overall.groupby(["tool_type","tool_pretty"]):
+    for (ttype, tname), sub in overall.groupby(["tool_type","tool_pretty"], observed=True):
         mr0 = 0.0
         mrt = _pick_target_rate(sub)
         if mrt is None:
@@ -399,11 +399,11 @@ def export_tool_by_mutrate_avg_across_species(
     """ GeAnno's tools per mutation rate averaged across species, for window 1500, step 50 and threshold 0.8 """
 
     dd = _ensure_numeric(d, ["window","step","threshold","tp","fp","fn","mut_rate"])
-    df = dd[(dd["window"] == window) & (dd["step"] == step) & (dd["threshold"] == threshold)].copy()
+    df = _working_copy(dd[(dd["window"] == window) & (dd["step"] == step) & (dd["threshold"] == threshold)])
     df = df.dropna(subset=["tp","fp","fn","mut_rate","tool_pretty"])
     df = _compute_prec_rec_f1(df)
 
-    out = (df.groupby(["tool_pretty","mut_rate"], as_index=False)
+    out = (df.groupby(["tool_pretty","mut_rate"], as_index=False, observed=True)
              .agg(precision=("precision","mean"),
                   recall=("recall","mean"),
                   f1=("f1","mean"))
@@ -6,14 +6,14 @@ import matplotlib.pyplot as plt
 from pathlib import Path
 from typing import Optional
 
-from modules.load_save import save_table_csv
-from modules.common import GEANNO_STEP, GEANNO_THR, GEANNO_WIN, _species_to_pretty
+from modules.load_save import csv_files, load_table_csv, save_table_csv, strip_compression
+from modules.common import GEANNO_STEP, GEANNO_THR, GEANNO_WIN, _species_to_pretty, _working_copy
 
 def plot_auc_heatmap_stack_geanno_mesc_vs_aug_abinitio(geanno_auc_csv: Path, bench_auc_dir: Path, out_dir: Path, dpi: int = 300) -> Optional[Path]:
     """ Two heatmaps stacked vertically, comparing AUC-ROC and AU-PRC for GeAnno (M. esculenta, PCA) vs AUGUSTUS (ab initio) """
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    ge = pd.read_csv(geanno_auc_csv)
+    ge = load_table_csv(geanno_auc_csv)
     col_lower = {c.lower(): c for c in ge.columns}
 
     model_col = col_lower.get("model", col_lower.get("tool"))
@@ -29,21 +29,21 @@ def plot_auc_heatmap_stack_geanno_mesc_vs_aug_abinitio(geanno_auc_csv: Path, ben
         ge = ge.iloc[0:0]
 
     if not ge.empty:
-        ge = ge[
+        ge = _working_copy(ge[
             (ge[model_col] == "m_esculenta_model_PCA") &
             (pd.to_numeric(ge[mr_col], errors="coerce") == 0) &
             ((win_col  is None) | (pd.to_numeric(ge[win_col],  errors="coerce") == GEANNO_WIN)) &
             ((step_col is None) | (pd.to_numeric(ge[step_col], errors="coerce") == GEANNO_STEP)) &
             ((thr_col  is None) | (pd.to_numeric(ge[thr_col],  errors="coerce") == GEANNO_THR))
-        ].copy()
+        ])
 
     ge["tool_pretty"] = "GeAnno (M. esculenta, PCA)"
     ge = ge.rename(columns={aucroc_c: "AUC_ROC", aucprc_c: "AUC_PRC"})
-    ge_part = ge[["species", "tool_pretty", "AUC_ROC", "AUC_PRC"]].copy()
+    ge_part = _working_copy(ge[["species", "tool_pretty", "AUC_ROC", "AUC_PRC"]])
 
     rows = []
-    for fp in bench_auc_dir.glob("*_auc.csv"):
-        parts = fp.stem.split("_")
+    for fp in csv_files(bench_auc_dir, "*_auc.csv"):
+        parts = Path(strip_compression(fp.name)).stem.split("_")
         if not parts or parts[0].lower() != "augustus": continue
         if "abinitio" not in (p.lower() for p in parts): continue
         if len(parts) < 4: continue
@@ -62,7 +62,7 @@ def plot_auc_heatmap_stack_geanno_mesc_vs_aug_abinitio(geanno_auc_csv: Path, ben
         if mut_rate is None or mut_rate != 0.0:
             continue
 
-        df_auc = pd.read_csv(fp)
+        df_auc = load_table_csv(fp)
         kmap = {c.lower(): c for c in df_auc.columns}
         roc_c = kmap.get("auc_roc"); prc_c = kmap.get("auc_prc")
         if roc_c is None or prc_c is None:
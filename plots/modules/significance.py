@@ -0,0 +1,145 @@
+import warnings
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import matplotlib.pyplot as plt
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from modules.load_save import save_table_csv
+from modules.common import SPECIES_PRETTY
+from modules.tracks import _with_tool_labels
+
+def locus_counts(tracks: pd.DataFrame) -> Tuple[List[str], np.ndarray]:
+    """ Tool labels and their (tools x loci x [tp, fp, fn]) counts; a locus is one track bin of one sequence"""
+    d = tracks.groupby(["tool_pretty", "seqid", "bin_start"], as_index=False)[["tp", "fp", "fn"]].first()
+    tools = sorted(d["tool_pretty"].unique())
+    loci = d[["seqid", "bin_start"]].drop_duplicates().sort_values(["seqid", "bin_start"]).reset_index(drop=True)
+    locus_id = pd.Series(np.arange(len(loci)), index=pd.MultiIndex.from_frame(loci))
+    counts = np.zeros((len(tools), len(loci), 3))
+    # a bin missing from a track lies past the ends of both the reference and that tool's genes
+    tool_id = d["tool_pretty"].map({t: i for i, t in enumerate(tools)}).to_numpy()
+    counts[tool_id, locus_id[pd.MultiIndex.from_frame(d[["seqid", "bin_start"]])].to_numpy()] = d[["tp", "fp", "fn"]]
+    # loci without reference or predicted genes in any tool carry no information
+    return tools, counts[:, counts.sum(axis=(0, 2)) > 0]
+
+def _f1(totals: np.ndarray) -> np.ndarray:
+    """ Nucleotide F1 of summed [tp, fp, fn] (last axis)"""
+    tp, fp, fn = totals[..., 0], totals[..., 1], totals[..., 2]
+    denom = 2 * tp + fp + fn
+    return np.where(denom > 0, 2 * tp / np.where(denom > 0, denom, 1), 0.0)
+
+def paired_f1_test(a: np.ndarray, b: np.ndarray, n_perm: int = 10000, n_boot: int = 2000,
+                   seed: int = 0, chunk: int = 500) -> Dict[str, float]:
+    """
+    Paired tests on the F1 difference of two tools over the same loci (loci x [tp, fp, fn] each).
+    Permutation: the two tools' counts are swapped at a random half of the loci; the p-value is the share of
+    permuted |differences| at least as large as the observed one. Bootstrap: loci are resampled with
+    replacement for a 95% interval of the difference. Both are done `chunk` replicates at a time as one
+    (replicates x loci) @ (loci x 3) product.
+    """
+    rng = np.random.default_rng(seed)
+    n_loci = len(a)
+    total_a, total_b = a.sum(axis=0), b.sum(axis=0)
+    diff = float(_f1(total_a) - _f1(total_b))
+    delta = b - a
+
+    extreme = 0
+    for start in range(0, n_perm, chunk):
+        swap = rng.integers(0, 2, size=(min(chunk, n_perm - start), n_loci)).astype(float)
+        moved = swap @ delta
+        extreme += int((np.abs(_f1(total_a + moved) - _f1(total_b - moved)) >= abs(diff) - 1e-12).sum())
+
+    boot = []
+    for start in range(0, n_boot, chunk):
+        weights = rng.multinomial(n_loci, np.full(n_loci, 1.0 / n_loci), size=min(chunk, n_boot - start))
+        boot.append(_f1(weights @ a) - _f1(weights @ b))
+    boot = np.concatenate(boot) if boot else np.empty(0)
+    sd = float(boot.std(ddof=1)) if len(boot) > 1 else np.nan
+
+    return dict(f1_diff=diff, p_value=(1 + extreme) / (1 + n_perm),
+                ci_low=float(np.quantile(boot, 0.025)) if len(boot) else np.nan,
+                ci_high=float(np.quantile(boot, 0.975)) if len(boot) else np.nan,
+                effect_size=diff / sd if sd > 0 else np.nan, n_loci=n_loci)
+
+def _holm(p: np.ndarray) -> np.ndarray:
+    """ Holm-adjusted p-values"""
+    order = np.argsort(p)
+    adj = np.maximum.accumulate(np.minimum(1.0, p[order] * (len(p) - np.arange(len(p)))))
+    out = np.empty_like(adj)
+    out[order] = adj
+    return out
+
+def pairwise_f1_tests(tracks: pd.DataFrame, n_perm: int = 10000, n_boot: int = 2000, seed: int = 0,
+                      jobs: int = 4) -> pd.DataFrame:
+    """ paired_f1_test of every pair of tools of one species, on a thread pool (one pair per task)"""
+    tools, counts = locus_counts(tracks)
+    pairs = list(combinations(range(len(tools)), 2))
+    if not pairs:
+        return pd.DataFrame()
+    # NumPy releases the GIL in the matrix products, so threads run the pairs in parallel
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(pairs)))) as pool:
+        results = list(pool.map(lambda ij: paired_f1_test(counts[ij[0]], counts[ij[1]], n_perm, n_boot,
+                                                          seed + ij[0] * len(tools) + ij[1]), pairs))
+    res = pd.DataFrame([dict(tool_a=tools[i], tool_b=tools[j], **r) for (i, j), r in zip(pairs, results)])
+    res["p_holm"] = _holm(res["p_value"].to_numpy())
+    return res
+
+def _square(res: pd.DataFrame, value: str, antisymmetric: bool) -> pd.DataFrame:
+    """ tool x tool matrix of a pairwise column (row tool minus column tool for differences)"""
+    tools = sorted(set(res["tool_a"]) | set(res["tool_b"]))
+    m = pd.DataFrame(np.nan, index=tools, columns=tools)
+    for r in res.itertuples():
+        v = getattr(r, value)
+        m.loc[r.tool_a, r.tool_b] = v
+        m.loc[r.tool_b, r.tool_a] = -v if antisymmetric else v
+    return m
+
+def export_pairwise_significance(tracks: pd.DataFrame, out_dir: Path, mut_rate: float = 0.0, n_perm: int = 10000,
+                                 n_boot: int = 2000, seed: int = 0, jobs: int = 4, dpi: int = 300) -> Optional[pd.DataFrame]:
+    """ Per species: F1-difference and p-value matrices between tools (CSV) and a heatmap of both"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    d = tracks[np.isclose(pd.to_numeric(tracks["mut_rate"], errors="coerce"), mut_rate)]
+    if d.empty:
+        warnings.warn(f"No accuracy tracks at mutation rate {mut_rate} - no significance tests.")
+        return None
+    d = _with_tool_labels(d)
+
+    frames = []
+    for species, ds in d.groupby("species"):
+        res = pairwise_f1_tests(ds, n_perm=n_perm, n_boot=n_boot, seed=seed, jobs=jobs)
+        if res.empty:
+            continue
+        res.insert(0, "species", species)
+        frames.append(res)
+
+        diff = _square(res, "f1_diff", antisymmetric=True)
+        pval = _square(res, "p_holm", antisymmetric=False)
+        save_table_csv(diff, out_dir / f"csv/f1_difference_{species}.csv")
+        save_table_csv(pval, out_dir / f"csv/f1_pvalue_holm_{species}.csv")
+
+        n = len(diff)
+        fig, axes = plt.subplots(1, 2, figsize=(2 * (0.7 * n + 3), 0.6 * n + 2), dpi=dpi)
+        lim = np.nanmax(np.abs(diff.values)) if np.isfinite(diff.values).any() else 1.0
+        sns.heatmap(diff, ax=axes[0], annot=True, fmt=".3f", cmap="RdBu", center=0, vmin=-lim, vmax=lim,
+                    cbar_kws={"label": "F1 (row) - F1 (column)"})
+        sns.heatmap(pval, ax=axes[1], annot=True, fmt=".3g", cmap="rocket", vmin=0, vmax=1,
+                    cbar_kws={"label": "Holm-adjusted p-value"})
+        axes[0].set_title("Gene-nucleotide F1 difference")
+        axes[1].set_title(f"Paired permutation test ({n_perm} permutations)")
+        for ax in axes:
+            ax.set_xlabel(""); ax.set_ylabel("")
+        fig.suptitle(SPECIES_PRETTY.get(species, species))
+        plt.tight_layout()
+        fig.savefig(out_dir / f"f1_significance_{species}.png", dpi=dpi)
+        plt.close(fig)
+
+    if not frames:
+        return None
+    out = pd.concat(frames, ignore_index=True)
+    save_table_csv(out, out_dir / "csv/f1_pairwise_tests.csv")
+    return out
@@ -13,12 +13,12 @@ from modules.load_save import save_table_csv
 from modules.common import SPECIES_SIZE, TOOL_MAPPING, \
                         _ensure_numeric, _filter_geanno_fixed_config, \
                         _is_abinitio_aug, _map_snap_model, \
-                        _normalise_hint_column, _species_to_pretty, \
-                        _subset_geanno_mesculenta_any
+                        _normalise_hint_column, _pivot_dense, _species_to_pretty, \
+                        _subset_geanno_mesculenta_any, _working_copy
 
 def _coerce_ram_to_gb(df: pd.DataFrame) -> pd.DataFrame:
     """Return a copy with a canonical float `ram_gb` from various RAM columns."""
-    d = df.copy()
+    d = _working_copy(df)
 
     def to_num(col):
         return pd.to_numeric(d[col], errors="coerce") if col in d.columns else None
@@ -50,31 +50,107 @@ def _coerce_ram_to_gb(df: pd.DataFrame) -> pd.DataFrame:
     d["ram_gb"] = np.nan
     return d
 
+COMPUTE_MEASURES = ["cpu_sec", "cores_used", "cpu_per_kb", "io_mb", "io_per_kb"]
+
+def _add_compute_views(d: pd.DataFrame) -> pd.DataFrame:
+    """Add CPU-seconds, cores used (CPU/wall) and I/O per genome KB; NaN where the run ledger gave no data."""
+    d = _ensure_numeric(d, ["cpu_sec", "time_sec", "read_bytes", "write_bytes"])
+    cpu = d["cpu_sec"] if "cpu_sec" in d.columns else pd.Series(np.nan, index=d.index)
+    if {"read_bytes", "write_bytes"}.issubset(d.columns):
+        io_mb = (d["read_bytes"] + d["write_bytes"]) / (1024.0 ** 2)
+    else:
+        io_mb = pd.Series(np.nan, index=d.index)
+
+    d["cpu_sec"]    = cpu
+    d["cores_used"] = cpu / d["time_sec"].replace(0, np.nan)
+    d["cpu_per_kb"] = cpu / d["species_size_kb"]
+    d["io_mb"]      = io_mb
+    d["io_per_kb"]  = io_mb / d["species_size_kb"]
+    return d
+
+def _add_trial_bounds(d: pd.DataFrame) -> pd.DataFrame:
+    """Quartiles of the repeated trials (load_ledger's *_q1/*_q3) in the units of the plotted measures."""
+    if "time_sec_q1" not in d.columns:
+        return d
+    d = _ensure_numeric(d, ["time_sec_q1", "time_sec_q3", "ram_kb_q1", "ram_kb_q3", "cpu_sec_q1", "cpu_sec_q3"])
+    for q in ("q1", "q3"):
+        d[f"ram_gb_{q}"]      = d[f"ram_kb_{q}"] / (1024.0 ** 2)
+        d[f"ram_per_kb_{q}"]  = d[f"ram_gb_{q}"] / d["species_size_kb"]
+        d[f"time_per_kb_{q}"] = d[f"time_sec_{q}"] / d["species_size_kb"]
+        d[f"cpu_per_kb_{q}"]  = d[f"cpu_sec_{q}"] / d["species_size_kb"]
+    return d
+
+def _present_measures(*frames: pd.DataFrame) -> list:
+    """ RAM/time measures plus the compute measures and trial quartiles that have data in any frame."""
+    base = ["ram_gb","time_sec","ram_per_kb","time_per_kb"]
+    measures = base + [c for c in COMPUTE_MEASURES
+                       if any(c in f.columns and f[c].notna().any() for f in frames)]
+    bounds = [f"{m}_{q}" for m in measures for q in ("q1", "q3")]
+    return measures + [c for c in bounds if any(c in f.columns and f[c].notna().any() for f in frames)]
+
+def _median_config(d: pd.DataFrame, keys: list, measures: list) -> pd.DataFrame:
+    """
+    Per group, the configuration at the (lower) median of each measure, with that configuration's own
+    trial quartiles (*_q1/*_q3); the spread across configurations is kept apart in *_config_q1/*_config_q3.
+    """
+    base = [m for m in measures if not m.endswith(("_q1", "_q3"))]
+    grp = d.groupby(keys, observed=True)
+    out = grp.size().rename("n_configs").to_frame()
+    for m in base:
+        own = [c for c in (f"{m}_q1", f"{m}_q3") if c in measures]
+        ranked = d.dropna(subset=[m]).sort_values(m, kind="mergesort")
+        rgrp = ranked.groupby(keys, observed=True)
+        rank, n = rgrp.cumcount(), rgrp[m].transform("size")
+        picked = ranked[rank == (n - 1) // 2].set_index(keys)[[m] + own]
+        out = out.join(picked)
+        out[f"{m}_config_q1"] = grp[m].quantile(0.25)
+        out[f"{m}_config_q3"] = grp[m].quantile(0.75)
+    cols = [c for c in measures if c in out.columns]
+    return out[cols + ["n_configs"] + [c for c in out.columns if c.endswith(("_config_q1", "_config_q3"))]].reset_index()
+
+def _draw_trial_iqr(ax, x, frame: pd.DataFrame, metric: str, rows: list, cols: list, colors: list) -> float:
+    """
+    Error bars from the trial quartiles of `metric`, if the frame has them; returns the largest
+    upper quartile (NaN without quartiles) so the caller can fit the y-axis to the bars.
+    """
+    if f"{metric}_q1" not in frame.columns:
+        return np.nan
+    Y  = _pivot_dense(frame, "tool_pretty", "species_pretty", metric, rows, cols)
+    Q1 = _pivot_dense(frame, "tool_pretty", "species_pretty", f"{metric}_q1", rows, cols)
+    Q3 = _pivot_dense(frame, "tool_pretty", "species_pretty", f"{metric}_q3", rows, cols)
+    for i in range(len(rows)):
+        ok = ~(np.isnan(Y[i]) | np.isnan(Q1[i]) | np.isnan(Q3[i]))
+        if not ok.any():
+            continue
+        yerr = np.vstack([np.clip(Y[i][ok] - Q1[i][ok], 0, None), np.clip(Q3[i][ok] - Y[i][ok], 0, None)])
+        ax.errorbar(x[ok], Y[i][ok], yerr=yerr, fmt="none", ecolor=colors[i], elinewidth=1.2, capsize=3, alpha=0.8)
+    return float(np.nanmax(Q3)) if np.isfinite(Q3).any() else np.nan
+
 def _make_views(d: pd.DataFrame) -> pd.DataFrame:
     """From raw benchmark DataFrame, make a view with ram_gb and time_sec, plus normalized columns."""
 
     d_rt = _coerce_ram_to_gb(d) 
     d_rt = _ensure_numeric(d_rt, ["time_sec"])
-    d_rt = d_rt.dropna(subset=["time_sec", "ram_gb"]).copy()
+    d_rt = _working_copy(d_rt.dropna(subset=["time_sec", "ram_gb"]))
 
     d_rt["species_pretty"] = _species_to_pretty(d_rt["species"])
     d_rt["tool_pretty"] = (d_rt["tool"].astype(str).str.lower().map(TOOL_MAPPING).fillna(d_rt["tool"]))
 
     d_rt["species_size_kb"] = d_rt["species"].map(SPECIES_SIZE).astype(float)
-    d_rt = d_rt.dropna(subset=["species_size_kb"]).copy()
+    d_rt = _working_copy(d_rt.dropna(subset=["species_size_kb"]))
     d_rt["ram_per_kb"]  = d_rt["ram_gb"] / d_rt["species_size_kb"]
     d_rt["time_per_kb"] = d_rt["time_sec"] / d_rt["species_size_kb"]
 
-    return d_rt
+    return _add_trial_bounds(_add_compute_views(d_rt))
 
 def plot_ram_time_summaries_and_plots(
     d: pd.DataFrame, out_dir: Path, dpi: int = 300
 ) -> None:
-    """Aggregate RAM/time by species and tool and produce two line-pair plots."""
+    """RAM/time of the median configuration of each species and tool, as two line-pair plots."""
     d = _make_views(d)
+    measures = _present_measures(d)
 
-    agg = (d.groupby(["species","species_pretty","tool_pretty"], as_index=False)
-             [["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
+    agg = _median_config(d, ["species","species_pretty","tool_pretty"], measures)
     save_table_csv(agg, out_dir / "csv/geanno_ram_time_summary.csv")
 
 
@@ -89,32 +165,29 @@ def plot_ram_time_summaries_and_plots(
         fig, axes = plt.subplots(1, 2, figsize=(12, 5.6), dpi=dpi, sharex=True)
         axL, axR = axes
 
+        Y_left  = _pivot_dense(agg, "tool_pretty", "species_pretty", metric_left, tools, species, aggfunc="first")
+        Y_right = _pivot_dense(agg, "tool_pretty", "species_pretty", metric_right, tools, species, aggfunc="first")
+
         # left
         lines = []
         for i, t in enumerate(tools):
-            sub = agg[agg["tool_pretty"] == t]
-            y = [sub.loc[sub["species_pretty"] == s, metric_left].values[0]
-                 if not sub.loc[sub["species_pretty"] == s].empty else np.nan
-                 for s in species]
-            ln, = axL.plot(x, y, marker="o", linewidth=1.8, markersize=6, color=colors[i], label=t)
+            ln, = axL.plot(x, Y_left[i], marker="o", linewidth=1.8, markersize=6, color=colors[i], label=t)
             lines.append(ln)
         axL.set_xticks(x); axL.set_xticklabels(species, rotation=25, ha="right")
         axL.set_xlabel("Species"); axL.set_ylabel(ylabel_left); axL.set_title(title_left)
         axL.grid(axis="y", linestyle="--", alpha=0.35)
         ymaxL = float(np.nanmax(agg[metric_left].to_numpy(dtype=float)))
+        ymaxL = np.nanmax([ymaxL, _draw_trial_iqr(axL, x, agg, metric_left, tools, species, colors)])
         axL.set_ylim(0, ymaxL * (1+pad) if ymaxL > 0 else 1.0)
 
         # right
         for i, t in enumerate(tools):
-            sub = agg[agg["tool_pretty"] == t]
-            y = [sub.loc[sub["species_pretty"] == s, metric_right].values[0]
-                 if not sub.loc[sub["species_pretty"] == s].empty else np.nan
-                 for s in species]
-            axR.plot(x, y, marker="o", linewidth=1.8, markersize=6, color=colors[i], label=t)
+            axR.plot(x, Y_right[i], marker="o", linewidth=1.8, markersize=6, color=colors[i], label=t)
         axR.set_xticks(x); axR.set_xticklabels(species, rotation=25, ha="right")
         axR.set_xlabel("Species"); axR.set_ylabel(ylabel_right); axR.set_title(title_right)
         axR.grid(axis="y", linestyle="--", alpha=0.35)
         ymaxR = float(np.nanmax(agg[metric_right].to_numpy(dtype=float)))
+        ymaxR = np.nanmax([ymaxR, _draw_trial_iqr(axR, x, agg, metric_right, tools, species, colors)])
         axR.set_ylim(0, ymaxR * (1+pad) if ymaxR > 0 else 1.0)
 
         fig.legend(handles=lines, labels=[t for t in tools], loc="lower center", ncol=4, frameon=False)
@@ -134,6 +207,20 @@ def plot_ram_time_summaries_and_plots(
         title_right="Normalized runtime (s) by species and model",
         fname="geanno_time_pair.png"
     )
+    if "cpu_sec" in measures:
+        lineplot_pair(
+            metric_left="cpu_sec", ylabel_left="CPU time (s)", title_left="CPU time (s) by species and model",
+            metric_right="cores_used", ylabel_right="Cores used (CPU time / runtime)",
+            title_right="Average cores used by species and model",
+            fname="geanno_cpu_pair.png"
+        )
+    if "io_mb" in measures:
+        lineplot_pair(
+            metric_left="io_mb", ylabel_left="Read + write (MB)", title_left="Filesystem I/O (MB) by species and model",
+            metric_right="io_per_kb", ylabel_right="I/O (MB) per genome size (KB)",
+            title_right="Normalized filesystem I/O by species and model",
+            fname="geanno_io_pair.png"
+        )
 
 
 def plot_ram_time_all_tools_by_species_linepairs_plus_geanno(
@@ -148,7 +235,7 @@ def plot_ram_time_all_tools_by_species_linepairs_plus_geanno(
 
     def _evidence_subset_local(df_: pd.DataFrame) -> pd.DataFrame:
         tools_ev = {"genemarkep", "genemarketp", "gemoma", "augustus"}
-        d_ = df_[df_["tool"].astype(str).str.lower().isin(tools_ev)].copy()
+        d_ = _working_copy(df_[df_["tool"].astype(str).str.lower().isin(tools_ev)])
         d_["hint_l"] = _normalise_hint_column(d_)
 
         d_ = d_[~((d_["tool"].astype(str).str.lower() == "augustus") & (d_["hint_l"].isna() | d_["hint_l"].eq("abinitio")))]
@@ -162,12 +249,12 @@ def plot_ram_time_all_tools_by_species_linepairs_plus_geanno(
         return d_
 
     def _abinitio_subset_local(df_: pd.DataFrame) -> pd.DataFrame:
-        d_ = df_.copy()
+        d_ = _working_copy(df_)
         d_["hint_l"] = _normalise_hint_column(d_)
         m_aug = _is_abinitio_aug(d_)
         m_snap = d_["tool"].astype(str).str.lower().eq("snap")
         m_gmes = d_["tool"].astype(str).str.lower().eq("genemarkes")
-        d_ = d_[m_aug | m_snap | m_gmes].copy()
+        d_ = _working_copy(d_[m_aug | m_snap | m_gmes])
 
         def _tool_pretty_row(r) -> str:
             tl = str(r["tool"]).lower()
@@ -178,48 +265,47 @@ def plot_ram_time_all_tools_by_species_linepairs_plus_geanno(
         d_["tool_pretty"] = [_tool_pretty_row(r) for _, r in d_.iterrows()]
         return d_
 
-    d = _coerce_ram_to_gb(df_bench.copy())
+    d = _coerce_ram_to_gb(_working_copy(df_bench))
     d["species_pretty"] = _species_to_pretty(d["species"])
-    d["species_size_kb"] = d["species"].map(SPECIES_SIZE)
-    d = d.dropna(subset=["species_size_kb"]).copy()
+    d["species_size_kb"] = d["species"].map(SPECIES_SIZE).astype(float)
+    d = _working_copy(d.dropna(subset=["species_size_kb"]))
 
     if "time_sec" not in d.columns and "time" in d.columns:
         d = d.rename(columns={"time": "time_sec"})
 
     d["ram_per_kb"]  = d["ram_gb"]  / d["species_size_kb"]
     d["time_per_kb"] = d["time_sec"] / d["species_size_kb"]
+    d = _add_trial_bounds(_add_compute_views(d))
 
-    d_ab = _abinitio_subset_local(d)
-    by_sp_ab = (d_ab.groupby(["species","species_pretty","tool_pretty"], as_index=False)
-                    [["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
-
-    d_ev = _evidence_subset_local(d)
-    if d_ev.empty:
-        by_sp_ev = pd.DataFrame(columns=by_sp_ab.columns)
-    else:
-        within_hint = (d_ev.groupby(["species","species_pretty","tool_pretty","hint_l"], as_index=False)
-                           [["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
-        by_sp_ev = (within_hint.groupby(["species","species_pretty","tool_pretty"], as_index=False)
-                             [["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
-
-    g = _coerce_ram_to_gb(df_geanno.copy())
+    g = _coerce_ram_to_gb(_working_copy(df_geanno))
     if "time_sec" not in g.columns and "time" in g.columns:
         g = g.rename(columns={"time": "time_sec"})
 
     g = _filter_geanno_fixed_config(g)
 
     g["species_pretty"] = _species_to_pretty(g["species"])
-    g["species_size_kb"] = g["species"].map(SPECIES_SIZE)
-    g = g.dropna(subset=["species_size_kb"]).copy()
+    g["species_size_kb"] = g["species"].map(SPECIES_SIZE).astype(float)
+    g = _working_copy(g.dropna(subset=["species_size_kb"]))
     g["ram_per_kb"]  = g["ram_gb"]  / g["species_size_kb"]
     g["time_per_kb"] = g["time_sec"] / g["species_size_kb"]
+    g = _add_trial_bounds(_add_compute_views(g))
     g = _subset_geanno_mesculenta_any(g)
 
+    measures = _present_measures(d, g)
+
+    d_ab = _abinitio_subset_local(d)
+    by_sp_ab = _median_config(d_ab, ["species","species_pretty","tool_pretty"], measures)
+
+    d_ev = _evidence_subset_local(d)
+    if d_ev.empty:
+        by_sp_ev = pd.DataFrame(columns=by_sp_ab.columns)
+    else:
+        by_sp_ev = _median_config(d_ev, ["species","species_pretty","tool_pretty"], measures)
+
     if g.empty:
         by_sp_ge = pd.DataFrame(columns=by_sp_ab.columns)
     else:
-        by_sp_ge = (g.groupby(["species","species_pretty"], as_index=False)
-                      [["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
+        by_sp_ge = _median_config(g, ["species","species_pretty"], measures)
         by_sp_ge["tool_pretty"] = "GeAnno (M. esculenta, PCA)"
 
     per_species = pd.concat([by_sp_ab, by_sp_ev, by_sp_ge], ignore_index=True)
@@ -238,28 +324,28 @@ def plot_ram_time_all_tools_by_species_linepairs_plus_geanno(
         fig, axes = plt.subplots(1, 2, figsize=(13.0, 6.0), dpi=dpi, sharex=True)
         axL, axR = axes
         lines = []
+        Y_left  = _pivot_dense(per_species, "tool_pretty", "species_pretty", metric_left, tools, species_present)
+        Y_right = _pivot_dense(per_species, "tool_pretty", "species_pretty", metric_right, tools, species_present)
 
         for i, t in enumerate(tools):
-            sub = per_species[per_species["tool_pretty"] == t]
-            y = [sub.loc[sub["species_pretty"] == s, metric_left].mean() if (sub["species_pretty"] == s).any() else np.nan
-                 for s in species_present]
-            ln, = axL.plot(x, y, marker="o", linewidth=1.8, markersize=6, color=palette[t], label=t)
+            ln, = axL.plot(x, Y_left[i], marker="o", linewidth=1.8, markersize=6, color=palette[t], label=t)
             lines.append(ln)
         axL.set_xticks(x); axL.set_xticklabels(species_present, rotation=25, ha="right")
         axL.set_xlabel("Species"); axL.set_ylabel(ylabel_left); axL.set_title(title_left)
         axL.grid(axis="y", linestyle=":", alpha=0.5)
         ymaxL = float(np.nanmax(per_species[metric_left].to_numpy(dtype=float))) if not per_species.empty else 1.0
+        ymaxL = np.nanmax([ymaxL, _draw_trial_iqr(axL, x, per_species, metric_left, tools, species_present,
+                                                  [palette[t] for t in tools])])
         axL.set_ylim(0, ymaxL * (1 + pad) if ymaxL > 0 else 1.0)
 
         for i, t in enumerate(tools):
-            sub = per_species[per_species["tool_pretty"] == t]
-            y = [sub.loc[sub["species_pretty"] == s, metric_right].mean() if (sub["species_pretty"] == s).any() else np.nan
-                 for s in species_present]
-            axR.plot(x, y, marker="o", linewidth=1.8, markersize=6, color=palette[t], label=t)
+            axR.plot(x, Y_right[i], marker="o", linewidth=1.8, markersize=6, color=palette[t], label=t)
         axR.set_xticks(x); axR.set_xticklabels(species_present, rotation=25, ha="right")
         axR.set_xlabel("Species"); axR.set_ylabel(ylabel_right); axR.set_title(title_right)
         axR.grid(axis="y", linestyle=":", alpha=0.5)
         ymaxR = float(np.nanmax(per_species[metric_right].to_numpy(dtype=float))) if not per_species.empty else 1.0
+        ymaxR = np.nanmax([ymaxR, _draw_trial_iqr(axR, x, per_species, metric_right, tools, species_present,
+                                                  [palette[t] for t in tools])])
         axR.set_ylim(0, ymaxR * (1 + pad) if ymaxR > 0 else 1.0)
 
         fig.legend(handles=lines, labels=[t for t in tools], loc="lower center",
@@ -280,6 +366,18 @@ def plot_ram_time_all_tools_by_species_linepairs_plus_geanno(
         metric_right="time_per_kb", ylabel_right="Runtime (s) per genome size (KB)",
         title_right="Normalized runtime (s) by species", fname="all_tools_time_pair_plus_geanno.png"
     )
+    if "cpu_sec" in measures:
+        _linepair(
+            metric_left="cpu_sec", ylabel_left="CPU time (s)", title_left="CPU time (s) by species",
+            metric_right="cores_used", ylabel_right="Cores used (CPU time / runtime)",
+            title_right="Average cores used by species", fname="all_tools_cpu_pair_plus_geanno.png"
+        )
+    if "io_mb" in measures:
+        _linepair(
+            metric_left="io_mb", ylabel_left="Read + write (MB)", title_left="Filesystem I/O (MB) by species",
+            metric_right="io_per_kb", ylabel_right="I/O (MB) per genome size (KB)",
+            title_right="Normalized filesystem I/O by species", fname="all_tools_io_pair_plus_geanno.png"
+        )
 
     return (ram_png, time_png), per_species
 
@@ -290,7 +388,7 @@ def plot_ram_time_all_tools_overall_dots_plus_geanno(df_bench: pd.DataFrame, df_
 
     def _evidence_subset_local(df_: pd.DataFrame) -> pd.DataFrame:
         tools_ev = {"genemarkep", "genemarketp", "gemoma", "augustus"}
-        d_ = df_[df_["tool"].astype(str).str.lower().isin(tools_ev)].copy()
+        d_ = _working_copy(df_[df_["tool"].astype(str).str.lower().isin(tools_ev)])
         d_["hint_l"] = _normalise_hint_column(d_)
         d_ = d_[~((d_["tool"].astype(str).str.lower() == "augustus") & (d_["hint_l"].isna() | d_["hint_l"].eq("abinitio")))]
         d_ = d_[d_["hint_l"].isin(["genus", "order", "far"])]
@@ -303,12 +401,12 @@ def plot_ram_time_all_tools_overall_dots_plus_geanno(df_bench: pd.DataFrame, df_
         return d_
 
     def _abinitio_subset_local(df_: pd.DataFrame) -> pd.DataFrame:
-        d_ = df_.copy()
+        d_ = _working_copy(df_)
         d_["hint_l"] = _normalise_hint_column(d_)
         m_aug = _is_abinitio_aug(d_)
         m_snap = d_["tool"].astype(str).str.lower().eq("snap")
         m_gmes = d_["tool"].astype(str).str.lower().eq("genemarkes")
-        d_ = d_[m_aug | m_snap | m_gmes].copy()
+        d_ = _working_copy(d_[m_aug | m_snap | m_gmes])
 
         def _tool_pretty_row(r) -> str:
             tl = str(r["tool"]).lower()
@@ -319,9 +417,9 @@ def plot_ram_time_all_tools_overall_dots_plus_geanno(df_bench: pd.DataFrame, df_
         d_["tool_pretty"] = [_tool_pretty_row(r) for _, r in d_.iterrows()]
         return d_
 
-    d = _coerce_ram_to_gb(df_bench.copy())
-    d["species_size_kb"] = d["species"].map(SPECIES_SIZE)
-    d = d.dropna(subset=["species_size_kb"]).copy()
+    d = _coerce_ram_to_gb(_working_copy(df_bench))
+    d["species_size_kb"] = d["species"].map(SPECIES_SIZE).astype(float)
+    d = _working_copy(d.dropna(subset=["species_size_kb"]))
 
     if "time_sec" not in d.columns and "time" in d.columns:
         d = d.rename(columns={"time": "time_sec"})
@@ -330,7 +428,7 @@ def plot_ram_time_all_tools_overall_dots_plus_geanno(df_bench: pd.DataFrame, df_
     d["time_per_kb"] = d["time_sec"] / d["species_size_kb"]
 
     d_ab = _abinitio_subset_local(d)
-    by_sp_ab = (d_ab.groupby(["species","tool_pretty"], as_index=False)[["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
+    by_sp_ab = (d_ab.groupby(["species","tool_pretty"], as_index=False, observed=True)[["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
     by_sp_ab["group"] = "Ab initio"
 
     d_ev = _evidence_subset_local(d)
@@ -338,18 +436,18 @@ def plot_ram_time_all_tools_overall_dots_plus_geanno(df_bench: pd.DataFrame, df_
         warnings.warn("No evidence-based rows; plotting Ab initio + GeAnno only.")
         by_sp_ev = pd.DataFrame(columns=by_sp_ab.columns)
     else:
-        within_hint = (d_ev.groupby(["species","tool_pretty","hint_l"], as_index=False)[["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
-        by_sp_ev = (within_hint.groupby(["species","tool_pretty"], as_index=False)[["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
+        within_hint = (d_ev.groupby(["species","tool_pretty","hint_l"], as_index=False, observed=True)[["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
+        by_sp_ev = (within_hint.groupby(["species","tool_pretty"], as_index=False, observed=True)[["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
         by_sp_ev["group"] = "Evidence-based"
 
-    g = _coerce_ram_to_gb(df_geanno.copy())
+    g = _coerce_ram_to_gb(_working_copy(df_geanno))
     if "time_sec" not in g.columns and "time" in g.columns:
         g = g.rename(columns={"time": "time_sec"})
 
     g = _filter_geanno_fixed_config(g)
 
-    g["species_size_kb"] = g["species"].map(SPECIES_SIZE)
-    g = g.dropna(subset=["species_size_kb"]).copy()
+    g["species_size_kb"] = g["species"].map(SPECIES_SIZE).astype(float)
+    g = _working_copy(g.dropna(subset=["species_size_kb"]))
     g["ram_per_kb"]  = g["ram_gb"]  / g["species_size_kb"]
     g["time_per_kb"] = g["time_sec"] / g["species_size_kb"]
 
@@ -359,12 +457,12 @@ def plot_ram_time_all_tools_overall_dots_plus_geanno(df_bench: pd.DataFrame, df_
         warnings.warn("No GeAnno rows for M. esculenta (PCA) with the fixed config.")
         by_sp_ge = pd.DataFrame(columns=by_sp_ab.columns)
     else:
-        by_sp_ge = (g.groupby(["species"], as_index=False)[["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
+        by_sp_ge = (g.groupby(["species"], as_index=False, observed=True)[["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
         by_sp_ge["tool_pretty"] = "GeAnno (M. esculenta, PCA)"
         by_sp_ge["group"] = "GeAnno"
 
     per_species = pd.concat([by_sp_ab, by_sp_ev, by_sp_ge], ignore_index=True)
-    overall = (per_species.groupby(["tool_pretty","group"], as_index=False)[["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
+    overall = (per_species.groupby(["tool_pretty","group"], as_index=False, observed=True)[["ram_gb","time_sec","ram_per_kb","time_per_kb"]].mean())
 
     save_table_csv(overall, out_dir / "csv/all_tools_overall_ram_time_plus_geanno.csv")
 
@@ -400,7 +498,7 @@ def plot_ram_time_all_tools_overall_dots_plus_geanno(df_bench: pd.DataFrame, df_
     axes = axes.ravel()
 
     for i, meas in enumerate(measures):
-        sub = long[long["measure"] == meas].copy()
+        sub = _working_copy(long[long["measure"] == meas])
         if sub.empty: continue
 
         order = sub.sort_values("value")["tool_pretty"].tolist()
@@ -433,4 +531,164 @@ def plot_ram_time_all_tools_overall_dots_plus_geanno(df_bench: pd.DataFrame, df_
     plt.close(fig)
     return fig_path, overall
 
-    
\ No newline at end of file
+    
+
+SCALING_TOOL_PRETTY = {**TOOL_MAPPING, "prothint": "ProtHint", "geanno": "GeAnno", "evaluator": "obtain_metrics"}
+
+def plot_thread_scaling(runs: pd.DataFrame, out_dir: Path, dpi: int = 300) -> Tuple[Path, pd.DataFrame]:
+    """ Speedup and parallel efficiency against thread count for the runs of run_thread_scaling.sh """
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    d = _coerce_ram_to_gb(runs)
+    d = _ensure_numeric(d, ["threads", "time_sec", "cpu_sec"])
+    d["hint"] = d["hint"].fillna("-") if "hint" in d.columns else "-"
+
+    keys = ["tool", "species", "hint"]
+    scaling = (d.groupby(keys + ["threads"], as_index=False, observed=True)
+                .agg(n_runs=("time_sec", "size"), time_sec=("time_sec", "median"),
+                     cpu_sec=("cpu_sec", "median"), ram_gb=("ram_gb", "max")))
+
+    # speedup is relative to the smallest thread count measured for each configuration
+    base = (scaling.sort_values("threads").groupby(keys, as_index=False, observed=True).first()
+                   [keys + ["threads", "time_sec"]]
+                   .rename(columns={"threads": "base_threads", "time_sec": "base_time_sec"}))
+    scaling = scaling.merge(base, on=keys, how="left")
+    scaling["speedup"]    = scaling["base_time_sec"] / scaling["time_sec"]
+    scaling["efficiency"] = scaling["speedup"] * scaling["base_threads"] / scaling["threads"]
+    scaling["cores_used"] = scaling["cpu_sec"] / scaling["time_sec"]
+    scaling["species_pretty"] = _species_to_pretty(scaling["species"])
+    scaling = scaling.sort_values(keys + ["threads"]).reset_index(drop=True)
+
+    save_table_csv(scaling, out_dir / "csv/thread_scaling.csv")
+
+    configs = scaling[keys].drop_duplicates().values.tolist()
+    cmap = mpl.colormaps.get_cmap("tab10")
+    threads_all = np.sort(scaling["threads"].unique())
+
+    fig, (axS, axE) = plt.subplots(1, 2, figsize=(12, 5.2), dpi=dpi, sharex=True)
+    handles = []
+    for i, (tool, species, hint) in enumerate(configs):
+        sub = scaling[(scaling["tool"] == tool) & (scaling["species"] == species) & (scaling["hint"] == hint)]
+        label = f"{SCALING_TOOL_PRETTY.get(tool, tool)} - {sub['species_pretty'].iloc[0]}"
+        if hint != "-":
+            label += f" ({hint})"
+        color = cmap(i % cmap.N)
+        ln, = axS.plot(sub["threads"], sub["speedup"], marker="o", linewidth=1.8, markersize=6, color=color, label=label)
+        axE.plot(sub["threads"], sub["efficiency"], marker="o", linewidth=1.8, markersize=6, color=color)
+        handles.append(ln)
+
+    t0 = threads_all.min()
+    ideal, = axS.plot(threads_all, threads_all / t0, linestyle="--", color="0.5", linewidth=1.2, label="Ideal")
+    axE.axhline(1.0, linestyle="--", color="0.5", linewidth=1.2)
+
+    for ax in (axS, axE):
+        ax.set_xscale("log", base=2)
+        ax.set_xticks(threads_all)
+        ax.set_xticklabels([str(int(t)) for t in threads_all])
+        ax.set_xlabel("Threads")
+        ax.grid(axis="y", linestyle="--", alpha=0.35)
+    axS.set_ylabel("Speedup"); axS.set_title("Speedup over the smallest thread count")
+    axE.set_ylabel("Parallel efficiency"); axE.set_title("Efficiency (speedup / thread ratio)")
+    axE.set_ylim(0, max(1.1, float(np.nanmax(scaling["efficiency"].to_numpy(dtype=float))) * 1.05))
+
+    fig.legend(handles=handles + [ideal], labels=[h.get_label() for h in handles + [ideal]],
+               loc="lower center", ncol=3, frameon=False)
+    fig.tight_layout(rect=[0, 0.12, 1, 1])
+    fig_path = out_dir / "thread_scaling_speedup_efficiency.png"
+    fig.savefig(fig_path, bbox_inches="tight")
+    plt.close(fig)
+    return fig_path, scaling
+
+
+def _fit_overhead_per_bp(x: np.ndarray, y: np.ndarray, x_full: float) -> dict:
+    """
+    Least-squares y = overhead + per_bp * x and its R^2. With 3+ sizes a quadratic term is also fitted;
+    quadratic_share is the part of the cost at x_full it explains (~0 linear, >0 super-linear, <0 sub-linear).
+    """
+    ok = np.isfinite(x) & np.isfinite(y)
+    x, y = x[ok], y[ok]
+    out = dict(n_points=len(x), overhead=np.nan, per_bp=np.nan, r2=np.nan, quadratic_share=np.nan)
+    if len(np.unique(x)) < 2:
+        return out
+
+    per_bp, overhead = np.polyfit(x, y, 1)
+    ss_res = float(np.sum((y - (overhead + per_bp * x)) ** 2))
+    ss_tot = float(np.sum((y - y.mean()) ** 2))
+    out.update(overhead=overhead, per_bp=per_bp, r2=1 - ss_res / ss_tot if ss_tot > 0 else np.nan)
+
+    if len(np.unique(x)) >= 3:
+        quad = np.polyfit(x, y, 2)
+        total = np.polyval(quad, x_full)
+        out["quadratic_share"] = quad[0] * x_full ** 2 / total if total != 0 else np.nan
+    return out
+
+def plot_size_scaling(runs: pd.DataFrame, out_dir: Path, dpi: int = 300) -> Tuple[Path, pd.DataFrame]:
+    """ Fixed-overhead + per-bp cost models of runtime, CPU time and RAM against input size (run_size_scaling.sh)"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    d = _coerce_ram_to_gb(runs)
+    d = _ensure_numeric(d, ["input_bp", "genome_bp", "time_sec", "cpu_sec"])
+    for c in ("hint", "model"):
+        d[c] = d[c].fillna("-") if c in d.columns else "-"
+
+    keys = ["tool", "species", "hint", "model"]
+    measures = [m for m in ("time_sec", "cpu_sec", "ram_gb") if m in d.columns and d[m].notna().any()]
+
+    # repeated runs of one subsample count once, at their median
+    points = (d.groupby(keys + ["input_bp"], as_index=False, observed=True)
+                .agg(genome_bp=("genome_bp", "max"), n_runs=("time_sec", "size"),
+                     **{m: (m, "median") for m in measures}))
+    save_table_csv(points, out_dir / "csv/size_scaling_points.csv")
+
+    rows = []
+    for cfg, sub in points.groupby(keys, sort=True, observed=True):
+        x = sub["input_bp"].to_numpy(dtype=float)
+        genome_bp = float(sub["genome_bp"].max())
+        for m in measures:
+            y = sub[m].to_numpy(dtype=float)
+            fit = _fit_overhead_per_bp(x, y, genome_bp)
+            full = sub.loc[sub["input_bp"] == genome_bp, m]
+            rows.append({**dict(zip(keys, cfg)), "measure": m, **fit,
+                         "per_mb": fit["per_bp"] * 1e6,
+                         "genome_mb": genome_bp / 1e6,
+                         "predicted_full": fit["overhead"] + fit["per_bp"] * genome_bp,
+                         "observed_full": float(full.iloc[0]) if not full.empty else np.nan})
+    fits = pd.DataFrame(rows)
+    save_table_csv(fits, out_dir / "csv/size_scaling_fits.csv")
+
+    labels = {"time_sec": "Runtime (s)", "cpu_sec": "CPU time (s)", "ram_gb": "Peak RAM (GB)"}
+    configs = points[keys].drop_duplicates().values.tolist()
+    cmap = mpl.colormaps.get_cmap("tab10")
+
+    fig, axes = plt.subplots(1, len(measures), figsize=(6 * len(measures), 5.2), dpi=dpi, squeeze=False)
+    handles = []
+    for i, cfg in enumerate(configs):
+        sub = points[(points[keys] == pd.Series(cfg, index=keys)).all(axis=1)].sort_values("input_bp")
+        tool, species, hint, model = cfg
+        label = f"{SCALING_TOOL_PRETTY.get(tool, tool)} - {_species_to_pretty(pd.Series([species])).iloc[0]}"
+        extra = [v for v in (hint, model) if v != "-"]
+        if extra:
+            label += f" ({', '.join(extra)})"
+        color = cmap(i % cmap.N)
+        x_mb = sub["input_bp"].to_numpy(dtype=float) / 1e6
+        x_line = np.linspace(0, x_mb.max(), 50)
+
+        for ax, m in zip(axes[0], measures):
+            f = fits[(fits[keys] == pd.Series(cfg, index=keys)).all(axis=1) & (fits["measure"] == m)].iloc[0]
+            pts = ax.scatter(x_mb, sub[m], color=color, s=30, zorder=3, label=label)
+            if np.isfinite(f["per_mb"]):
+                ax.plot(x_line, f["overhead"] + f["per_mb"] * x_line, linestyle="--", color=color, linewidth=1.4)
+        handles.append(pts)
+
+    for ax, m in zip(axes[0], measures):
+        ax.set_xlabel("Input size (Mb)"); ax.set_ylabel(labels[m])
+        ax.set_title(f"{labels[m]} against input size")
+        ax.set_xlim(left=0); ax.set_ylim(bottom=0)
+        ax.grid(axis="y", linestyle="--", alpha=0.35)
+
+    fig.legend(handles=handles, labels=[h.get_label() for h in handles], loc="lower center", ncol=3, frameon=False)
+    fig.tight_layout(rect=[0, 0.12, 1, 1])
+    fig_path = out_dir / "size_scaling_fits.png"
+    fig.savefig(fig_path, bbox_inches="tight")
+    plt.close(fig)
+    return fig_path, fits
@@ -0,0 +1,82 @@
+import warnings
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from pathlib import Path
+from typing import List
+
+from modules.load_save import save_table_csv
+from modules.common import SPECIES_PRETTY, _working_copy
+from modules.gene_level import _gene_level_label
+
+def _with_tool_labels(d: pd.DataFrame) -> pd.DataFrame:
+    """ tool_pretty column, computed once per run rather than once per bin"""
+    keys = [c for c in ("tool", "hint", "train_species") if c in d.columns]
+    runs = d[keys].drop_duplicates()
+    runs["tool_pretty"] = runs.apply(_gene_level_label, axis=1)
+    return d.merge(runs, on=keys, how="left")
+
+def plot_accuracy_tracks(df: pd.DataFrame, out_dir: Path, mut_rate: float = 0.0, n_seqs: int = 4,
+                         dpi: int = 300) -> List[Path]:
+    """ Per-bin F1 of every tool along the longest sequences of each species, under the reference gene density"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    d = _working_copy(df[np.isclose(pd.to_numeric(df["mut_rate"], errors="coerce"), mut_rate)])
+    if d.empty:
+        warnings.warn(f"No accuracy tracks at mutation rate {mut_rate}.")
+        return []
+    d = _with_tool_labels(d)
+    denom = 2 * d["tp"] + d["fp"] + d["fn"]
+    d["f1"] = np.where(denom > 0, 2 * d["tp"] / denom.where(denom > 0, 1), np.nan)
+
+    cmap = plt.get_cmap("viridis").copy()
+    cmap.set_bad("0.85")
+    outs = []
+    for species, ds in d.groupby("species"):
+        lengths = ds.groupby("seqid")["bin_start"].max().sort_values(ascending=False)
+        seqs = list(lengths.index[:n_seqs])
+        tools = sorted(ds["tool_pretty"].unique())
+        save_table_csv(ds[ds["seqid"].isin(seqs)][["tool_pretty", "seqid", "bin_start", "tp", "fp", "fn", "f1"]]
+                       .sort_values(["seqid", "tool_pretty", "bin_start"]),
+                       out_dir / f"csv/accuracy_tracks_{species}.csv")
+
+        panel_height = 1.0 + 0.3 * len(tools)
+        fig = plt.figure(figsize=(14, len(seqs) * (panel_height + 0.6) * 0.8 + 1.5), dpi=dpi)
+        grid = fig.add_gridspec(len(seqs), 1, hspace=0.45)
+        axes, image = [], None
+        for i, seqid in enumerate(seqs):
+            dq = ds[ds["seqid"] == seqid]
+            bin_size = int(dq["bin_size"].iloc[0])
+            piv = dq.pivot_table(index="tool_pretty", columns="bin_start", values="f1", aggfunc="first",
+                                 dropna=False).reindex(tools)
+            # tp + fn is the reference gene content of a bin, the same for every tool
+            density = dq.groupby("bin_start")[["tp", "fn"]].first().sum(axis=1).reindex(piv.columns, fill_value=0)
+            extent_mb = (piv.columns.max() + bin_size) / 1e6
+
+            # gene density strip right above the tools' F1 rows
+            ax_d, ax_t = grid[i].subgridspec(2, 1, height_ratios=(1.0, 0.3 * len(tools)), hspace=0.08).subplots()
+            axes += [ax_d, ax_t]
+            x = (np.asarray(piv.columns) + bin_size / 2) / 1e6
+            ax_d.fill_between(x, density.values / 1e3, step="mid", color="0.4", linewidth=0)
+            ax_d.set_xlim(0, extent_mb)
+            ax_d.set_ylabel("Gene kb", fontsize=8)
+            ax_d.set_title(seqid, loc="left", fontsize=10)
+            ax_d.tick_params(labelbottom=False)
+
+            image = ax_t.imshow(piv.values, aspect="auto", interpolation="nearest", cmap=cmap,
+                                vmin=0, vmax=1, extent=(0, extent_mb, len(tools) - 0.5, -0.5))
+            ax_t.set_yticks(range(len(tools)))
+            ax_t.set_yticklabels(tools, fontsize=7)
+            ax_t.set_xlim(0, extent_mb)
+            ax_t.grid(False)
+        axes[-1].set_xlabel("Position (Mb)")
+
+        fig.suptitle(f"Gene-nucleotide F1 along the genome - {SPECIES_PRETTY.get(species, species)}")
+        if image is not None:
+            fig.colorbar(image, ax=axes, shrink=0.6, label="F1-score (grey: no genes)")
+        out = out_dir / f"accuracy_tracks_{species}.png"
+        fig.savefig(out, dpi=dpi, bbox_inches="tight")
+        plt.close(fig)
+        outs.append(out)
+    return outs
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Download the datasets listed in config/datasets.tsv in parallel.
+
+Each manifest line gives a group, the destination (relative to $BENCHMARK_DIR),
+the URL and, optionally, the SHA-256 of the downloaded file. Downloads go to
+<dest>.part and resume from where they stopped (HTTP Range requests) when a
+transfer breaks or the script is rerun. The file is checked against its
+SHA-256, gunzipped when the URL ends in .gz and the destination does not, and
+only then renamed to its destination, next to a .<dest>.sha256 stamp.
+Destinations that exist with a matching stamp (or with no checksum in the
+manifest) are skipped.
+
+With --mirror (or $DATA_MIRROR) set to a directory, a file:// or an http(s)://
+base, files are first looked up at <mirror>/<host>/<path of the URL> (the
+layout of `wget -x` and of the mirror action) and at <mirror>/<file name>,
+falling back to the URL itself, so CI and offline nodes can provision from a
+local copy.
+
+Usage:
+    fetch_data.py [fetch] [--group G ...] [--jobs 4] [--mirror DIR|URL] [--manifest FILE]
+    fetch_data.py mirror DIR [--group G ...] [--jobs 4]
+    fetch_data.py lock [--manifest FILE]
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import urlparse
+
+CHUNK = 1 << 20
+
+
+@dataclass
+class Dataset:
+    group: str
+    dest: str
+    url: str
+    sha256: str = ""
+
+    @property
+    def decompress(self) -> bool:
+        return self.url.endswith(".gz") and not self.dest.endswith(".gz")
+
+
+def read_manifest(path: Path) -> List[Dataset]:
+    """ Tab-separated group, dest, url[, sha256]; # starts a comment"""
+    out = []
+    for n, line in enumerate(path.read_text().splitlines(), 1):
+        if not line.strip() or line.startswith("#"):
+            continue
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) < 3:
+            raise ValueError(f"{path}:{n}: expected group, dest, url[, sha256]")
+        out.append(Dataset(*[f.strip() for f in fields[:4]]))
+    return out
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def stamp_path(dest: Path) -> Path:
+    return dest.with_name(f".{dest.name}.sha256")
+
+
+def sources(url: str, mirror: Optional[str]) -> List[str]:
+    """ Mirror locations of `url`, then `url` itself"""
+    if not mirror:
+        return [url]
+    u = urlparse(url)
+    rel = [f"{u.netloc}{u.path}", Path(u.path).name]
+    if mirror.startswith(("http://", "https://")):
+        return [f"{mirror.rstrip('/')}/{r}" for r in rel] + [url]
+    base = Path(mirror[len("file://"):] if mirror.startswith("file://") else mirror)
+    return [str(base / r) for r in rel if (base / r).is_file()] + [url]
+
+
+def _open(src: str, offset: int):
+    """ (stream, offset it starts at); HTTP servers that ignore Range restart from 0"""
+    if not src.startswith(("http://", "https://", "ftp://")):
+        fh = open(src, "rb")
+        fh.seek(offset)
+        return fh, offset
+    req = urllib.request.Request(src, headers={"Range": f"bytes={offset}-"} if offset else {})
+    try:
+        resp = urllib.request.urlopen(req, timeout=60)
+    except urllib.error.HTTPError as e:
+        if e.code == 416 and offset:
+            # the part file is already complete
+            return None, offset
+        raise
+    return resp, offset if offset and getattr(resp, "status", 200) == 206 else 0
+
+
+def download(src: str, part: Path, retries: int = 3) -> None:
+    """ Fetch `src` into `part`, resuming from its current size"""
+    for attempt in range(1, retries + 1):
+        offset = part.stat().st_size if part.exists() else 0
+        try:
+            stream, start = _open(src, offset)
+            if stream is None:
+                return
+            with stream, open(part, "ab" if start else "wb") as out:
+                shutil.copyfileobj(stream, out, CHUNK)
+            return
+        except (urllib.error.URLError, OSError) as e:
+            if attempt == retries or isinstance(e, urllib.error.HTTPError) and e.code == 404:
+                raise
+            print(f"Retrying {src} ({e})", file=sys.stderr)
+            time.sleep(2 * attempt)
+
+
+def retrieve(ds: Dataset, part: Path, mirror: Optional[str], retries: int) -> str:
+    """ Download `ds` into `part` from the first source that works and has the right checksum; its SHA-256"""
+    errors = []
+    for src in sources(ds.url, mirror):
+        try:
+            download(src, part, retries)
+        except (urllib.error.URLError, OSError) as e:
+            errors.append(f"{src}: {e}")
+            continue
+        sha = file_sha256(part)
+        if ds.sha256 and sha != ds.sha256:
+            errors.append(f"{src}: SHA-256 {sha} does not match the manifest")
+            part.unlink()
+            continue
+        return sha
+    raise RuntimeError(f"Could not fetch {ds.dest}:\n  " + "\n  ".join(errors))
+
+
+def fetch(ds: Dataset, bdir: Path, mirror: Optional[str], retries: int = 3) -> str:
+    """ Provision one dataset; returns what was done"""
+    dest = bdir / ds.dest
+    stamp = stamp_path(dest)
+    if dest.exists() and (not ds.sha256 or (stamp.is_file() and stamp.read_text().strip() == ds.sha256)):
+        return "present"
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part = dest.with_name(Path(urlparse(ds.url).path).name + ".part")
+    sha = retrieve(ds, part, mirror, retries)
+
+    if ds.decompress:
+        tmp = dest.with_name(dest.name + ".partial")
+        with gzip.open(part, "rb") as src, open(tmp, "wb") as out:
+            shutil.copyfileobj(src, out, CHUNK)
+        os.replace(tmp, dest)
+        part.unlink()
+    else:
+        os.replace(part, dest)
+    stamp.write_text(sha + "\n")
+    return "fetched"
+
+
+def mirror_one(ds: Dataset, out_dir: Path, retries: int = 3) -> str:
+    """ Store the file at <out_dir>/<host>/<path>, as fetched by --mirror"""
+    u = urlparse(ds.url)
+    dest = out_dir / f"{u.netloc}{u.path}"
+    if dest.is_file() and (not ds.sha256 or file_sha256(dest) == ds.sha256):
+        return "present"
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part = dest.with_name(dest.name + ".part")
+    retrieve(ds, part, None, retries)
+    os.replace(part, dest)
+    return "fetched"
+
+
+def lock(manifest: Path, bdir: Path) -> int:
+    """ Fill empty checksums from the stamps of previous fetches"""
+    lines, filled = [], 0
+    for line in manifest.read_text().splitlines():
+        fields = line.split("\t")
+        if line.startswith("#") or len(fields) < 3 or (len(fields) > 3 and fields[3].strip()):
+            lines.append(line)
+            continue
+        stamp = stamp_path(bdir / fields[1].strip())
+        if stamp.is_file():
+            fields = fields[:3] + [stamp.read_text().strip()]
+            filled += 1
+        lines.append("\t".join(fields))
+    manifest.write_text("\n".join(lines) + "\n")
+    return filled
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Parallel, resumable, checksum-verified dataset download.")
+    ap.add_argument("action", nargs="?", choices=["fetch", "mirror", "lock"], default="fetch")
+    ap.add_argument("out_dir", nargs="?", type=Path, help="Mirror directory to fill (mirror action)")
+    ap.add_argument("--manifest", type=Path, default=None, help="Default: config/datasets.tsv")
+    ap.add_argument("--group", nargs="+", default=None, help="Only these groups (default: all)")
+    ap.add_argument("--jobs", type=int, default=int(os.environ.get("FETCH_JOBS", 4)), help="Parallel downloads")
+    ap.add_argument("--mirror", default=os.environ.get("DATA_MIRROR"), help="Local directory, file:// or http(s):// base")
+    ap.add_argument("--retries", type=int, default=3)
+    args = ap.parse_args()
+
+    if not os.environ.get("BENCHMARK_DIR"):
+        sys.exit("Error: BENCHMARK_DIR is not set. Please source the env.sh file first.")
+    bdir = Path(os.environ["BENCHMARK_DIR"])
+    manifest = args.manifest or bdir / "config" / "datasets.tsv"
+
+    if args.action == "lock":
+        print(f"{lock(manifest, bdir)} checksums added to {manifest}")
+        return
+    if args.action == "mirror" and args.out_dir is None:
+        ap.error("mirror needs the output directory")
+
+    datasets = [d for d in read_manifest(manifest) if args.group is None or d.group in args.group]
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        if args.action == "mirror":
+            futures = {pool.submit(mirror_one, d, args.out_dir, args.retries): d for d in datasets}
+        else:
+            futures = {pool.submit(fetch, d, bdir, args.mirror, args.retries): d for d in datasets}
+        for fut in as_completed(futures):
+            d = futures[fut]
+            try:
+                print(f"{d.dest}: {fut.result()}", flush=True)
+            except Exception as e:
+                failed += 1
+                print(f"Error: {e}", file=sys.stderr, flush=True)
+    if failed:
+        sys.exit(f"{failed} of {len(datasets)} datasets could not be fetched.")
+
+
+if __name__ == "__main__":
+    main()
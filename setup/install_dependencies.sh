@@ -384,3 +384,10 @@ command -v gto_fasta_mutate >/dev/null 2>&1 || {
 
     source ${ENV_FILE}
 }
+
+# obtain_metrics (recompilado sempre que o .cpp for mais recente que o binário)
+OBTAIN_METRICS="${BENCHMARK_DIR}/metrics/obtain_metrics"
+if [ ! -x "$OBTAIN_METRICS" ] || [ "${OBTAIN_METRICS}.cpp" -nt "$OBTAIN_METRICS" ]; then
+    echo "Compiling obtain_metrics..."
+    g++ -O3 -std=c++17 -pthread "${OBTAIN_METRICS}.cpp" -o "$OBTAIN_METRICS"
+fi